@@ -0,0 +1,125 @@
+# benchmark_catalog_parquet.py
+# Load time and memory of the catalog as CSV (pandas.read_csv) vs. the
+# partitioned Parquet layout written by glue_etl.py (catalog_parquet.py).
+#
+# dataset/raw/movies.csv is a git-lfs object, so a synthetic catalog of the
+# same size (~230 MB) is generated and written in both formats first.
+#
+#   python3 scripts/benchmark_catalog_parquet.py --rows 600000
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from benchmark_dynamodb_items import make_catalog
+from catalog_parquet import DICTIONARY_COLUMNS
+
+PARTITION_COLUMNS = ["Type", "Year"]
+COLUMNS = ["imdbID", "Title", "Genre", "Language", "imdbRating"]
+YEAR = "1994"
+
+
+def peak_rss_mb():
+    # ru_maxrss survives fork/exec on Linux and would report the parent's
+    # peak; VmHWM is per address space and starts fresh in the child
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+
+
+def build_files(rows, directory):
+    df = make_catalog(rows)
+    rng = np.random.default_rng(7)
+    df["Type"] = rng.choice(["movie", "series", "episode"], rows, p=[0.8, 0.15, 0.05])
+    words = np.array("the a man woman city war love family secret journey dark life last world".split())
+    # Plots and casts make up most of the real file
+    df["Plot"] = [" ".join(rng.choice(words, 40)) for _ in range(rows)]
+    df["Actors"] = rng.choice(["Actor One, Actor Two, Actor Three", "Someone Else, Another Person"], rows)
+
+    csv_path = os.path.join(directory, "movies.csv")
+    df.to_csv(csv_path, index=False)
+
+    parquet_path = os.path.join(directory, "parquet")
+    # Same layout and encoding as the Spark writer in glue_etl.py
+    pq.write_to_dataset(pa.Table.from_pandas(df, preserve_index=False), parquet_path,
+                        partition_cols=PARTITION_COLUMNS, use_dictionary=True, compression="snappy")
+    return csv_path, parquet_path
+
+
+def measure(kind, path, columns):
+    """Runs in a fresh interpreter so peak RSS belongs to this load only"""
+    import pandas as pd
+    from catalog_parquet import read_catalog
+
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    if kind == "csv":
+        result = pd.read_csv(path, usecols=columns)
+    elif kind == "csv-year":
+        result = pd.read_csv(path, usecols=columns + ["Year"], dtype={"Year": str})
+        result = result[result["Year"] == YEAR]
+    elif kind == "parquet":
+        result = read_catalog(path, columns=columns).to_pandas()
+    elif kind == "parquet-year":
+        result = read_catalog(path, columns=columns, filters=[("Year", "=", YEAR)]).to_pandas()
+    else:
+        result = read_catalog(path, columns=columns)
+    elapsed = time.perf_counter() - start
+
+    size = result.nbytes if kind == "arrow" else int(result.memory_usage(deep=True).sum())
+    print(json.dumps({"seconds": elapsed, "peak_mb": peak_rss_mb() - baseline, "result_mb": size / 2 ** 20}))
+
+
+def run(label, kind, path, columns):
+    command = [sys.executable, __file__, "--measure", kind, path, json.dumps(columns)]
+    result = json.loads(subprocess.check_output(command, cwd=os.path.dirname(os.path.abspath(__file__))))
+    print(f"{label:<36} {result['seconds']:7.2f}s  peak +{result['peak_mb']:7.0f} MB  "
+          f"result {result['result_mb']:7.0f} MB")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=600_000)
+    parser.add_argument("--measure", nargs=3, metavar=("KIND", "PATH", "COLUMNS"))
+    args = parser.parse_args()
+
+    if args.measure:
+        kind, path, columns = args.measure
+        measure(kind, path, json.loads(columns))
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"Writing {args.rows:,} synthetic catalog rows as CSV and Parquet...")
+        csv_path, parquet_path = build_files(args.rows, directory)
+        parquet_bytes = sum(os.path.getsize(os.path.join(root, name))
+                            for root, _, names in os.walk(parquet_path) for name in names)
+        print(f"CSV {os.path.getsize(csv_path) / 2 ** 20:.0f} MB, Parquet {parquet_bytes / 2 ** 20:.0f} MB")
+        print(f"Dictionary columns: {DICTIONARY_COLUMNS + PARTITION_COLUMNS}")
+
+        csv_all = run("read_csv, all columns", "csv", csv_path, None)
+        parquet_all = run("read_catalog, all columns (pandas)", "parquet", parquet_path, None)
+        csv_some = run(f"read_csv, {len(COLUMNS)} columns", "csv", csv_path, COLUMNS)
+        parquet_some = run(f"read_catalog, {len(COLUMNS)} columns (pandas)", "parquet", parquet_path, COLUMNS)
+        run(f"read_catalog, {len(COLUMNS)} columns (arrow)", "arrow", parquet_path, COLUMNS)
+        csv_year = run(f"read_csv + filter Year={YEAR}", "csv-year", csv_path, COLUMNS)
+        parquet_year = run(f"read_catalog, Year={YEAR} partition", "parquet-year", parquet_path, COLUMNS)
+
+        print(f"All columns: {csv_all['seconds'] / parquet_all['seconds']:.1f}x faster, "
+              f"{csv_all['peak_mb'] / parquet_all['peak_mb']:.1f}x lower peak")
+        print(f"{len(COLUMNS)} columns:   {csv_some['seconds'] / parquet_some['seconds']:.1f}x faster, "
+              f"{csv_some['peak_mb'] / parquet_some['peak_mb']:.1f}x lower peak")
+        print(f"One year:    {csv_year['seconds'] / parquet_year['seconds']:.1f}x faster, "
+              f"{csv_year['peak_mb'] / max(parquet_year['peak_mb'], 1):.1f}x lower peak")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# benchmark_dynamodb_items.py
+# Compares the row-by-row prepare_for_dynamodb with the column-wise
+# to_dynamodb_items on synthetic catalog rows.
+#
+#   python3 scripts/benchmark_dynamodb_items.py --rows 1000000
+import argparse
+import gc
+import time
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+from boto3.dynamodb.types import TypeSerializer
+
+from dynamodb_items import prepare_for_dynamodb, to_dynamodb_items
+
+GENRES = ["Action, Adventure", "Comedy", "Drama, Romance", "Horror, Thriller", "Animation, Family", "Sci-Fi"]
+LANGUAGES = ["English", "English, Spanish", "French", "Turkish", "Japanese"]
+RATINGS = ["PG", "PG-13", "R", "N/A"]
+
+
+def make_catalog(rows, seed=42):
+    """Build a DataFrame shaped like the cleaned movies catalog after toPandas()"""
+    rng = np.random.default_rng(seed)
+    ids = np.char.add("tt", np.char.zfill(np.arange(rows).astype(str), 7))
+
+    rating = rng.uniform(1, 10, rows).round(1).astype(np.float32)
+    rating[rng.random(rows) < 0.05] = np.nan
+    metascore = rng.integers(10, 100, rows).astype(np.float32)
+    metascore[rng.random(rows) < 0.2] = np.nan
+
+    return pd.DataFrame({
+        "imdbID": ids,
+        "ITEM_ID": ids,
+        "Title": np.char.add("Movie ", np.arange(rows).astype(str)),
+        "Year": rng.integers(1950, 2025, rows).astype(str),
+        "Genre": rng.choice(GENRES, rows),
+        "Language": rng.choice(LANGUAGES, rows),
+        "Rated": rng.choice(RATINGS, rows),
+        "Director": rng.choice(["Jane Doe", "John Smith", ""], rows),
+        "Plot": rng.choice(["A short plot.", "Another plot about something.", ""], rows),
+        "Poster": np.char.add("https://example.com/poster/", ids),
+        "imdbVotes": rng.integers(0, 2_000_000, rows).astype(str),
+        "imdbRating": rating,
+        "Metascore": metascore,
+    }).astype({name: object for name in ["imdbID", "ITEM_ID", "Title", "Year", "Genre", "Language",
+                                         "Rated", "Director", "Plot", "Poster", "imdbVotes"]})
+
+
+def check_equivalent(df, sample=2000):
+    """The vectorized items must serialize to the same values as the original ones"""
+    serializer = TypeSerializer()
+    head = df.head(sample)
+    legacy = [{k: serializer.serialize(v) for k, v in item.items()} for item in prepare_for_dynamodb(head)]
+    vectorized = to_dynamodb_items(head)
+
+    for old, new in zip(legacy, vectorized):
+        assert old.keys() == new.keys()
+        for key, value in old.items():
+            if 'N' in value:
+                assert Decimal(value['N']) == Decimal(new[key]['N']), (key, value, new[key])
+            else:
+                assert value == new[key], (key, value, new[key])
+    print(f"Checked {len(legacy)} items: outputs are equivalent")
+
+
+def run(label, fn, df):
+    gc.collect()
+    start = time.perf_counter()
+    items = fn(df)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {elapsed:8.2f}s  {len(items) / elapsed:>12,.0f} rows/sec")
+    del items
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"Building {args.rows:,} synthetic catalog rows...")
+    df = make_catalog(args.rows)
+    check_equivalent(df)
+
+    serializer = TypeSerializer()
+
+    def legacy_wire(frame):
+        # What the old path effectively did: build items, then let the
+        # resource layer serialize every attribute before sending.
+        return [{k: serializer.serialize(v) for k, v in item.items()} for item in prepare_for_dynamodb(frame)]
+
+    legacy = run("prepare_for_dynamodb", prepare_for_dynamodb, df)
+    legacy_full = run("prepare_for_dynamodb + serialize", legacy_wire, df)
+    vectorized = run("to_dynamodb_items", to_dynamodb_items, df)
+
+    print(f"Speedup vs prepare_for_dynamodb:             {legacy / vectorized:.1f}x")
+    print(f"Speedup vs prepare_for_dynamodb + serialize: {legacy_full / vectorized:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
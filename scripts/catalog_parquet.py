@@ -0,0 +1,47 @@
+"""
+Read the Parquet catalog written by glue_etl.py.
+
+The Glue job writes one dataset per content type under dataset/parquet/,
+partitioned by Type/Year (hive style directories). Only the requested columns
+are read, local files are memory mapped instead of copied into Python memory,
+and Genre/Language (plus the partition columns) come back dictionary encoded,
+so a pandas conversion yields categoricals rather than millions of strings.
+
+    table = read_catalog("dataset/parquet/movies", columns=["imdbID", "Title", "Genre"])
+    df = table.to_pandas()
+"""
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Must match PARQUET_DICTIONARY_COLUMNS in glue_etl.py
+DICTIONARY_COLUMNS = ["Genre", "Language"]
+
+PARTITION_TYPE = pa.dictionary(pa.int32(), pa.string())
+
+
+def catalog_partitioning(path):
+    """Hive partitioning of the dataset at path with every partition value read as a string"""
+    # Discovery alone would infer Year as int32 for the movies catalog (and
+    # string for series ranges such as "2010–2015"), so look up the partition
+    # names and pin them to dictionary encoded strings
+    names = ds.dataset(path, format="parquet", partitioning="hive").partitioning.schema.names
+    return ds.HivePartitioning.discover(schema=pa.schema([(name, PARTITION_TYPE) for name in names]))
+
+
+def read_catalog(path, columns=None, filters=None, dictionary_columns=DICTIONARY_COLUMNS):
+    """
+    Load a Parquet catalog as an Arrow table.
+
+    path can be a local directory or an s3:// URI. columns limits the read to
+    those columns (partition columns included); filters is passed to pyarrow
+    and prunes whole Type/Year directories, e.g. [("Year", "=", "1994")].
+    """
+    return pq.read_table(
+        path,
+        columns=columns,
+        filters=filters,
+        memory_map=True,
+        read_dictionary=dictionary_columns,
+        partitioning=catalog_partitioning(path),
+    )
@@ -0,0 +1,72 @@
+"""
+Fail when the copies of a shared module drift apart.
+
+Each service is its own Docker build context, so modules used by several
+services are copied into each of them rather than imported from a shared
+package. This check (run in CI and by scripts/tests) keeps the copies
+byte-identical:
+
+    python scripts/check_shared_modules.py
+
+Add new copies to SHARED_MODULES; paths are relative to the repository root.
+"""
+import difflib
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SHARED_MODULES = {
+    'cache.py': [
+        'services/bedrock_backend/cache.py',
+        'services/authentication-service/cache.py',
+    ],
+    'config_provider.py': [
+        'services/bedrock_backend/config_provider.py',
+        'services/authentication-service/config_provider.py',
+    ],
+    'logging_setup.py': [
+        'services/bedrock_backend/logging_setup.py',
+        'services/authentication-service/logging_setup.py',
+        'services/machine_learning_service/app/core/logging_setup.py',
+    ],
+    'resilience.py': [
+        'services/bedrock_backend/resilience.py',
+        'services/machine_learning_service/app/core/resilience.py',
+        'services/user-service/app/core/resilience.py',
+    ],
+    'security.py': [
+        'services/machine_learning_service/app/core/security.py',
+        'services/user-service/app/core/security.py',
+    ],
+}
+
+
+def drifted_copies(root=REPO_ROOT, modules=SHARED_MODULES):
+    """(module, copy path, unified diff against the first copy) for every copy that differs"""
+    problems = []
+    for name, paths in modules.items():
+        with open(os.path.join(root, paths[0]), encoding='utf-8') as f:
+            reference = f.read().splitlines(keepends=True)
+        for path in paths[1:]:
+            with open(os.path.join(root, path), encoding='utf-8') as f:
+                copy = f.read().splitlines(keepends=True)
+            if copy != reference:
+                diff = ''.join(difflib.unified_diff(reference, copy, paths[0], path))
+                problems.append((name, path, diff))
+    return problems
+
+
+def main():
+    problems = drifted_copies()
+    for name, path, diff in problems:
+        print(f"{path} differs from the other copies of {name}:\n{diff}")
+    if problems:
+        print("Apply the change to every copy listed in scripts/check_shared_modules.py")
+        return 1
+    print(f"{len(SHARED_MODULES)} shared modules, all copies identical")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,212 @@
+"""
+Helpers for turning a pandas catalog DataFrame into DynamoDB items.
+
+Shipped to the Glue jobs through --extra-py-files, so it must only depend on
+what the Glue runtime already provides (pandas, numpy, boto3).
+"""
+import gc
+import math
+import time
+from decimal import Decimal
+
+import boto3
+import numpy as np
+import pandas as pd
+from boto3.dynamodb.types import TypeSerializer
+
+# DynamoDB BatchWriteItem limit
+BATCH_SIZE = 25
+
+# Rows converted at once when writing a Spark partition from an executor
+PARTITION_CHUNK_SIZE = 5000
+
+# Shared attribute value for missing / NaN / inf cells. botocore only reads the
+# request dicts, so one instance can safely be referenced by every item.
+EMPTY_STRING = {'S': ''}
+
+_serializer = TypeSerializer()
+
+
+def prepare_for_dynamodb(df):
+    """Row-by-row conversion to resource-level items (original implementation)"""
+    # Replace NaN with None first
+    df_clean = df.replace({np.nan: None, np.inf: None, -np.inf: None})
+
+    records = df_clean.to_dict('records')
+    clean_records = []
+
+    for record in records:
+        clean_record = {}
+
+        for key, value in record.items():
+            # Skip None values
+            if value is None:
+                clean_record[key] = ""
+            # Convert floats to Decimal
+            elif isinstance(value, float):
+                # Check for NaN or Infinity
+                if math.isnan(value) or math.isinf(value):
+                    clean_record[key] = ""
+                else:
+                    clean_record[key] = Decimal(str(value))
+            # Keep other types as is
+            else:
+                clean_record[key] = value
+
+        clean_records.append(clean_record)
+
+    return clean_records
+
+
+def _serialize_value(value):
+    """Attribute value for a single (non-missing) cell value"""
+    if isinstance(value, str):
+        return {'S': value}
+    if isinstance(value, (bool, np.bool_)):
+        return {'BOOL': bool(value)}
+    if isinstance(value, (float, np.floating)):
+        if math.isnan(value) or math.isinf(value):
+            return EMPTY_STRING
+        return {'N': str(float(value))}
+    if isinstance(value, (int, np.integer)):
+        return {'N': str(int(value))}
+    return _serializer.serialize(value)
+
+
+def _serialize_column(column):
+    """Convert one pandas Series into a list of DynamoDB attribute values"""
+    if pd.api.types.is_float_dtype(column):
+        # Spark FloatType arrives as float32; widen first so the text matches
+        # what str(float(value)) produced in the row-by-row version.
+        column = column.astype(np.float64)
+
+    # Catalog columns are highly repetitive (Genre, Language, Year, ratings),
+    # so serialize each distinct value once and broadcast it by code. Missing
+    # values get code -1, which picks the trailing EMPTY_STRING entry.
+    codes, uniques = pd.factorize(column, use_na_sentinel=True)
+    lookup = np.empty(len(uniques) + 1, dtype=object)
+    lookup[:-1] = [_serialize_value(value) for value in uniques.tolist()]
+    lookup[-1] = EMPTY_STRING
+    return lookup[codes].tolist()
+
+
+def to_dynamodb_items(df):
+    """
+    Column-wise conversion of a DataFrame into DynamoDB wire-format items.
+
+    Same semantics as prepare_for_dynamodb (None/NaN/inf -> "" and floats ->
+    numbers), but each column is converted in one pass and the result is
+    already serialized ({'S': ...}, {'N': ...}), ready for the low-level
+    batch_write_item call without going through the resource TypeSerializer.
+    """
+    names = [str(name) for name in df.columns]
+
+    # Millions of small acyclic dicts only make the cyclic GC rescan the
+    # young generation over and over; pause it while building them.
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        columns = [_serialize_column(df[name]) for name in df.columns]
+        return [dict(zip(names, row)) for row in zip(*columns)]
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def batch_write_requests(client, table_name, write_requests, batch_size=BATCH_SIZE, max_retries=8):
+    """Send PutRequest/DeleteRequest entries with BatchWriteItem, retrying unprocessed ones"""
+    success_count = 0
+    error_count = 0
+
+    for start in range(0, len(write_requests), batch_size):
+        requests = write_requests[start:start + batch_size]
+
+        attempt = 0
+        while requests:
+            try:
+                response = client.batch_write_item(RequestItems={table_name: requests})
+            except Exception as e:
+                print(f"Error writing batch starting at item {start}: {e}")
+                error_count += len(requests)
+                break
+
+            unprocessed = response.get('UnprocessedItems', {}).get(table_name, [])
+            success_count += len(requests) - len(unprocessed)
+            requests = unprocessed
+
+            if requests:
+                attempt += 1
+                if attempt > max_retries:
+                    print(f"Giving up on {len(requests)} unprocessed items after {max_retries} retries")
+                    error_count += len(requests)
+                    break
+                time.sleep(min(0.05 * 2 ** attempt, 5))
+
+        if (start // batch_size + 1) % 40 == 0:
+            print(f"Processed {min(start + batch_size, len(write_requests))}/{len(write_requests)} items")
+
+    return success_count, error_count
+
+
+def batch_write_items(client, table_name, items, batch_size=BATCH_SIZE, max_retries=8):
+    """Write wire-format items with BatchWriteItem, retrying unprocessed ones"""
+    requests = [{'PutRequest': {'Item': item}} for item in items]
+    return batch_write_requests(client, table_name, requests, batch_size, max_retries)
+
+
+def batch_delete_keys(client, table_name, key_name, key_values, batch_size=BATCH_SIZE, max_retries=8):
+    """Delete items by string partition key (tombstones for removed catalog rows)"""
+    requests = [{'DeleteRequest': {'Key': {key_name: {'S': value}}}} for value in key_values]
+    return batch_write_requests(client, table_name, requests, batch_size, max_retries)
+
+
+def write_partition(rows, table_name, region_name=None, chunk_size=PARTITION_CHUNK_SIZE):
+    """
+    mapPartitions target: write one Spark partition from the executor.
+
+    Rows are converted and written in chunks so executor memory stays bounded
+    and nothing is collected on the driver. Yields a single
+    (success_count, error_count) tuple for the partition.
+    """
+    client = boto3.client('dynamodb', region_name=region_name)
+    success_count = 0
+    error_count = 0
+    chunk = []
+
+    def flush():
+        nonlocal success_count, error_count
+        written, failed = batch_write_items(client, table_name, to_dynamodb_items(pd.DataFrame(chunk)))
+        success_count += written
+        error_count += failed
+        chunk.clear()
+
+    for row in rows:
+        chunk.append(row.asDict())
+        if len(chunk) >= chunk_size:
+            flush()
+    if chunk:
+        flush()
+
+    yield success_count, error_count
+
+
+def delete_partition(rows, table_name, key_name, region_name=None, chunk_size=PARTITION_CHUNK_SIZE):
+    """mapPartitions target: delete the keys of one Spark partition of tombstone rows"""
+    client = boto3.client('dynamodb', region_name=region_name)
+    success_count = 0
+    error_count = 0
+    chunk = []
+
+    for row in rows:
+        chunk.append(row[key_name])
+        if len(chunk) >= chunk_size:
+            deleted, failed = batch_delete_keys(client, table_name, key_name, chunk)
+            success_count += deleted
+            error_count += failed
+            chunk = []
+    if chunk:
+        deleted, failed = batch_delete_keys(client, table_name, key_name, chunk)
+        success_count += deleted
+        error_count += failed
+
+    yield success_count, error_count
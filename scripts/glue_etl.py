@@ -0,0 +1,283 @@
+# --bucket
+# --movies_table
+# --series_table
+# --content_types (optional, comma separated, default: movies,tv-series)
+# --full_refresh  (optional, "true" rewrites every row to DynamoDB)
+#
+# One Glue job for both catalogs. Each content type is read and cleaned once,
+# the cleaned frame is cached, and the Personalize CSV, the knowledge base CSV
+# and the DynamoDB items are all produced from that cached frame. Content
+# types run concurrently so they share the same cluster instead of paying for
+# two separate jobs.
+#
+# DynamoDB writes are incremental: a content hash per imdbID is kept from the
+# previous run in a Parquet side file, and only new or modified rows are
+# written. Rows that disappeared from the catalog are deleted (tombstoned).
+#
+# The cleaned catalog is also written as Parquet partitioned by Type/Year, for
+# readers that want columns instead of re-parsing CSV (see catalog_parquet.py).
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from awsglue.transforms import *
+from awsglue.utils import getResolvedOptions
+from pyspark.context import SparkContext
+from awsglue.context import GlueContext
+from awsglue.job import Job
+from pyspark.sql import functions as F
+from pyspark.sql.types import FloatType, StringType
+from pyspark.sql.utils import AnalysisException
+import boto3
+from dynamodb_items import write_partition, delete_partition
+from incremental_sync import with_content_hash, split_changes, sync_changes
+from s3_single_object import write_single_csv
+
+# Per-content-type configuration
+CONTENT_TYPES = {
+    'movies': {
+        'label': 'Movies',
+        'input_key': 'dataset/raw/movies.csv',
+        'personalize_key': 'dataset/processed/personalize_movies.csv',
+        'knowledge_base_key': 'dataset/knowledge_base/movies.csv',
+        'state_key': 'dataset/state/movies_hashes.parquet',
+        'parquet_key': 'dataset/parquet/movies/',
+        'table_arg': 'movies_table',
+        # Filled with "" to avoid issues in Personalize
+        'string_columns': ["Title", "Year", "Genre", "Director", "Actors", "Plot", "Language", "Country",
+                           "imdbVotes", "Rated", "Released", "Runtime", "Writer", "Awards", "Poster", "Type",
+                           "DVD", "BoxOffice", "Production", "Website"],
+        'float_columns': ["imdbRating", "Metascore"],
+        'drop_columns': [],
+        # Rows are dropped when any of these is null or one of invalid_ids
+        'id_columns': ["imdbID"],
+        'invalid_ids': [],
+        'personalize_columns': ["ITEM_ID", "Title", "Genre", "Year"],
+    },
+    'tv-series': {
+        'label': 'TV Series',
+        'input_key': 'dataset/raw/TVseries.csv',
+        'personalize_key': 'dataset/processed/personalize_tvseries.csv',
+        'knowledge_base_key': 'dataset/knowledge_base/tvseries.csv',
+        'state_key': 'dataset/state/tvseries_hashes.parquet',
+        'parquet_key': 'dataset/parquet/tvseries/',
+        'table_arg': 'series_table',
+        'string_columns': ["Title", "Year", "Genre", "Director", "Actors", "Plot", "Language", "Country",
+                           "imdbVotes", "Poster"],
+        'float_columns': ["imdbRating", "TotalSeasons"],
+        'drop_columns': ["Error"],
+        'id_columns': ["ITEM_ID", "imdbID"],
+        'invalid_ids': ["", "N/A", "n/a", "NA"],
+        'personalize_columns': ["ITEM_ID", "Title", "Genre"],
+    },
+}
+
+# Parquet layout: partition directories (only those present in a catalog)
+# and low-cardinality columns that must stay dictionary encoded
+PARQUET_PARTITION_COLUMNS = ["Type", "Year"]
+PARQUET_DICTIONARY_COLUMNS = ["Genre", "Language"]
+
+# Initialize Glue context
+sc = SparkContext()
+glueContext = GlueContext(sc)
+spark = glueContext.spark_session
+job = Job(glueContext)
+
+# Get job parameters
+args = getResolvedOptions(sys.argv, [
+    'JOB_NAME',
+    'bucket',
+    'movies_table',
+    'series_table'
+])
+bucket = args['bucket']
+if bucket.startswith('s3://'):
+    bucket = bucket[5:]  # Remove s3:// prefix
+bucket = bucket.rstrip('/')
+
+content_types = list(CONTENT_TYPES)
+if '--content_types' in sys.argv:
+    content_types = getResolvedOptions(sys.argv, ['content_types'])['content_types'].split(',')
+    content_types = [name.strip() for name in content_types if name.strip()]
+unknown = [name for name in content_types if name not in CONTENT_TYPES]
+if unknown:
+    raise Exception(f"Unknown content types: {unknown}. Expected any of {list(CONTENT_TYPES)}")
+
+full_refresh = False
+if '--full_refresh' in sys.argv:
+    full_refresh = getResolvedOptions(sys.argv, ['full_refresh'])['full_refresh'].lower() == 'true'
+
+job.init(args['JOB_NAME'], args)
+region_name = boto3.session.Session().region_name
+
+
+def clean(df, config):
+    """All cleaning steps for one catalog, kept lazy until the frame is cached"""
+    # Check if ITEM_ID exists
+    if "ITEM_ID" not in df.columns:
+        if "imdbID" not in df.columns:
+            raise Exception("Neither ITEM_ID nor imdbID column found in the source data. Cannot proceed.")
+        # Add ITEM_ID column as a copy of imdbID
+        df = df.withColumn("ITEM_ID", F.col("imdbID"))
+
+    # Make sure imdbID exists (for DynamoDB primary key)
+    if "imdbID" not in df.columns:
+        df = df.withColumn("imdbID", F.col("ITEM_ID"))
+
+    # Drop completely empty rows
+    df = df.dropna(how='all')
+
+    # Remove rows with missing / placeholder IDs
+    for id_column in config['id_columns']:
+        condition = F.col(id_column).isNotNull()
+        if config['invalid_ids']:
+            condition = condition & ~F.col(id_column).isin(config['invalid_ids'])
+        df = df.filter(condition)
+
+    # Ensure Year column is a string for Personalize and DynamoDB
+    if "Year" in df.columns:
+        df = df.withColumn("Year", F.col("Year").cast(StringType()))
+
+    # Convert numeric columns to the right type to match schema
+    for col_name in config['float_columns']:
+        if col_name in df.columns:
+            df = df.withColumn(col_name, F.col(col_name).cast(FloatType()))
+
+    for col_name in config['drop_columns']:
+        if col_name in df.columns:
+            df = df.drop(col_name)
+
+    # Fill null values with appropriate defaults to avoid issues in Personalize
+    for col_name in config['string_columns']:
+        if col_name in df.columns:
+            df = df.withColumn(col_name, F.coalesce(F.col(col_name), F.lit("")))
+
+    return df
+
+
+def read_previous_hashes(state_path):
+    """imdbID -> content_hash from the last successful run, or None on the first run"""
+    try:
+        return spark.read.parquet(state_path).select("imdbID", F.col("content_hash").alias("previous_hash"))
+    except AnalysisException:
+        return None
+
+
+def write_parquet(df, path):
+    """Columnar copy of the catalog, partitioned by Type/Year"""
+    partitions = [c for c in PARQUET_PARTITION_COLUMNS if c in df.columns]
+    writer = df.repartition(*partitions) if partitions else df
+    writer = (writer.write
+              .mode('overwrite')
+              .option('compression', 'snappy')
+              .option('parquet.enable.dictionary', 'true'))
+    # Pin the categorical columns per column so they stay dictionary encoded
+    # even if the session-wide default is switched off
+    for col_name in PARQUET_DICTIONARY_COLUMNS:
+        if col_name in df.columns:
+            writer = writer.option(f'parquet.enable.dictionary#{col_name}', 'true')
+    if partitions:
+        writer = writer.partitionBy(*partitions)
+    writer.parquet(path)
+
+
+def write_to_dynamodb(df, dynamodb_table):
+    # Each executor converts and writes its own partitions; only the
+    # per-partition counts come back to the driver
+    counts = df.rdd.mapPartitions(
+        lambda rows: write_partition(rows, dynamodb_table, region_name)
+    ).collect()
+    return sum(written for written, _ in counts), sum(failed for _, failed in counts)
+
+
+def delete_from_dynamodb(df, dynamodb_table):
+    counts = df.rdd.mapPartitions(
+        lambda rows: delete_partition(rows, dynamodb_table, "imdbID", region_name)
+    ).collect()
+    return sum(deleted for deleted, _ in counts), sum(failed for _, failed in counts)
+
+
+def process(content_type):
+    config = CONTENT_TYPES[content_type]
+    label = config['label']
+    input_path = f"s3://{bucket}/{config['input_key']}"
+    dynamodb_table = args[config['table_arg']]
+
+    # Read the data directly from S3
+    print(f"[{label}] Reading data from: {input_path}")
+    raw_df = spark.read.option("header", "true").option("inferSchema", "true").csv(input_path)
+    print(f"[{label}] Original columns: {raw_df.columns}")
+
+    # Cache the cleaned frame: every output below reads it instead of
+    # re-scanning and re-cleaning the raw CSV
+    df = clean(raw_df, config).cache()
+    record_count = df.count()
+    print(f"[{label}] Final columns: {df.columns}")
+    print(f"[{label}] Final record count: {record_count}")
+
+    personalize_df = df.select(*[F.col(name) for name in config['personalize_columns']])
+    print(f"[{label}] Personalize columns: {personalize_df.columns}")
+    df.show(5, truncate=False)
+
+    s3_client = boto3.client('s3')
+
+    # PART 1: Write to S3 as a single CSV file for Personalize
+    # -------------------------------------------------------
+    print(f"[{label}] Writing Personalize data to s3://{bucket}/{config['personalize_key']}")
+    file_size = write_single_csv(personalize_df, s3_client, bucket, config['personalize_key'])
+    print(f"[{label}] Successfully wrote {file_size} bytes to s3://{bucket}/{config['personalize_key']}")
+
+    # PART 1.5: Write full data to S3 as CSV for knowledge base
+    # ---------------------------------------------------------
+    print(f"[{label}] Writing knowledge base to s3://{bucket}/{config['knowledge_base_key']}")
+    knowledge_base_size = write_single_csv(df, s3_client, bucket, config['knowledge_base_key'])
+    print(f"[{label}] Successfully wrote knowledge base ({knowledge_base_size} bytes)")
+
+    # PART 1.6: Write the catalog as partitioned Parquet
+    # --------------------------------------------------
+    parquet_path = f"s3://{bucket}/{config['parquet_key']}"
+    print(f"[{label}] Writing Parquet catalog to {parquet_path}")
+    write_parquet(df, parquet_path)
+
+    # PART 2: Write changed rows to DynamoDB
+    # ---------------------------------------
+    state_path = f"s3://{bucket}/{config['state_key']}"
+    hashed = with_content_hash(df).cache()
+    previous = None if full_refresh else read_previous_hashes(state_path)
+
+    if previous is None:
+        print(f"[{label}] No previous state (or full refresh): writing every row")
+    changed_df, deleted_df = split_changes(hashed, previous)
+    changed_df = changed_df.select(*df.columns)
+
+    def save_state():
+        hashed.select("imdbID", "content_hash").write.mode("overwrite").parquet(state_path)
+        print(f"[{label}] Saved {record_count} content hashes to {state_path}")
+
+    print(f"[{label}] Writing new or modified rows to DynamoDB table: {dynamodb_table}")
+    # Only advance the state when everything landed, so failed rows are
+    # picked up again as changes by the next run
+    success_count, deleted_count, error_count = sync_changes(
+        changed_df, deleted_df,
+        lambda rows: write_to_dynamodb(rows, dynamodb_table),
+        lambda ids: delete_from_dynamodb(ids, dynamodb_table),
+        save_state)
+    print(f"[{label}] DynamoDB write summary: {success_count} written, {deleted_count} deleted, {error_count} failed")
+    if error_count:
+        print(f"[{label}] Keeping previous state because of failed writes")
+
+    hashed.unpersist()
+    df.unpersist()
+    return content_type, record_count, success_count, deleted_count, error_count
+
+
+# Submit the content types from separate driver threads so their Spark jobs
+# are scheduled side by side on the same executors
+with ThreadPoolExecutor(max_workers=len(content_types)) as executor:
+    results = list(executor.map(process, content_types))
+
+for content_type, record_count, success_count, deleted_count, error_count in results:
+    print(f"{CONTENT_TYPES[content_type]['label']}: {record_count} records, "
+          f"{success_count} written to DynamoDB, {deleted_count} deleted, {error_count} failed")
+
+print("Job completed successfully")
+
+job.commit()
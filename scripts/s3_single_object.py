@@ -0,0 +1,144 @@
+"""
+Produce a single S3 object from a partitioned Spark output without collecting
+it on the driver.
+
+Spark writes headerless CSV part files to a staging prefix in parallel, then
+the driver streams those parts, in order, into one multipart upload. The
+driver only ever holds one upload part in memory and nothing touches local
+disk, so memory stays flat no matter how large the catalog gets.
+
+Shipped to the Glue jobs through --extra-py-files.
+"""
+import csv
+import io
+import uuid
+
+# S3 requires every part except the last to be at least 5 MiB
+MIN_PART_SIZE = 5 * 1024 * 1024
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+def csv_header(columns):
+    """Header line quoted the same way as the Spark CSV writer quotes data"""
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator='\n').writerow(columns)
+    return buffer.getvalue().encode('utf-8')
+
+
+def list_part_keys(s3_client, bucket, prefix, suffix=''):
+    """Spark part files under prefix, sorted so concatenation order is stable"""
+    keys = []
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        for obj in page.get('Contents', []):
+            name = obj['Key'].rsplit('/', 1)[-1]
+            if name.startswith('part-') and name.endswith(suffix):
+                keys.append(obj['Key'])
+    return sorted(keys)
+
+
+def concatenate_objects(s3_client, bucket, source_keys, dest_bucket, dest_key,
+                        header=b'', part_size=DEFAULT_PART_SIZE):
+    """
+    Stream source_keys (in order, prefixed by header) into dest_key.
+
+    Small outputs end up as a single put_object; anything larger than one part
+    goes through a multipart upload that is aborted if any step fails.
+    Returns the number of bytes written.
+    """
+    if part_size < MIN_PART_SIZE:
+        raise ValueError(f"part_size must be at least {MIN_PART_SIZE} bytes")
+
+    buffer = bytearray(header)
+    total_bytes = 0
+    upload_id = None
+    parts = []
+
+    def flush(data):
+        nonlocal upload_id
+        if upload_id is None:
+            upload_id = s3_client.create_multipart_upload(Bucket=dest_bucket, Key=dest_key)['UploadId']
+        part_number = len(parts) + 1
+        response = s3_client.upload_part(
+            Bucket=dest_bucket,
+            Key=dest_key,
+            UploadId=upload_id,
+            PartNumber=part_number,
+            Body=bytes(data)
+        )
+        parts.append({'PartNumber': part_number, 'ETag': response['ETag']})
+
+    try:
+        for key in source_keys:
+            body = s3_client.get_object(Bucket=bucket, Key=key)['Body']
+            for chunk in body.iter_chunks(READ_CHUNK_SIZE):
+                buffer.extend(chunk)
+                while len(buffer) >= part_size:
+                    flush(buffer[:part_size])
+                    total_bytes += part_size
+                    del buffer[:part_size]
+
+        if upload_id is None:
+            # Everything fit in one part: a plain PUT is cheaper
+            s3_client.put_object(Bucket=dest_bucket, Key=dest_key, Body=bytes(buffer))
+            return len(buffer)
+
+        if buffer:
+            flush(buffer)
+            total_bytes += len(buffer)
+        s3_client.complete_multipart_upload(
+            Bucket=dest_bucket,
+            Key=dest_key,
+            UploadId=upload_id,
+            MultipartUpload={'Parts': parts}
+        )
+        return total_bytes
+    except Exception:
+        if upload_id is not None:
+            s3_client.abort_multipart_upload(Bucket=dest_bucket, Key=dest_key, UploadId=upload_id)
+        raise
+
+
+def delete_prefix(s3_client, bucket, prefix):
+    """Remove every object under prefix (the Spark staging output)"""
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        objects = [{'Key': obj['Key']} for obj in page.get('Contents', [])]
+        if objects:
+            s3_client.delete_objects(Bucket=bucket, Delete={'Objects': objects, 'Quiet': True})
+
+
+def write_single_csv(df, s3_client, bucket, key, staging_prefix='temp/single_csv/',
+                     part_size=DEFAULT_PART_SIZE):
+    """
+    Write a Spark DataFrame as exactly one CSV object at s3://bucket/key.
+
+    Executors write headerless parts to a unique staging prefix, the driver
+    concatenates them behind a single header line and the staging prefix is
+    cleaned up afterwards. Returns the number of bytes in the final object.
+    """
+    staging = f"{staging_prefix.rstrip('/')}/{uuid.uuid4()}/"
+
+    # RFC 4180 style quoting, matching what pandas.to_csv used to produce
+    (df.write
+        .mode('overwrite')
+        .option('header', 'false')
+        .option('quote', '"')
+        .option('escape', '"')
+        .option('emptyValue', '')
+        .csv(f"s3://{bucket}/{staging}"))
+
+    try:
+        part_keys = list_part_keys(s3_client, bucket, staging, suffix='.csv')
+        return concatenate_objects(
+            s3_client,
+            bucket,
+            part_keys,
+            bucket,
+            key,
+            header=csv_header(df.columns),
+            part_size=part_size
+        )
+    finally:
+        delete_prefix(s3_client, bucket, staging)
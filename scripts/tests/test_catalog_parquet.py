@@ -0,0 +1,55 @@
+import os
+import sys
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+# Add the scripts directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog_parquet import read_catalog
+
+
+@pytest.fixture
+def movies_dir(tmp_path):
+    # Same hive layout the Glue job writes with partitionBy("Type", "Year")
+    table = pa.table({
+        "imdbID": ["tt1", "tt2", "tt3", "tt4"],
+        "Title": ["One", "Two", "Three", "Four"],
+        "Genre": ["Drama", "Drama", "Comedy", "Drama"],
+        "Language": ["English", "English", "French", "English"],
+        "imdbRating": [7.1, 8.0, None, 5.5],
+        "Type": ["movie", "movie", "series", "movie"],
+        "Year": ["1994", "2010", "2010–2015", "1994"],
+    })
+    path = tmp_path / "movies"
+    pq.write_to_dataset(table, str(path), partition_cols=["Type", "Year"])
+    return str(path)
+
+
+def test_reads_only_requested_columns(movies_dir):
+    table = read_catalog(movies_dir, columns=["imdbID", "Genre"])
+
+    assert table.column_names == ["imdbID", "Genre"]
+    assert sorted(table.column("imdbID").to_pylist()) == ["tt1", "tt2", "tt3", "tt4"]
+
+
+def test_categorical_and_partition_columns_are_dictionary_encoded(movies_dir):
+    schema = read_catalog(movies_dir).schema
+
+    for name in ["Genre", "Language", "Type", "Year"]:
+        assert pa.types.is_dictionary(schema.field(name).type), name
+    assert schema.field("imdbID").type == pa.string()
+
+
+def test_year_filter_prunes_partitions(movies_dir):
+    table = read_catalog(movies_dir, columns=["imdbID", "Year"], filters=[("Year", "=", "1994")])
+
+    assert sorted(table.column("imdbID").to_pylist()) == ["tt1", "tt4"]
+
+
+def test_series_year_ranges_stay_strings(movies_dir):
+    df = read_catalog(movies_dir, columns=["imdbID", "Year"], filters=[("Type", "=", "series")]).to_pandas()
+
+    assert df["Year"].tolist() == ["2010–2015"]
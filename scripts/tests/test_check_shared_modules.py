@@ -0,0 +1,22 @@
+import os
+import sys
+
+# Add the scripts directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from check_shared_modules import drifted_copies
+
+
+def test_shared_module_copies_are_identical():
+    assert [(name, path) for name, path, _ in drifted_copies()] == []
+
+
+def test_drift_is_reported_with_a_diff(tmp_path):
+    for service, text in [("a", "X = 1\n"), ("b", "X = 1\n"), ("c", "X = 2\n")]:
+        (tmp_path / service).mkdir()
+        (tmp_path / service / "shared.py").write_text(text)
+
+    problems = drifted_copies(str(tmp_path), {"shared.py": ["a/shared.py", "b/shared.py", "c/shared.py"]})
+
+    assert [(name, path) for name, path, _ in problems] == [("shared.py", "c/shared.py")]
+    assert "-X = 1\n+X = 2" in problems[0][2]
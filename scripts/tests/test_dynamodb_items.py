@@ -0,0 +1,65 @@
+import os
+import sys
+
+import boto3
+import numpy as np
+import pandas as pd
+import pytest
+from moto import mock_dynamodb
+
+# Add the scripts directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dynamodb_items import batch_delete_keys, batch_write_items, to_dynamodb_items
+
+TABLE = "movies"
+
+
+@pytest.fixture
+def dynamodb():
+    with mock_dynamodb():
+        client = boto3.client("dynamodb", region_name="us-east-1")
+        client.create_table(
+            TableName=TABLE,
+            KeySchema=[{"AttributeName": "imdbID", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "imdbID", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        yield client
+
+
+def catalog(ids):
+    return pd.DataFrame({
+        "imdbID": ids,
+        "Title": [f"Movie {i}" for i in ids],
+        "imdbRating": np.array([7.5] * len(ids), dtype=np.float32),
+    })
+
+
+def test_to_dynamodb_items_serializes_missing_as_empty_string():
+    df = pd.DataFrame({"imdbID": ["tt1", "tt2"], "Title": ["A", None], "imdbRating": [7.5, np.nan]})
+
+    items = to_dynamodb_items(df)
+
+    assert items[0] == {"imdbID": {"S": "tt1"}, "Title": {"S": "A"}, "imdbRating": {"N": "7.5"}}
+    assert items[1] == {"imdbID": {"S": "tt2"}, "Title": {"S": ""}, "imdbRating": {"S": ""}}
+
+
+def test_batch_write_items_across_batches(dynamodb):
+    ids = [f"tt{i:07d}" for i in range(60)]
+
+    written, failed = batch_write_items(dynamodb, TABLE, to_dynamodb_items(catalog(ids)))
+
+    assert (written, failed) == (60, 0)
+    assert dynamodb.scan(TableName=TABLE)["Count"] == 60
+
+
+def test_batch_delete_keys_removes_tombstoned_rows(dynamodb):
+    ids = [f"tt{i:07d}" for i in range(30)]
+    batch_write_items(dynamodb, TABLE, to_dynamodb_items(catalog(ids)))
+
+    deleted, failed = batch_delete_keys(dynamodb, TABLE, "imdbID", ids[:27])
+
+    assert (deleted, failed) == (27, 0)
+    remaining = sorted(item["imdbID"]["S"] for item in dynamodb.scan(TableName=TABLE)["Items"])
+    assert remaining == ids[27:]
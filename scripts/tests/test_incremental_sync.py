@@ -0,0 +1,93 @@
+import os
+import sys
+
+import pytest
+
+pyspark = pytest.importorskip("pyspark")
+from pyspark.sql import SparkSession
+
+# Add the scripts directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from incremental_sync import split_changes, sync_changes, with_content_hash
+
+
+@pytest.fixture(scope="module")
+def spark():
+    session = (SparkSession.builder.master("local[2]")
+               .config("spark.sql.shuffle.partitions", "2")
+               .config("spark.ui.enabled", "false")
+               .getOrCreate())
+    yield session
+    session.stop()
+
+
+def catalog(spark, rows):
+    return spark.createDataFrame(rows, ["imdbID", "Title"])
+
+
+def previous_state(hashed):
+    return hashed.select("imdbID", hashed["content_hash"].alias("previous_hash"))
+
+
+def test_duplicate_ids_keep_the_same_row_every_run(spark):
+    rows = [("tt1", "Dune"), ("tt1", "Dune (2021)"), ("tt2", "Arrival")]
+
+    runs = [{row.imdbID: (row.Title, row.content_hash)
+             for row in with_content_hash(catalog(spark, ordered).repartition(2)).collect()}
+            for ordered in (rows, list(reversed(rows)), rows[1:] + rows[:1])]
+
+    assert runs[0] == runs[1] == runs[2]
+    assert len(runs[0]) == 2
+
+
+def test_split_changes_finds_new_modified_and_removed_rows(spark):
+    before = with_content_hash(catalog(spark, [("tt1", "Dune"), ("tt2", "Arrival"), ("tt3", "Heat")]))
+    after = with_content_hash(catalog(spark, [("tt1", "Dune"), ("tt2", "Arrival (2016)"), ("tt4", "Alien")]))
+
+    changed, deleted = split_changes(after, previous_state(before))
+
+    assert sorted((row.imdbID, row.Title) for row in changed.collect()) == [("tt2", "Arrival (2016)"),
+                                                                            ("tt4", "Alien")]
+    assert "previous_hash" not in changed.columns
+    assert [row.imdbID for row in deleted.collect()] == ["tt3"]
+
+
+def test_first_run_writes_everything_and_deletes_nothing(spark):
+    hashed = with_content_hash(catalog(spark, [("tt1", "Dune"), ("tt2", "Arrival")]))
+
+    changed, deleted = split_changes(hashed, None)
+
+    assert changed.count() == 2
+    assert deleted is None
+
+
+def test_state_saved_only_when_every_write_and_delete_landed(spark):
+    before = with_content_hash(catalog(spark, [("tt1", "Dune"), ("tt3", "Heat")]))
+    after = with_content_hash(catalog(spark, [("tt1", "Dune (2021)"), ("tt2", "Arrival")]))
+    changed, deleted = split_changes(after, previous_state(before))
+    written, removed, saved = [], [], []
+
+    def write(rows):
+        ids = [row.imdbID for row in rows.collect()]
+        written.extend(ids)
+        return len(ids), 0
+
+    def delete(ids):
+        ids = [row.imdbID for row in ids.collect()]
+        removed.extend(ids)
+        return len(ids), 0
+
+    assert sync_changes(changed, deleted, write, delete, lambda: saved.append(True)) == (2, 1, 0)
+    assert (sorted(written), removed, saved) == (["tt1", "tt2"], ["tt3"], [True])
+
+    # A failed tombstone keeps the old state, so the next run deletes it again
+    saved.clear()
+    assert sync_changes(changed, deleted, lambda rows: (2, 0), lambda ids: (0, 1),
+                        lambda: saved.append(True)) == (2, 0, 1)
+    assert saved == []
+
+    # Nothing changed: no writes, state still saved
+    unchanged, none_deleted = split_changes(after, previous_state(after))
+    assert sync_changes(unchanged, none_deleted, write, delete, lambda: saved.append(True)) == (0, 0, 0)
+    assert saved == [True]
@@ -0,0 +1,107 @@
+import os
+import sys
+
+import boto3
+import pytest
+from moto import mock_s3
+
+# Add the scripts directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from s3_single_object import (
+    MIN_PART_SIZE,
+    concatenate_objects,
+    csv_header,
+    delete_prefix,
+    list_part_keys,
+)
+
+BUCKET = "test-dataset-bucket"
+STAGING = "temp/single_csv/run-1/"
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    # Newer botocore sends aws-chunked upload bodies by default, which the
+    # moto S3 stand-in stores verbatim; only checksum when S3 requires it.
+    monkeypatch.setenv("AWS_REQUEST_CHECKSUM_CALCULATION", "when_required")
+    with mock_s3():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+def put_parts(s3, bodies):
+    for i, body in enumerate(bodies):
+        s3.put_object(Bucket=BUCKET, Key=f"{STAGING}part-{i:05d}-abc-c000.csv", Body=body)
+    s3.put_object(Bucket=BUCKET, Key=f"{STAGING}_SUCCESS", Body=b"")
+
+
+def read(s3, key):
+    return s3.get_object(Bucket=BUCKET, Key=key)["Body"].read()
+
+
+def test_csv_header_quotes_like_spark():
+    assert csv_header(["ITEM_ID", "Title", "Genre"]) == b"ITEM_ID,Title,Genre\n"
+    assert csv_header(["a,b", 'say "hi"']) == b'"a,b","say ""hi"""\n'
+
+
+def test_list_part_keys_sorted_and_filtered(s3):
+    put_parts(s3, [b"1\n", b"2\n", b"3\n"])
+
+    keys = list_part_keys(s3, BUCKET, STAGING, suffix=".csv")
+
+    assert keys == [f"{STAGING}part-{i:05d}-abc-c000.csv" for i in range(3)]
+
+
+def test_small_output_uses_single_put(s3):
+    put_parts(s3, [b"tt1,Movie One\n", b"", b"tt2,Movie Two\n"])
+    keys = list_part_keys(s3, BUCKET, STAGING, suffix=".csv")
+
+    written = concatenate_objects(s3, BUCKET, keys, BUCKET, "dataset/processed/out.csv",
+                                  header=b"ITEM_ID,Title\n")
+
+    body = read(s3, "dataset/processed/out.csv")
+    assert body == b"ITEM_ID,Title\ntt1,Movie One\ntt2,Movie Two\n"
+    assert written == len(body)
+
+
+def test_large_output_uses_multipart_upload(s3):
+    # Three parts of ~4 MiB each: forces two full 5 MiB upload parts plus a tail
+    bodies = [(f"{i}," + "x" * 1000 + "\n").encode() * 4000 for i in range(3)]
+    put_parts(s3, bodies)
+    keys = list_part_keys(s3, BUCKET, STAGING, suffix=".csv")
+
+    written = concatenate_objects(s3, BUCKET, keys, BUCKET, "dataset/knowledge_base/movies.csv",
+                                  header=b"id,payload\n", part_size=MIN_PART_SIZE)
+
+    expected = b"id,payload\n" + b"".join(bodies)
+    assert read(s3, "dataset/knowledge_base/movies.csv") == expected
+    assert written == len(expected)
+    assert s3.list_multipart_uploads(Bucket=BUCKET).get("Uploads", []) == []
+
+
+def test_failed_upload_is_aborted(s3):
+    bodies = [b"y" * (3 * 1024 * 1024)] * 3
+    put_parts(s3, bodies)
+    keys = list_part_keys(s3, BUCKET, STAGING, suffix=".csv")
+    keys.append(f"{STAGING}part-99999-missing.csv")
+
+    with pytest.raises(Exception):
+        concatenate_objects(s3, BUCKET, keys, BUCKET, "out.csv", part_size=MIN_PART_SIZE)
+
+    assert s3.list_multipart_uploads(Bucket=BUCKET).get("Uploads", []) == []
+    assert "Contents" not in s3.list_objects_v2(Bucket=BUCKET, Prefix="out.csv")
+
+
+def test_part_size_below_s3_minimum_rejected(s3):
+    with pytest.raises(ValueError):
+        concatenate_objects(s3, BUCKET, [], BUCKET, "out.csv", part_size=1024)
+
+
+def test_delete_prefix_removes_staging(s3):
+    put_parts(s3, [b"1\n", b"2\n"])
+
+    delete_prefix(s3, BUCKET, STAGING)
+
+    assert "Contents" not in s3.list_objects_v2(Bucket=BUCKET, Prefix=STAGING)
@@ -1,31 +1,123 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, has_request_context
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 import boto3
 import logging
+import os
 from datetime import datetime
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from functools import wraps
+import ipaddress
 import json
 import traceback
-from config import USER_POOL_ID, CLIENT_ID, REGION, DEBUG, PORT
+from logging_setup import setup_logging
+setup_logging("authentication")
+import config
+from cache import TTLCache
+from cognito_usage import CountingClient, HealthMonitor
+from rate_limit import RateLimiter, Rule, backend_from_env, retry_after_header
+
+# Probes read a cached Cognito health result refreshed every
+# HEALTH_CHECK_INTERVAL_SECONDS, instead of calling describe_user_pool each
+# time. User statuses seen by signup are kept USER_STATUS_TTL_SECONDS.
+HEALTH_CHECK_INTERVAL_SECONDS = float(os.getenv("HEALTH_CHECK_INTERVAL_SECONDS", "30"))
+USER_STATUS_TTL_SECONDS = float(os.getenv("USER_STATUS_TTL_SECONDS", "60"))
+USER_STATUS_MAX_ENTRIES = int(os.getenv("USER_STATUS_MAX_ENTRIES", "10000"))
+
+# One cognito-idp client per worker process, shared by its threads. The pool
+# holds a kept-alive connection per thread (botocore's default is 10, so a
+# login storm queued for a free connection); COGNITO_ENDPOINT_URL points the
+# client at a local stub (see loadtest.py).
+COGNITO_MAX_POOL_CONNECTIONS = int(os.getenv("COGNITO_MAX_POOL_CONNECTIONS", os.getenv("GUNICORN_THREADS", "32")))
+cognito_config = Config(
+    max_pool_connections=COGNITO_MAX_POOL_CONNECTIONS,
+    tcp_keepalive=True,
+    connect_timeout=float(os.getenv("COGNITO_CONNECT_TIMEOUT_SECONDS", "2")),
+    read_timeout=float(os.getenv("COGNITO_READ_TIMEOUT_SECONDS", "10")),
+    retries={'max_attempts': 3, 'mode': 'standard'}
+)
+
+# Token buckets in front of the endpoints that call Cognito for anonymous
+# clients: per client IP and per email, refilled RATE_LIMIT_*_PER_MINUTE
+# tokens a minute up to RATE_LIMIT_*_BURST (0 per minute disables a rule).
+# RATE_LIMIT_REDIS_URL shares the buckets between replicas.
+RATE_LIMIT_IP_PER_MINUTE = float(os.getenv("RATE_LIMIT_IP_PER_MINUTE", "60"))
+RATE_LIMIT_IP_BURST = int(os.getenv("RATE_LIMIT_IP_BURST", "20"))
+RATE_LIMIT_EMAIL_PER_MINUTE = float(os.getenv("RATE_LIMIT_EMAIL_PER_MINUTE", "6"))
+RATE_LIMIT_EMAIL_BURST = int(os.getenv("RATE_LIMIT_EMAIL_BURST", "5"))
+# Proxies in front of this service that append the caller's address to
+# X-Forwarded-For. The frontend is one: it forwards the browser's address, so
+# production runs with 1. The client is the entry the outermost trusted proxy
+# appended (the rightmost ones), so entries a client forges further left are
+# ignored; 0 uses the connection's address.
+RATE_LIMIT_TRUSTED_PROXIES = int(os.getenv(
+    "RATE_LIMIT_TRUSTED_PROXIES",
+    "1" if os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() == "true" else "0"
+))
+# In-cluster callers (CIDRs) that skip the per-IP rule when they forward no
+# address, so they do not share one bucket; the per-email rule still applies
+RATE_LIMIT_IP_EXEMPT_NETWORKS = [ipaddress.ip_network(network.strip()) for network in
+                                 os.getenv("RATE_LIMIT_IP_EXEMPT_NETWORKS", "").split(",") if network.strip()]
+# Flask endpoint -> bucket group; the legacy routes share the new ones' limits
+RATE_LIMITED_ENDPOINTS = {
+    'login': 'login', 'login_root': 'login',
+    'signup': 'signup', 'register': 'signup',
+    'resend_confirmation': 'resend',
+}
 
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*"}})
+if RATE_LIMIT_TRUSTED_PROXIES > 0:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=RATE_LIMIT_TRUSTED_PROXIES)
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
-cognito = boto3.client('cognito-idp', region_name=REGION)
+# Every Cognito call is counted by Flask endpoint (see /metrics)
+cognito_counter = CountingClient(
+    boto3.client('cognito-idp', region_name=config.AWS_REGION, config=cognito_config,
+                 endpoint_url=os.getenv('COGNITO_ENDPOINT_URL') or None),
+    lambda: request.endpoint if has_request_context() else 'background'
+)
+cognito = cognito_counter
+user_statuses = TTLCache(USER_STATUS_MAX_ENTRIES, USER_STATUS_TTL_SECONDS)
+health_monitor = HealthMonitor(
+    lambda: cognito.describe_user_pool(UserPoolId=config.USER_POOL_ID),
+    HEALTH_CHECK_INTERVAL_SECONDS
+)
+
+def client_ip():
+    """Client address (after ProxyFix), or None for an exempt caller that forwarded none"""
+    address = request.remote_addr or 'unknown'
+    if RATE_LIMIT_IP_EXEMPT_NETWORKS and not request.headers.get('X-Forwarded-For'):
+        try:
+            if any(ipaddress.ip_address(address) in network for network in RATE_LIMIT_IP_EXEMPT_NETWORKS):
+                return None
+        except ValueError:
+            pass
+    return address
+
+def request_email():
+    data = request.get_json(silent=True)
+    email = data.get('email') or data.get('username') if isinstance(data, dict) else None
+    return email.strip().lower() if isinstance(email, str) and email.strip() else None
+
+def build_rate_limiter(backend=None):
+    rules = []
+    if RATE_LIMIT_IP_PER_MINUTE > 0:
+        rules.append(Rule('ip', RATE_LIMIT_IP_PER_MINUTE / 60, RATE_LIMIT_IP_BURST, client_ip))
+    if RATE_LIMIT_EMAIL_PER_MINUTE > 0:
+        rules.append(Rule('email', RATE_LIMIT_EMAIL_PER_MINUTE / 60, RATE_LIMIT_EMAIL_BURST, request_email))
+    return RateLimiter(rules, backend if backend is not None else backend_from_env())
+
+rate_limiter = build_rate_limiter()
 
 def handle_cognito_error(e: ClientError) -> tuple:
     """Handle specific Cognito errors and return appropriate responses"""
     error_code = e.response['Error']['Code']
     error_message = e.response['Error']['Message']
     
-    logger.error(f"Cognito Error: {error_code} - {error_message}")
+    logger.error("Cognito Error: %s - %s", error_code, error_message)
     
     error_mapping = {
         'UsernameExistsException': ('Email is already registered. If unverified, check your inbox for verification code.', 409),
@@ -60,7 +152,7 @@ def validate_request(required_fields=[]):
                 # Check required fields
                 missing_fields = [field for field in required_fields if not data.get(field)]
                 if missing_fields:
-                    logger.error(f"Missing fields: {missing_fields}")
+                    logger.error("Missing fields: %s", missing_fields)
                     return jsonify({
                         'error': 'Missing required fields',
                         'missing_fields': missing_fields
@@ -70,7 +162,7 @@ def validate_request(required_fields=[]):
                 if 'email' in required_fields:
                     email = data.get('email', '').strip().lower()
                     if '@' not in email or '.' not in email:
-                        logger.error(f"Invalid email: {email}")
+                        logger.error("Invalid email: %s", email)
                         return jsonify({'error': 'Invalid email format'}), 400
                     data['email'] = email  # Normalize email
 
@@ -83,7 +175,7 @@ def validate_request(required_fields=[]):
 
                 return f(*args, **kwargs)
             except Exception as e:
-                logger.error(f"Request validation error: {str(e)}")
+                logger.error("Request validation error: %s", e)
                 return jsonify({'error': 'Invalid request format'}), 400
         return wrapper
     return decorator
@@ -129,17 +221,18 @@ def signup():
         email = data['email']
         password = data['password']
 
-        logger.info(f"SIGNUP REQUEST: {email}")
+        logger.info("SIGNUP REQUEST: %s", email)
         
         # Create new user
         response = cognito.sign_up(
-            ClientId=CLIENT_ID,
+            ClientId=config.CLIENT_ID,
             Username=email,
             Password=password,
             UserAttributes=[{'Name': 'email', 'Value': email}]
         )
 
-        logger.info(f"Signup successful: {email}")
+        logger.info("Signup successful: %s", email)
+        user_statuses.set(email, 'UNCONFIRMED')
         return jsonify({
             'success': True,
             'message': 'Registration successful! Please check your email for verification code.',
@@ -149,21 +242,23 @@ def signup():
 
     except ClientError as e:
         error_code = e.response['Error']['Code']
-        logger.error(f"SIGNUP COGNITO ERROR: {error_code} for {email}")
+        logger.error("SIGNUP COGNITO ERROR: %s for %s", error_code, email)
         
         if error_code == 'UsernameExistsException':
-            logger.info(f"USER EXISTS: Checking status for {email}")
+            logger.info("USER EXISTS: Checking status for %s", email)
             try:
-                user_info = cognito.admin_get_user(
-                    UserPoolId=USER_POOL_ID,
-                    Username=email
-                )
-                
-                user_status = user_info['UserStatus']
-                logger.info(f"USER STATUS CHECK: {user_status} for {email}")
+                user_status = user_statuses.get(email)
+                if user_status is None:
+                    user_info = cognito.admin_get_user(
+                        UserPoolId=config.USER_POOL_ID,
+                        Username=email
+                    )
+                    user_status = user_info['UserStatus']
+                    user_statuses.set(email, user_status)
+                logger.info("USER STATUS CHECK: %s for %s", user_status, email)
                 
                 if user_status == 'UNCONFIRMED':
-                    logger.info(f"USER UNCONFIRMED: {email} - Directing to login")
+                    logger.info("USER UNCONFIRMED: %s - Directing to login", email)
                     return jsonify({
                         'success': False,
                         'error': 'This email is already registered. Please login instead.',
@@ -171,7 +266,7 @@ def signup():
                         'email': email
                     }), 409
                 else:
-                    logger.info(f"RESPONSE: USER_EXISTS_VERIFIED for {email}")
+                    logger.info("RESPONSE: USER_EXISTS_VERIFIED for %s", email)
                     return jsonify({
                         'success': False,
                         'error': 'This email is already registered and verified. Please login instead.',
@@ -180,8 +275,8 @@ def signup():
                     }), 409
                     
             except ClientError as get_user_error:
-                logger.error(f"ADMIN_GET_USER FAILED: {get_user_error.response}")
-                logger.info(f"FALLBACK RESPONSE: USER_UNCONFIRMED for {email}")
+                logger.error("ADMIN_GET_USER FAILED: %s", get_user_error.response)
+                logger.info("FALLBACK RESPONSE: USER_UNCONFIRMED for %s", email)
                 return jsonify({
                     'success': False,
                     'error': 'Email already registered. Please check your inbox for verification code or try to login.',
@@ -191,11 +286,11 @@ def signup():
                 }), 200
         
         # Other Cognito errors
-        logger.info(f"OTHER COGNITO ERROR: Delegating to handle_cognito_error")
+        logger.info("OTHER COGNITO ERROR: Delegating to handle_cognito_error")
         return handle_cognito_error(e)
         
     except Exception as e:
-        logger.error(f"SIGNUP EXCEPTION: {str(e)} for {email}")
+        logger.error("SIGNUP EXCEPTION: %s for %s", e, email)
         return jsonify({
             'success': False,
             'error': 'An unexpected error occurred'
@@ -230,25 +325,26 @@ def confirm_signup():
         email = data['email']
         code = data['code'].strip()
 
-        logger.info(f"CONFIRM REQUEST: {email} with code: {code}")
+        logger.info("CONFIRM REQUEST: %s", email)
         
         response = cognito.confirm_sign_up(
-            ClientId=CLIENT_ID,
+            ClientId=config.CLIENT_ID,
             Username=email,
             ConfirmationCode=code
         )
 
-        logger.info(f"CONFIRM SUCCESS: Email verified for {email}")
+        logger.info("CONFIRM SUCCESS: Email verified for %s", email)
+        user_statuses.pop(email)
         return jsonify({
             'success': True,
             'message': 'Email verified successfully! You can now login.'
         }), 200
 
     except ClientError as e:
-        logger.error(f"CONFIRM COGNITO ERROR: {e.response['Error']['Code']} for {email}")
+        logger.error("CONFIRM COGNITO ERROR: %s for %s", e.response['Error']['Code'], email)
         return handle_cognito_error(e)
     except Exception as e:
-        logger.error(f"CONFIRM EXCEPTION: {str(e)} for {email}")
+        logger.error("CONFIRM EXCEPTION: %s for %s", e, email)
         return jsonify({
             'success': False,
             'error': 'An unexpected error occurred'
@@ -261,14 +357,14 @@ def resend_confirmation():
         data = request.get_json()
         email = data['email']
 
-        logger.info(f"Resend confirmation attempt: {email}")
+        logger.info("Resend confirmation attempt: %s", email)
         
         response = cognito.resend_confirmation_code(
-            ClientId=CLIENT_ID,
+            ClientId=config.CLIENT_ID,
             Username=email
         )
 
-        logger.info(f"Resend confirmation successful: {email}")
+        logger.info("Resend confirmation successful: %s", email)
         return jsonify({
             'success': True,
             'message': 'Verification code sent again. Please check your email.'
@@ -277,7 +373,7 @@ def resend_confirmation():
     except ClientError as e:
         return handle_cognito_error(e)
     except Exception as e:
-        logger.error(f"Resend confirmation error: {str(e)}")
+        logger.error("Resend confirmation error: %s", e)
         return jsonify({'error': 'An unexpected error occurred'}), 500
 
 @app.route('/auth/login', methods=['POST'])
@@ -321,10 +417,10 @@ def login():
         email = data['email']
         password = data['password']
 
-        logger.info(f"LOGIN REQUEST: {email}")
+        logger.info("LOGIN REQUEST: %s", email)
 
         response = cognito.initiate_auth(
-            ClientId=CLIENT_ID,
+            ClientId=config.CLIENT_ID,
             AuthFlow='USER_PASSWORD_AUTH',
             AuthParameters={
                 'USERNAME': email,
@@ -332,7 +428,7 @@ def login():
             }
         )
 
-        logger.info(f"LOGIN SUCCESS: {email}")
+        logger.info("LOGIN SUCCESS: %s", email)
         return jsonify({
             'success': True,
             'message': 'Login successful!',
@@ -345,10 +441,10 @@ def login():
         }), 200
 
     except ClientError as e:
-        logger.error(f"LOGIN COGNITO ERROR: {e.response['Error']['Code']} for {email}")
+        logger.error("LOGIN COGNITO ERROR: %s for %s", e.response['Error']['Code'], email)
         return handle_cognito_error(e)
     except Exception as e:
-        logger.error(f"LOGIN EXCEPTION: {str(e)} for {email}")
+        logger.error("LOGIN EXCEPTION: %s for %s", e, email)
         return jsonify({
             'success': False,
             'error': 'An unexpected error occurred'
@@ -376,7 +472,7 @@ def logout():
     except ClientError as e:
         return handle_cognito_error(e)
     except Exception as e:
-        logger.error(f"Logout error: {str(e)}")
+        logger.error("Logout error: %s", e)
         return jsonify({'error': 'An unexpected error occurred during logout'}), 500
 
 @app.route('/auth/verify', methods=['POST'])
@@ -387,15 +483,16 @@ def verify():
         email = data['email']
         verification_code = data['code'].strip()
 
-        logger.info(f"Verify attempt: {email}")
+        logger.info("Verify attempt: %s", email)
         
         response = cognito.confirm_sign_up(
-            ClientId=CLIENT_ID,
+            ClientId=config.CLIENT_ID,
             Username=email,
             ConfirmationCode=verification_code
         )
 
-        logger.info(f"Verification successful: {email}")
+        logger.info("Verification successful: %s", email)
+        user_statuses.pop(email)
         return jsonify({
             'success': True,
             'message': 'Email verified successfully. You can now login.',
@@ -405,7 +502,7 @@ def verify():
     except ClientError as e:
         return handle_cognito_error(e)
     except Exception as e:
-        logger.error(f"Verification error: {str(e)}")
+        logger.error("Verification error: %s", e)
         return jsonify({'error': 'An unexpected error occurred during verification'}), 500
 
 # Legacy endpoints for backward compatibility
@@ -417,16 +514,16 @@ def register():
         email = data['email']
         password = data['password']
 
-        logger.info(f"Legacy register attempt: {email}")
+        logger.info("Legacy register attempt: %s", email)
         
         response = cognito.sign_up(
-            ClientId=CLIENT_ID,
+            ClientId=config.CLIENT_ID,
             Username=email,
             Password=password,
             UserAttributes=[{'Name': 'email', 'Value': email}]
         )
 
-        logger.info(f"Legacy register successful: {email}")
+        logger.info("Legacy register successful: %s", email)
         return jsonify({
             'message': 'Registration successful! Please check your email for verification code.',
             'userSub': response['UserSub']
@@ -435,7 +532,7 @@ def register():
     except ClientError as e:
         return handle_cognito_error(e)
     except Exception as e:
-        logger.error(f"Legacy register error: {str(e)}")
+        logger.error("Legacy register error: %s", e)
         return jsonify({'error': 'An unexpected error occurred'}), 500
 
 @app.route('/login', methods=['POST'])
@@ -446,10 +543,10 @@ def login_root():
         username = data['username']  
         password = data['password']
 
-        logger.info(f"Legacy login attempt: {username}")
+        logger.info("Legacy login attempt: %s", username)
 
         response = cognito.initiate_auth(
-            ClientId=CLIENT_ID,
+            ClientId=config.CLIENT_ID,
             AuthFlow='USER_PASSWORD_AUTH',
             AuthParameters={
                 'USERNAME': username,
@@ -457,7 +554,7 @@ def login_root():
             }
         )
 
-        logger.info(f"Legacy login successful: {username}")
+        logger.info("Legacy login successful: %s", username)
         return jsonify({
             'message': 'Welcome! Login successful',
             'token': response['AuthenticationResult']['AccessToken'],
@@ -467,29 +564,58 @@ def login_root():
     except ClientError as e:
         return handle_cognito_error(e)
     except Exception as e:
-        logger.error(f"Legacy login error: {str(e)}")
+        logger.error("Legacy login error: %s", e)
         return jsonify({'error': 'An unexpected error occurred'}), 500
 
 @app.route('/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
-    try:
-        # Test Cognito connection
-        cognito.describe_user_pool(UserPoolId=USER_POOL_ID)
-        logger.info("Health check: OK")
-        
+    """Health check endpoint; reports the last background Cognito check"""
+    healthy, error, checked_at = health_monitor.status()
+    if healthy:
+        logger.debug("Health check: OK")
         return jsonify({
             'status': 'healthy',
             'timestamp': datetime.now().isoformat(),
+            'checked_at': datetime.fromtimestamp(checked_at).isoformat(),
             'service': 'authentication'
         }), 200
-        
-    except Exception as e:
-        logger.error(f"Health check failed: {str(e)}")
-        return jsonify({
-            'status': 'unhealthy',
-            'error': str(e)
-        }), 500
+
+    logger.error("Health check failed: %s", error)
+    return jsonify({
+        'status': 'unhealthy',
+        'error': error,
+        'checked_at': datetime.fromtimestamp(checked_at).isoformat()
+    }), 500
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus text: Cognito calls by endpoint and operation, rate limits, caches, health checks"""
+    calls, errors = cognito_counter.stats()
+    decisions = rate_limiter.stats()
+    statuses = user_statuses.stats()
+    pid = os.getpid()
+    lines = []
+    for name, help_text, counts in [
+        ("auth_cognito_calls_total", "Cognito API calls", calls),
+        ("auth_cognito_errors_total", "Cognito API calls that failed", errors),
+    ]:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for (endpoint, operation), value in sorted(counts.items()):
+            lines.append(f'{name}{{pid="{pid}",endpoint="{endpoint}",operation="{operation}"}} {value}')
+    name = "auth_rate_limit_decisions_total"
+    lines += [f"# HELP {name} Rate limiter decisions by endpoint group and rule", f"# TYPE {name} counter"]
+    for (group, rule, decision), value in sorted(decisions.items()):
+        lines.append(f'{name}{{pid="{pid}",endpoint="{group}",rule="{rule}",decision="{decision}"}} {value}')
+    for name, kind, help_text, value in [
+        ("auth_user_status_cache_entries", "gauge", "Cached user statuses", statuses["size"]),
+        ("auth_user_status_cache_hits_total", "counter", "admin_get_user calls avoided", statuses["hits"]),
+        ("auth_user_status_cache_misses_total", "counter", "User statuses fetched from Cognito", statuses["misses"]),
+        ("auth_health_checks_total", "counter", "Background Cognito health checks", health_monitor.checks),
+        ("auth_rate_limit_backend_errors_total", "counter", "Shared rate limit backend failures",
+         getattr(rate_limiter.backend, "errors", 0)),
+    ]:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f'{name}{{pid="{pid}"}} {value}']
+    return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
 
 @app.route('/welcome', methods=['GET'])
 def welcome():
@@ -504,7 +630,24 @@ def welcome():
 @app.before_request
 def before_request():
     """Log all incoming requests"""
-    logger.info(f"{request.method} {request.path} from {request.remote_addr}")
+    logger.debug("%s %s from %s", request.method, request.path, request.remote_addr)
+
+@app.before_request
+def enforce_rate_limits():
+    """Reject clients over their token bucket before any Cognito call"""
+    group = RATE_LIMITED_ENDPOINTS.get(request.endpoint)
+    if group is None or request.method != 'POST':
+        return None
+    allowed, retry_after, rule = rate_limiter.check(group)
+    if allowed:
+        return None
+    logger.debug("Rate limited %s by %s from %s", group, rule, client_ip())
+    response = jsonify({
+        'error': 'Too many attempts, please try again later',
+        'error_code': 'RateLimitExceeded'
+    })
+    response.headers['Retry-After'] = retry_after_header(retry_after)
+    return response, 429
 
 @app.errorhandler(404)
 def not_found(error):
@@ -516,18 +659,18 @@ def method_not_allowed(error):
 
 @app.errorhandler(500)
 def internal_error(error):
-    logger.error(f"Internal server error: {str(error)}")
+    logger.error("Internal server error: %s", error)
     return jsonify({'error': 'Internal server error'}), 500
 
 if __name__ == '__main__':
     logger.info("="*50)
     logger.info("Starting Flask Authentication Service")
-    logger.info(f"Debug: {DEBUG}")
-    logger.info(f"Port: {PORT}")
-    logger.info(f"Region: {REGION}")
-    logger.info(f"Last Updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} UTC")
+    logger.info("Debug: %s", config.DEBUG)
+    logger.info("Port: %s", config.PORT)
+    logger.info("Region: %s", config.REGION)
+    logger.info("Last Updated: %s UTC", datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
 
     logger.info("Version: 2.0 - Auto-confirm enabled")
     logger.info("="*50)
     
-    app.run(host='0.0.0.0', debug=DEBUG, port=PORT)
\ No newline at end of file
+    app.run(host='0.0.0.0', debug=config.DEBUG, port=config.PORT)
\ No newline at end of file
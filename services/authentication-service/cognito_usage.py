@@ -0,0 +1,84 @@
+import threading
+import time
+from collections import Counter
+
+
+class CountingClient:
+    """
+    Proxy for the cognito-idp client that counts every API call by
+    (label, operation), where label_fn() names the caller (the Flask
+    endpoint), and counts the calls that raised separately.
+    """
+
+    def __init__(self, client, label_fn):
+        self._client = client
+        self._label_fn = label_fn
+        self._lock = threading.Lock()
+        self.calls = Counter()
+        self.errors = Counter()
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            key = (self._label_fn(), name)
+            with self._lock:
+                self.calls[key] += 1
+            try:
+                return attr(*args, **kwargs)
+            except Exception:
+                with self._lock:
+                    self.errors[key] += 1
+                raise
+        return call
+
+    def stats(self):
+        with self._lock:
+            return dict(self.calls), dict(self.errors)
+
+
+class HealthMonitor:
+    """
+    Runs check() every interval seconds in a background thread and serves the
+    last result, so probes never call the dependency themselves. The thread
+    starts on the first status() call (after gunicorn has forked); that first
+    call runs the check inline.
+    """
+
+    def __init__(self, check, interval=30.0, clock=time.time):
+        self.check = check
+        self.interval = interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self.result = None  # (healthy, error, checked_at)
+        self.checks = 0
+
+    def run_check(self):
+        try:
+            self.check()
+            result = (True, None, self._clock())
+        except Exception as e:
+            result = (False, str(e), self._clock())
+        self.result = result
+        self.checks += 1
+        return result
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.run_check()
+
+    def status(self):
+        """(healthy, error, checked_at) of the latest check"""
+        with self._lock:
+            if self._thread is None:
+                self.run_check()
+                self._thread = threading.Thread(target=self._loop, name="health-monitor", daemon=True)
+                self._thread.start()
+        return self.result
+
+    def stop(self):
+        self._stop.set()
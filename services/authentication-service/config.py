@@ -1,59 +1,44 @@
-import boto3
-import json
+import logging
 import os
-from botocore.exceptions import ClientError
 
-def get_secret():
-    """
-    Get secret values from AWS Secrets Manager
-    """
-    secret_name = os.environ.get('SECRET_NAME', 'auth-app-config')
-    region_name = os.environ.get('AWS_REGION', 'us-east-1')
+from config_provider import SecretProvider
 
-    session = boto3.session.Session()
-    client = session.client(
-        service_name='secretsmanager',
-        region_name=region_name
-    )
+logger = logging.getLogger(__name__)
 
-    try:
-        get_secret_value_response = client.get_secret_value(
-            SecretId=secret_name
-        )
-    except ClientError as e:
-        print(f"Error getting secret: {e}")
-        # Fallback to environment variables for local development
-        return {
-            'USER_POOL_ID': os.environ.get('USER_POOL_ID', 'us-east-1_DUMMY'),
-            'CLIENT_ID': os.environ.get('CLIENT_ID', 'dummy-client-id'),
-            'REGION': os.environ.get('AWS_REGION', 'us-east-1'),
-            'DEBUG': os.environ.get('DEBUG', 'True'),
-            'PORT': os.environ.get('PORT', '5000')
-        }
-    else:
-        if 'SecretString' in get_secret_value_response:
-            return json.loads(get_secret_value_response['SecretString'])
-        raise ValueError("Secret string not found in the response")
+SECRET_NAME = os.environ.get('SECRET_NAME', 'auth-app-config')
+# Known without Secrets Manager, so clients can be created at import
+AWS_REGION = os.environ.get('AWS_REGION', 'us-east-1')
 
-# Load configuration from AWS Secrets Manager
-try:
-    config = get_secret()
-    
-    # AWS Cognito Configuration
-    USER_POOL_ID = config['USER_POOL_ID']
-    CLIENT_ID = config['CLIENT_ID']
-    REGION = config['REGION']
+# The secret is fetched on first use and re-read in the background once it
+# is SECRET_TTL_SECONDS old. Without Secrets Manager (local development,
+# tests) the environment, or a SECRETS_FILE, stands in for it.
+provider = SecretProvider(
+    SECRET_NAME,
+    region=AWS_REGION,
+    ttl=float(os.environ.get('SECRET_TTL_SECONDS', '300')),
+    env_keys=('USER_POOL_ID', 'CLIENT_ID', 'DEBUG', 'PORT'),
+    env_defaults={
+        'USER_POOL_ID': 'us-east-1_DUMMY',
+        'CLIENT_ID': 'dummy-client-id',
+        'REGION': AWS_REGION,
+        'DEBUG': 'True',
+        'PORT': '5000'
+    }
+)
 
+# Lazily resolved settings: config.CLIENT_ID etc. read the current secret
+_SETTINGS = {
+    # AWS Cognito Configuration
+    'USER_POOL_ID': lambda values: values['USER_POOL_ID'],
+    'CLIENT_ID': lambda values: values['CLIENT_ID'],
+    'REGION': lambda values: values.get('REGION', AWS_REGION),
     # Flask Configuration
-    DEBUG = config['DEBUG'] == 'True'
-    PORT = int(config['PORT'])
-    
-    print(f"✅ Config loaded successfully")
-    print(f"   USER_POOL_ID: {USER_POOL_ID}")
-    print(f"   REGION: {REGION}")
-    print(f"   DEBUG: {DEBUG}")
-    print(f"   PORT: {PORT}")
-    
-except Exception as e:
-    print(f"❌ Failed to load configuration: {e}")
-    raise
\ No newline at end of file
+    'DEBUG': lambda values: values.get('DEBUG') == 'True',
+    'PORT': lambda values: int(values.get('PORT', '5000')),
+}
+
+
+def __getattr__(name):
+    if name in _SETTINGS:
+        return _SETTINGS[name](provider.get())
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,24 @@
+# gunicorn.conf.py
+# Threaded workers: a login spends almost all of its time waiting on
+# Cognito, so threads (not processes) are what absorb a login storm. Each
+# worker process keeps one pooled cognito-idp client shared by its threads;
+# COGNITO_MAX_POOL_CONNECTIONS in app.py defaults to GUNICORN_THREADS so no
+# thread waits for a connection.
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+# GUNICORN_WORKER_CLASS=gevent also works if gevent is installed in the image
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+threads = int(os.getenv("GUNICORN_THREADS", "32"))
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "500"))
+
+timeout = 30
+graceful_timeout = 30
+# Clients (the frontend, the ingress) reuse their connections to us too
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "15"))
+backlog = 2048
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info")
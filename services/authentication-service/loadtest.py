@@ -0,0 +1,218 @@
+# loadtest.py
+# Login throughput of one authentication pod against a local Cognito stub
+# whose calls take --delay seconds, at 50 and 500 concurrent clients.
+#
+#   python loadtest.py                           # all serving modes
+#   python loadtest.py --modes gthread --clients 50,500 --duration 20
+#
+# Modes:
+#   dev             python app.py (Werkzeug dev server, botocore's default
+#                   pool of 10 connections), as the service ran before
+#   gthread-pool10  gunicorn.conf.py with the default pool of 10
+#   gthread         gunicorn.conf.py with COGNITO_MAX_POOL_CONNECTIONS
+#
+# The stub is a real HTTP server speaking Cognito's JSON protocol, so the
+# app's botocore client, its connection pool and keep-alive are exercised.
+# "stub conns" is the number of TCP connections the app opened to Cognito.
+#
+# The rate limiter runs with its production settings. The app trusts one
+# proxy, as behind the frontend, and every login is a different user: its
+# own email and its own X-Forwarded-For address. "limited" counts 429s,
+# which should stay at 0; any other error counts as "failed".
+import argparse
+import itertools
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def run_stub(port, delay):
+    connections = []
+
+    class CognitoStub(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out in separate writes; without this, delayed
+        # ACKs add ~40 ms to every call on a kept-alive connection
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            super().setup()
+            connections.append(1)
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            operation = self.headers.get("X-Amz-Target", "").rpartition(".")[2]
+            time.sleep(delay)
+            if operation == "InitiateAuth":
+                body = {"AuthenticationResult": {"AccessToken": "stub-access-token", "ExpiresIn": 3600,
+                                                 "TokenType": "Bearer", "IdToken": "stub-id-token",
+                                                 "RefreshToken": "stub-refresh-token"}}
+            elif operation == "DescribeUserPool":
+                body = {"UserPool": {"Id": "us-east-1_LOADTEST", "Name": "load-test"}}
+            else:
+                body = {}
+            payload = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-amz-json-1.1")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            payload = str(len(connections)).encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        request_queue_size = 2048
+        daemon_threads = True
+
+    Server(("127.0.0.1", port), CognitoStub).serve_forever()
+
+
+def request(url, data=None, timeout=30, headers=None):
+    body = json.dumps(data).encode() if data is not None else None
+    req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json", **(headers or {})})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except Exception:
+        status = None
+    return status, time.perf_counter() - start
+
+
+def wait_for(url, what):
+    for _ in range(100):
+        if request(url, timeout=1)[0] == 200:
+            return
+        time.sleep(0.1)
+    raise RuntimeError(f"{what} did not start")
+
+
+def start_app(mode, port, stub_port, secrets_file):
+    env = dict(
+        os.environ,
+        PORT=str(port),
+        SECRETS_FILE=secrets_file,
+        COGNITO_ENDPOINT_URL=f"http://127.0.0.1:{stub_port}",
+        AWS_ACCESS_KEY_ID=os.getenv("AWS_ACCESS_KEY_ID", "loadtest"),
+        AWS_SECRET_ACCESS_KEY=os.getenv("AWS_SECRET_ACCESS_KEY", "loadtest"),
+        LOG_LEVEL="WARNING",
+        # As in production, behind the frontend, which forwards the browser's address
+        RATE_LIMIT_TRUSTED_PROXIES="1",
+    )
+    if mode in ("dev", "gthread-pool10"):
+        env["COGNITO_MAX_POOL_CONNECTIONS"] = "10"
+    if mode == "dev":
+        command = [sys.executable, "app.py"]
+    else:
+        command = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py",
+                   "--bind", f"127.0.0.1:{port}", "app:app"]
+    return subprocess.Popen(command, cwd=HERE, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+users = itertools.count()
+
+
+def run_load(base, clients, duration):
+    results = []
+    deadline = time.perf_counter() + duration
+
+    def client(i):
+        while time.perf_counter() < deadline:
+            # A new user each time, from their own address (10.0.0.0/8)
+            n = next(users)
+            credentials = {"email": f"loadtest{n}@example.com", "password": "Password123!"}
+            address = f"10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}"
+            results.append(request(f"{base}/auth/login", credentials, headers={"X-Forwarded-For": address}))
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return results, time.perf_counter() - started
+
+
+def run_mode(mode, port, stub, clients_levels, duration):
+    secrets = {"USER_POOL_ID": "us-east-1_LOADTEST", "CLIENT_ID": "loadtest-client",
+               "REGION": "us-east-1", "DEBUG": "False", "PORT": str(port)}
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump(secrets, f)
+    server = start_app(mode, port, stub, f.name)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        wait_for(f"{base}/health", f"{mode} server")
+        # Warm the worker processes and their Cognito pools
+        run_load(base, 10, 1)
+        for clients in clients_levels:
+            connections_before = int(urllib.request.urlopen(f"http://127.0.0.1:{stub}/").read())
+            results, elapsed = run_load(base, clients, duration)
+            connections = int(urllib.request.urlopen(f"http://127.0.0.1:{stub}/").read()) - connections_before
+            ok = [seconds for status, seconds in results if status == 200]
+            limited = sum(1 for status, _ in results if status == 429)
+            failed = len(results) - len(ok) - limited
+            if ok:
+                p50 = statistics.median(ok) * 1000
+                p99 = statistics.quantiles(ok, n=100)[98] * 1000 if len(ok) > 1 else ok[0] * 1000
+            else:
+                p50 = p99 = float("nan")
+            print(f"{mode:<15} {clients:>7} {len(ok) / elapsed:>11.1f} {p50:>8.0f} {p99:>8.0f} "
+                  f"{limited:>7} {failed:>7} {connections:>10}")
+    finally:
+        server.terminate()
+        server.wait()
+        os.unlink(f.name)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modes", default="dev,gthread-pool10,gthread")
+    parser.add_argument("--clients", default="50,500")
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--delay", type=float, default=0.08)
+    parser.add_argument("--port", type=int, default=15000)
+    parser.add_argument("--stub", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.stub:
+        run_stub(args.port, args.delay)
+        return
+
+    stub_port = args.port + 100
+    stub = subprocess.Popen([sys.executable, __file__, "--stub", "--port", str(stub_port), "--delay", str(args.delay)])
+    try:
+        wait_for(f"http://127.0.0.1:{stub_port}/", "Cognito stub")
+        clients_levels = [int(clients) for clients in args.clients.split(",")]
+        print(f"{args.duration:.0f}s per level, Cognito calls take {args.delay * 1000:.0f} ms")
+        print(f"{'mode':<15} {'clients':>7} {'logins/sec':>11} {'p50 ms':>8} {'p99 ms':>8} "
+              f"{'limited':>7} {'failed':>7} {'stub conns':>10}")
+        for i, mode in enumerate(args.modes.split(",")):
+            run_mode(mode, args.port + i, stub_port, clients_levels, args.duration)
+    finally:
+        stub.terminate()
+        stub.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import logging
+import math
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Atomic token bucket in Redis: refill from the server clock, take cost
+# tokens if there are enough, and report how long until there would be.
+REDIS_TOKEN_BUCKET = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or burst
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return {allowed, tostring(wait)}
+"""
+
+
+class LocalBuckets:
+    """
+    Token buckets in this worker process, one per key, least recently used
+    keys evicted beyond max_keys (an evicted key starts again with a full
+    bucket). take() returns (allowed, retry_after_seconds).
+    """
+
+    name = "local"
+
+    def __init__(self, max_keys=100000, clock=time.monotonic):
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets = OrderedDict()  # key -> [tokens, updated]
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst, cost=1):
+        now = self._clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [burst, now]
+                while len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+            if bucket[0] >= cost:
+                bucket[0] -= cost
+                return True, 0.0
+            return False, (cost - bucket[0]) / rate
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class RedisBuckets:
+    """
+    Token buckets shared by every replica through Redis. If Redis cannot be
+    reached the decision falls back to this process's LocalBuckets, so the
+    limiter degrades to per-replica limits instead of failing logins.
+    """
+
+    name = "redis"
+
+    def __init__(self, client, prefix="auth:ratelimit:", fallback=None):
+        self.prefix = prefix
+        self.fallback = fallback or LocalBuckets()
+        self._script = client.register_script(REDIS_TOKEN_BUCKET)
+        self.errors = 0
+
+    def take(self, key, rate, burst, cost=1):
+        try:
+            allowed, wait = self._script(keys=[self.prefix + key], args=[rate, burst, cost])
+            return bool(int(allowed)), float(wait)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Rate limit backend unavailable, limiting locally: %s", e)
+            return self.fallback.take(key, rate, burst, cost)
+
+
+class Rule:
+    """rate tokens per second up to burst, for the value key_fn() returns (None skips the rule)"""
+
+    def __init__(self, name, rate, burst, key_fn):
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst at least 1")
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.key_fn = key_fn
+
+
+class RateLimiter:
+    """
+    Applies every rule to a request for one of the limited endpoints. Each
+    (endpoint, rule, key) has its own bucket; the first empty bucket rejects
+    the request and its retry_after is returned.
+    """
+
+    def __init__(self, rules, backend=None):
+        self.rules = list(rules)
+        self.backend = backend or LocalBuckets()
+        self._lock = threading.Lock()
+        self.decisions = Counter()  # (endpoint, rule, "allowed"/"limited") -> count
+
+    def check(self, endpoint):
+        """(allowed, retry_after_seconds, rule name or None)"""
+        for rule in self.rules:
+            value = rule.key_fn()
+            if value is None:
+                continue
+            allowed, retry_after = self.backend.take(f"{endpoint}:{rule.name}:{value}", rule.rate, rule.burst)
+            with self._lock:
+                self.decisions[(endpoint, rule.name, "allowed" if allowed else "limited")] += 1
+            if not allowed:
+                return False, retry_after, rule.name
+        return True, 0.0, None
+
+    def stats(self):
+        with self._lock:
+            return dict(self.decisions)
+
+
+def backend_from_env(url=None):
+    """RedisBuckets for RATE_LIMIT_REDIS_URL (needs the redis package), LocalBuckets otherwise"""
+    url = url if url is not None else os.getenv("RATE_LIMIT_REDIS_URL")
+    if not url:
+        return LocalBuckets()
+    import redis
+    timeout = float(os.getenv("RATE_LIMIT_REDIS_TIMEOUT_SECONDS", "0.05"))
+    client = redis.Redis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout)
+    logger.info("Rate limits shared through %s", url.rpartition("@")[2])
+    return RedisBuckets(client)
+
+
+def retry_after_header(seconds):
+    return str(max(1, math.ceil(seconds)))
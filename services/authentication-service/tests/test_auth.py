@@ -10,6 +10,19 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app import app
 
+@pytest.fixture(autouse=True)
+def fresh_caches():
+    # Cached health results and user statuses must not leak between tests
+    import app as app_module
+    from cache import TTLCache
+    from cognito_usage import HealthMonitor
+    from rate_limit import LocalBuckets
+    monitor = HealthMonitor(app_module.health_monitor.check, interval=3600)
+    with patch('app.user_statuses', TTLCache(100, 60)), patch('app.health_monitor', monitor), \
+            patch('app.rate_limiter', app_module.build_rate_limiter(LocalBuckets())):
+        yield
+    monitor.stop()
+
 @pytest.fixture
 def client():
     app.config['TESTING'] = True
@@ -378,5 +391,149 @@ class TestErrorHandling:
         data = response.get_json()
         assert 'Method not allowed' in data['error']
 
+class TestConfig:
+    def test_secret_is_loaded_on_first_use(self, monkeypatch):
+        import config
+        from config_provider import SecretProvider
+        secrets = MagicMock()
+        secrets.get_secret_value.return_value = {'SecretString': json.dumps({
+            'USER_POOL_ID': 'us-east-1_pool', 'CLIENT_ID': 'client-from-secret', 'REGION': 'us-east-1',
+            'DEBUG': 'False', 'PORT': '5000'})}
+        provider = SecretProvider('auth-app-config', client=secrets, file_path='')
+        monkeypatch.setattr(config, 'provider', provider)
+
+        assert secrets.get_secret_value.call_count == 0
+        assert config.CLIENT_ID == 'client-from-secret'
+        assert config.DEBUG is False
+        assert config.USER_POOL_ID == 'us-east-1_pool'
+        assert secrets.get_secret_value.call_count == 1
+
+    def test_environment_stands_in_without_secrets_manager(self, monkeypatch):
+        import config
+        from config_provider import SecretProvider
+        secrets = MagicMock()
+        secrets.get_secret_value.side_effect = create_cognito_error('AccessDeniedException', 'denied')
+        monkeypatch.setenv('CLIENT_ID', 'client-from-env')
+        provider = SecretProvider('auth-app-config', client=secrets, file_path='',
+                                  env_keys=('CLIENT_ID',), env_defaults={'CLIENT_ID': 'dummy', 'PORT': '5000'})
+        monkeypatch.setattr(config, 'provider', provider)
+
+        assert config.CLIENT_ID == 'client-from-env'
+        assert config.PORT == 5000
+        assert provider.source == 'env'
+
+class TestCognitoUsage:
+    def test_health_probes_reuse_cached_check(self, client, mock_cognito):
+        mock_cognito.describe_user_pool.return_value = {'UserPool': {'Id': 'test-pool-id'}}
+
+        for _ in range(5):
+            assert client.get('/health').status_code == 200
+        assert mock_cognito.describe_user_pool.call_count == 1
+
+    def test_signup_caches_user_status(self, client, mock_cognito):
+        mock_cognito.sign_up.side_effect = create_cognito_error('UsernameExistsException', 'exists')
+        mock_cognito.admin_get_user.return_value = {'UserStatus': 'CONFIRMED'}
+
+        for _ in range(3):
+            response = client.post('/auth/signup', json={'email': 'existing@example.com', 'password': 'password123'})
+            assert response.get_json()['error_code'] == 'USER_EXISTS_VERIFIED'
+        assert mock_cognito.admin_get_user.call_count == 1
+
+    def test_cognito_calls_counted_per_endpoint(self, client):
+        import app as app_module
+        from cognito_usage import CountingClient
+        counter = CountingClient(MagicMock(), app_module.cognito_counter._label_fn)
+        counter._client.initiate_auth.side_effect = create_cognito_error('NotAuthorizedException', 'bad')
+        with patch('app.cognito', counter), patch('app.cognito_counter', counter):
+            client.post('/auth/login', json={'email': 'test@example.com', 'password': 'password123'})
+            client.post('/auth/login', json={'email': 'test@example.com', 'password': 'password123'})
+            metrics = client.get('/metrics').get_data(as_text=True)
+
+        assert 'auth_cognito_calls_total{' in metrics
+        assert 'endpoint="login",operation="initiate_auth"} 2' in metrics
+        assert 'auth_cognito_errors_total{' in metrics
+
 if __name__ == '__main__':
-    pytest.main([__file__, '-v'])
\ No newline at end of file
+    pytest.main([__file__, '-v'])
+
+class TestRateLimiting:
+    def test_email_limited_before_cognito(self, client, mock_cognito):
+        mock_cognito.initiate_auth.side_effect = create_cognito_error('NotAuthorizedException', 'Incorrect')
+        import app as app_module
+        burst = app_module.RATE_LIMIT_EMAIL_BURST
+
+        statuses = [client.post('/auth/login', json={'email': 'Victim@example.com', 'password': 'guess123'}).status_code
+                    for _ in range(burst)]
+        response = client.post('/auth/login', json={'email': 'victim@example.com', 'password': 'guess123'})
+
+        assert statuses == [401] * burst
+        assert response.status_code == 429
+        assert response.get_json()['error_code'] == 'RateLimitExceeded'
+        assert int(response.headers['Retry-After']) >= 1
+        assert mock_cognito.initiate_auth.call_count == burst
+        # Another account from the same client is still allowed
+        assert client.post('/auth/login', json={'email': 'other@example.com', 'password': 'guess123'}).status_code == 401
+
+        metrics = client.get('/metrics').get_data(as_text=True)
+        assert 'endpoint="login",rule="email",decision="limited"} 1' in metrics
+
+    def test_ip_limit_spans_emails_and_legacy_routes(self, client, mock_cognito):
+        from rate_limit import LocalBuckets
+        import app as app_module
+        limiter = app_module.RateLimiter([app_module.Rule('ip', 1 / 60, 2, app_module.client_ip)], LocalBuckets())
+        mock_cognito.sign_up.return_value = {'UserSub': 'sub'}
+        with patch('app.rate_limiter', limiter):
+            assert client.post('/auth/signup', json={'email': 'a@example.com', 'password': 'password123'}).status_code == 200
+            assert client.post('/register', json={'username': 'b', 'email': 'b@example.com', 'password': 'password123',
+                                                  'full_name': 'B'}).status_code == 200
+            assert client.post('/auth/signup', json={'email': 'c@example.com', 'password': 'password123'}).status_code == 429
+            # Other endpoint groups have their own buckets
+            mock_cognito.resend_confirmation_code.return_value = {}
+            assert client.post('/auth/resend', json={'email': 'c@example.com'}).status_code == 200
+        assert mock_cognito.sign_up.call_count == 2
+
+    def test_ip_bucket_per_forwarded_browser_address(self, client, mock_cognito):
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        from rate_limit import LocalBuckets
+        import app as app_module
+        limiter = app_module.RateLimiter([app_module.Rule('ip', 1 / 60, 1, app_module.client_ip)], LocalBuckets())
+        mock_cognito.resend_confirmation_code.return_value = {}
+
+        def resend(forwarded_for):
+            return client.post('/auth/resend', json={'email': 'a@example.com'},
+                               headers={'X-Forwarded-For': forwarded_for}).status_code
+
+        # The frontend is the one trusted proxy; users behind it get their own buckets
+        with patch('app.rate_limiter', limiter), \
+                patch.object(app_module.app, 'wsgi_app', ProxyFix(app_module.app.wsgi_app, x_for=1)):
+            assert [resend('203.0.113.1'), resend('203.0.113.2')] == [200, 200]
+            # A forged leftmost entry does not buy a fresh bucket
+            assert resend('198.51.100.7, 203.0.113.1') == 429
+
+    def test_exempt_caller_without_forwarded_address(self, client, mock_cognito):
+        import ipaddress
+        from rate_limit import LocalBuckets
+        import app as app_module
+        limiter = app_module.RateLimiter([app_module.Rule('ip', 1 / 60, 1, app_module.client_ip)], LocalBuckets())
+        mock_cognito.resend_confirmation_code.return_value = {}
+        with patch('app.rate_limiter', limiter), \
+                patch('app.RATE_LIMIT_IP_EXEMPT_NETWORKS', [ipaddress.ip_network('127.0.0.0/8')]):
+            statuses = [client.post('/auth/resend', json={'email': f'{n}@example.com'}).status_code for n in range(3)]
+        assert statuses == [200, 200, 200]
+
+    def test_bucket_refills_over_time(self):
+        from rate_limit import LocalBuckets
+        now = [0.0]
+        buckets = LocalBuckets(clock=lambda: now[0])
+        assert [buckets.take('k', 1.0, 2)[0] for _ in range(3)] == [True, True, False]
+        assert buckets.take('k', 1.0, 2)[1] == pytest.approx(1.0)
+        now[0] = 1.0
+        assert buckets.take('k', 1.0, 2) == (True, 0.0)
+
+    def test_shared_backend_falls_back_to_local(self):
+        from rate_limit import RedisBuckets
+        redis_client = MagicMock()
+        redis_client.register_script.return_value.side_effect = ConnectionError('redis down')
+        buckets = RedisBuckets(redis_client)
+        assert [buckets.take('k', 1.0, 1)[0] for _ in range(2)] == [True, False]
+        assert buckets.errors == 2
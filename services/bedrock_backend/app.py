@@ -1,20 +1,91 @@
-from flask import Flask, request, jsonify
-import os, json, time, uuid, logging
+from flask import Flask, request, jsonify, Response, stream_with_context
+import os, re, json, time, uuid, logging
+from functools import wraps
 import boto3
 from botocore.exceptions import ClientError, ReadTimeoutError
 from botocore.config import Config
+from limiter import ConcurrencyLimiter, Overloaded
+from cache import TTLCache
+from semantic_cache import SemanticCache, LATENCY_BUCKETS
+from resilience import CircuitBreaker, CircuitOpenError, RetryPolicy, call_with_resilience
+from logging_setup import setup_logging
+from config_provider import SecretProvider
 
+# JSON lines to stdout via a background thread; LOG_LEVEL=DEBUG adds the
+# prompt and reply text, LOG_SAMPLE_RATE thins out the per-request INFO lines
+setup_logging("chatbot")
 app = Flask(__name__)
-logging.basicConfig(level=logging.INFO)
 
 REGION = "us-east-1"  # Force US-EAST-1
 SECRET_NAME = os.getenv("SECRET_NAME", "movies-series-agent-creds-v2")
+# Agent ids are read from Secrets Manager on first use, not at import, and
+# re-read in the background once they are SECRET_TTL_SECONDS old. Offline,
+# SECRETS_FILE or BEDROCK_AGENT_ID/BEDROCK_AGENT_ALIAS_ARN stand in for it.
+SECRET_TTL_SECONDS = float(os.getenv("SECRET_TTL_SECONDS", "300"))
 
-boto_config = Config(
-    read_timeout=300,
-    connect_timeout=60,
-    retries={'max_attempts': 5, 'mode': 'standard'}
-)
+# Agent calls allowed at once per worker process, and how many more may wait
+# for a slot. Keep limit + queue below the gunicorn thread count so /health
+# and other fast requests always find a free thread.
+CHAT_MAX_CONCURRENCY = int(os.getenv("CHAT_MAX_CONCURRENCY", "48"))
+CHAT_MAX_QUEUE = int(os.getenv("CHAT_MAX_QUEUE", "8"))
+CHAT_QUEUE_TIMEOUT = float(os.getenv("CHAT_QUEUE_TIMEOUT", "10"))
+
+# Client session ids map to agent sessions for SESSION_TTL_SECONDS after the
+# last message, so follow-ups keep the agent's conversation state. Opening
+# questions are answered from the response cache for RESPONSE_CACHE_TTL_SECONDS
+# (0 disables it). Both caches are per worker process.
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", "600"))
+SESSION_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", "10000"))
+RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+
+# Paraphrases of a cached opening prompt ("suggest some sci-fi films" after
+# "recommend me sci-fi movies") reuse its reply when the cosine similarity of
+# their hashed bag-of-words vectors reaches the threshold (0 disables it)
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "2048"))
+
+# Agent calls are retried on throttling, 5xx and connection errors with
+# full-jitter backoff, within AGENT_DEADLINE_SECONDS per request in total.
+# After AGENT_BREAKER_FAILURES such failures in a row the agent is treated as
+# down and chats fail fast with 503 for AGENT_BREAKER_RECOVERY_SECONDS.
+# Each attempt is cut off by botocore's connect and read timeouts, which are
+# capped so that one attempt always ends within the deadline; a retry only
+# starts if it could time out within what is left of it.
+AGENT_MAX_ATTEMPTS = int(os.getenv("AGENT_MAX_ATTEMPTS", "3"))
+AGENT_DEADLINE_SECONDS = float(os.getenv("AGENT_DEADLINE_SECONDS", "120"))
+AGENT_CONNECT_TIMEOUT_SECONDS = float(os.getenv("AGENT_CONNECT_TIMEOUT_SECONDS", "10"))
+AGENT_READ_TIMEOUT_SECONDS = float(os.getenv("AGENT_READ_TIMEOUT_SECONDS", "100"))
+AGENT_BREAKER_FAILURES = int(os.getenv("AGENT_BREAKER_FAILURES", "5"))
+AGENT_BREAKER_RECOVERY_SECONDS = float(os.getenv("AGENT_BREAKER_RECOVERY_SECONDS", "30"))
+
+# Same character set and length Bedrock accepts for sessionId
+SESSION_ID_PATTERN = re.compile(r"^[0-9a-zA-Z._:-]{2,100}$")
+
+def client_config(deadline, connect_timeout=AGENT_CONNECT_TIMEOUT_SECONDS, read_timeout=AGENT_READ_TIMEOUT_SECONDS):
+    """botocore Config whose connect + read timeouts fit inside deadline"""
+    connect_timeout = min(connect_timeout, deadline / 2)
+    return Config(
+        connect_timeout=connect_timeout,
+        read_timeout=min(read_timeout, deadline - connect_timeout),
+        # Retries happen in invoke_with_retry; botocore's own would multiply them
+        retries={'max_attempts': 1, 'mode': 'standard'},
+        # One pooled connection per concurrent agent call (botocore default is 10)
+        max_pool_connections=CHAT_MAX_CONCURRENCY
+    )
+
+boto_config = client_config(AGENT_DEADLINE_SECONDS)
+
+chat_limiter = ConcurrencyLimiter(CHAT_MAX_CONCURRENCY, CHAT_MAX_QUEUE, CHAT_QUEUE_TIMEOUT)
+sessions = TTLCache(SESSION_MAX_ENTRIES, SESSION_TTL_SECONDS)
+# Agent session id -> opening exchange answered from a cache, which the agent
+# has not seen; it is sent as conversation history with the session's next turn
+session_history = TTLCache(SESSION_MAX_ENTRIES, SESSION_TTL_SECONDS)
+response_cache = TTLCache(RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL_SECONDS)
+semantic_cache = SemanticCache(SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL_SECONDS)
+agent_retry = RetryPolicy(AGENT_MAX_ATTEMPTS, base_delay=0.5, max_delay=8, deadline=AGENT_DEADLINE_SECONDS,
+                          attempt_timeout=boto_config.connect_timeout + boto_config.read_timeout)
+agent_breaker = CircuitBreaker("bedrock-agent", AGENT_BREAKER_FAILURES, AGENT_BREAKER_RECOVERY_SECONDS)
 
 sm = boto3.client("secretsmanager", region_name=REGION, config=boto_config)
 agent_rt = boto3.client("bedrock-agent-runtime", region_name=REGION, config=boto_config)
@@ -24,19 +95,18 @@ AGENT_ID = None
 AGENT_ALIAS_ARN = None
 AGENT_ALIAS_ID = None
 
-def load_credentials():
-    global AGENT_ID, AGENT_ALIAS_ARN, AGENT_ALIAS_ID
-    resp = sm.get_secret_value(SecretId=SECRET_NAME)
-    creds = json.loads(resp["SecretString"])
+credentials = SecretProvider(SECRET_NAME, region=REGION, ttl=SECRET_TTL_SECONDS, client=sm,
+                             env_keys=("BEDROCK_AGENT_ID", "BEDROCK_AGENT_ALIAS_ARN"))
 
-    print(f"DEBUG: Creds: {creds}")
-    AGENT_ID = creds["BEDROCK_AGENT_ID"]  
-    AGENT_ALIAS_ARN = creds["BEDROCK_AGENT_ALIAS_ARN"]
-    AGENT_ALIAS_ID = AGENT_ALIAS_ARN.split("/")[-1] 
+def load_credentials(creds):
+    """Point the agent globals at creds; runs after the first load and every refresh"""
+    global AGENT_ID, AGENT_ALIAS_ARN, AGENT_ALIAS_ID
+    AGENT_ID = creds.get("BEDROCK_AGENT_ID")
+    AGENT_ALIAS_ARN = creds.get("BEDROCK_AGENT_ALIAS_ARN")
+    AGENT_ALIAS_ID = AGENT_ALIAS_ARN.split("/")[-1] if AGENT_ALIAS_ARN else None
+    app.logger.info("Loaded agent %s, alias %s", AGENT_ID, AGENT_ALIAS_ID)
 
-    print(f"DEBUG: AGENT_ID: {AGENT_ID}")
-    print(f"DEBUG: AGENT_ALIAS_ARN: {AGENT_ALIAS_ARN}")
-    print(f"DEBUG: AGENT_ALIAS_ID: {AGENT_ALIAS_ID}")
+credentials.subscribe(load_credentials)
 
 def wait_for_alias(alias_arn, timeout=600, interval=10):
     start = time.time()
@@ -47,97 +117,328 @@ def wait_for_alias(alias_arn, timeout=600, interval=10):
             if status == "ACTIVE":
                 return
         except Exception as e:
-            print(f"Error checking alias status: {e}")
+            app.logger.warning("Error checking alias status: %s", e)
         time.sleep(interval)
     raise RuntimeError("Alias did not become ACTIVE in time")
 
-load_credentials()
-# Skip alias check for now - assume it's active
-print("Skipping alias check - assuming agent is active")
+def invoke_with_retry(message, session_id=None, **kwargs):
+    """invoke_agent under agent_retry and agent_breaker; raises CircuitOpenError while the agent is down"""
+    session_id = session_id or str(uuid.uuid4())
+    return call_with_resilience(
+        agent_rt.invoke_agent, agent_retry, agent_breaker,
+        agentId=AGENT_ID,
+        agentAliasId=AGENT_ALIAS_ID,
+        sessionId=session_id,
+        inputText=message,
+        **kwargs
+    )
 
-def invoke_with_retry(message, max_retries=3):
-    for attempt in range(1, max_retries + 1):
-        try:
-            print(f"DEBUG: Attempt {attempt} - Invoking agent with ID: {AGENT_ID}, Alias ID: {AGENT_ALIAS_ID}")
-            result = agent_rt.invoke_agent(
-                agentId=AGENT_ID,
-                agentAliasId=AGENT_ALIAS_ID,
-                sessionId=str(uuid.uuid4()),
-                inputText=message
-            )
-            print(f"DEBUG: Agent invocation successful: {result}")
-            return result
-        except ReadTimeoutError as e:
-            print(f"DEBUG: ReadTimeoutError on attempt {attempt}: {e}")
-            if attempt == max_retries:
-                raise
-            time.sleep(2 ** attempt)
-        except Exception as e:
-            print(f"DEBUG: Exception on attempt {attempt}: {e}")
-            if attempt == max_retries:
-                raise
-            print(f"Attempt {attempt} failed: {e}")
-            time.sleep(2 ** attempt)
+def invoke_in_session(message, agent_session_id, **kwargs):
+    """invoke_with_retry in agent_session_id, first handing the agent any turns it missed"""
+    history = session_history.get(agent_session_id)
+    if history:
+        kwargs["sessionState"] = {"conversationHistory": {"messages": history}}
+    response = invoke_with_retry(message, session_id=agent_session_id, **kwargs)
+    session_history.pop(agent_session_id)
+    return response
 
-def parse_reply(response):
-    parts = []
+def remember_cached_turn(agent_session_id, message, reply):
+    """Record an exchange served from a cache so the agent session gets it as history"""
+    session_history.set(agent_session_id, [
+        {"role": "user", "content": [{"text": message}]},
+        {"role": "assistant", "content": [{"text": reply}]},
+    ])
+
+def normalize_prompt(message):
+    """Cache key for a prompt: case, inner whitespace and trailing punctuation ignored"""
+    return " ".join(message.lower().split()).rstrip(" ?!.")
+
+def cached_reply(message):
+    """Reply to an opening prompt from the exact or the semantic cache, or None"""
+    reply = response_cache.get(normalize_prompt(message))
+    if reply is None:
+        reply, _ = semantic_cache.lookup(message)
+    return reply
+
+def remember_reply(message, reply):
+    response_cache.set(normalize_prompt(message), reply)
+    semantic_cache.add(message, reply)
+
+def resolve_session(client_session_id):
+    """
+    Map a client session id to an agent session id.
+
+    Returns (client_session_id, agent_session_id, is_new). Unknown or expired
+    ids start a fresh agent conversation; requests without an id get a new
+    one, which the response hands back so the client can continue.
+    """
+    client_session_id = client_session_id or str(uuid.uuid4())
+    agent_session_id = sessions.get(client_session_id, touch=True)
+    if agent_session_id:
+        return client_session_id, agent_session_id, False
+    agent_session_id = str(uuid.uuid4())
+    sessions.set(client_session_id, agent_session_id)
+    return client_session_id, agent_session_id, True
+
+def read_session_id(body):
+    """Client session id from the request body, or raise ValueError"""
+    session_id = body.get("session_id")
+    if session_id is not None and (not isinstance(session_id, str) or not SESSION_ID_PATTERN.match(session_id)):
+        raise ValueError("session_id must be 2-100 characters of letters, digits, '.', '_', ':' or '-'")
+    return session_id
+
+def iter_reply_chunks(response):
+    """Yield the text of each completion chunk as the agent produces it"""
     for ev in response.get("completion", []):
         chunk = ev.get("chunk") or {}
         if "bytes" in chunk:
-            parts.append(chunk["bytes"].decode())
+            yield chunk["bytes"].decode()
         elif "text" in chunk:
-            parts.append(chunk["text"])
+            yield chunk["text"]
+
+def parse_reply(response):
+    parts = list(iter_reply_chunks(response))
     if not parts:
         raise RuntimeError("Empty completion from agent")
     return "".join(parts)
 
+def limited(view):
+    """Run the view inside a chat_limiter slot"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        chat_limiter.acquire()
+        try:
+            response = app.make_response(view(*args, **kwargs))
+        except BaseException:
+            chat_limiter.release()
+            raise
+        if response.is_streamed:
+            # The agent is still producing: hold the slot until the last event is sent
+            response.call_on_close(chat_limiter.release)
+        else:
+            chat_limiter.release()
+        return response
+    return wrapper
+
+@app.errorhandler(Overloaded)
+def overloaded(e):
+    response = jsonify(error=f"Chatbot is busy ({e.reason}), please retry")
+    response.headers["Retry-After"] = "5"
+    return response, 503
+
+@app.errorhandler(CircuitOpenError)
+def agent_unavailable(e):
+    response = jsonify(error="Chatbot agent is temporarily unavailable, please retry")
+    response.headers["Retry-After"] = str(max(1, round(e.retry_after)))
+    return response, 503
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    stats = chat_limiter.stats()
+    cache_stats = response_cache.stats()
+    semantic = semantic_cache.stats()
+    pid = os.getpid()
+    lines = []
+    for name, kind, help_text, value in [
+        ("chatbot_chat_concurrency_limit", "gauge", "Agent calls allowed at once", stats["limit"]),
+        ("chatbot_chat_queue_limit", "gauge", "Requests allowed to wait for a slot", stats["queue_limit"]),
+        ("chatbot_chat_in_flight", "gauge", "Agent calls currently running", stats["in_flight"]),
+        ("chatbot_chat_queue_depth", "gauge", "Requests waiting for a slot", stats["queue_depth"]),
+        ("chatbot_chat_queue_depth_max", "gauge", "Highest queue depth seen", stats["max_queue_depth"]),
+        ("chatbot_chat_completed_total", "counter", "Chat requests that held a slot", stats["completed"]),
+        ("chatbot_chat_rejected_total", "counter", "Chat requests rejected with a full queue", stats["rejected"]),
+        ("chatbot_chat_queue_timeouts_total", "counter", "Chat requests that waited too long", stats["timed_out"]),
+        ("chatbot_sessions", "gauge", "Conversations with a live agent session", len(sessions)),
+        ("chatbot_response_cache_entries", "gauge", "Cached opening replies", cache_stats["size"]),
+        ("chatbot_response_cache_hits_total", "counter", "Replies served without calling the agent", cache_stats["hits"]),
+        ("chatbot_response_cache_misses_total", "counter", "Opening prompts not in the cache", cache_stats["misses"]),
+        ("chatbot_semantic_cache_entries", "gauge", "Prompts in the semantic index", semantic["size"]),
+        ("chatbot_semantic_cache_lookups_total", "counter", "Semantic cache lookups", semantic["lookups"]),
+        ("chatbot_semantic_cache_hits_total", "counter", "Paraphrases answered from the cache", semantic["hits"]),
+        ("chatbot_semantic_cache_hit_ratio", "gauge", "Semantic cache hits per lookup", round(semantic["hit_rate"], 4)),
+        ("chatbot_semantic_cache_evictions_total", "counter", "Entries evicted for space", semantic["evictions"]),
+        ("chatbot_agent_calls_avoided_total", "counter", "Chats answered without calling Bedrock",
+         cache_stats["hits"] + semantic["hits"]),
+        ("chatbot_agent_circuit_open", "gauge", "1 while agent calls fail fast",
+         int(agent_breaker.state != agent_breaker.CLOSED)),
+        ("chatbot_agent_circuit_rejected_total", "counter", "Chats rejected by the open circuit", agent_breaker.rejected),
+    ]:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f'{name}{{pid="{pid}"}} {value}']
+
+    name = "chatbot_semantic_cache_lookup_seconds"
+    lines += [f"# HELP {name} Time to embed a prompt and search the index", f"# TYPE {name} histogram"]
+    cumulative = 0
+    for bound, count in zip(list(LATENCY_BUCKETS) + ["+Inf"], semantic["latency_counts"]):
+        cumulative += count
+        lines.append(f'{name}_bucket{{pid="{pid}",le="{bound}"}} {cumulative}')
+    lines += [f'{name}_sum{{pid="{pid}"}} {semantic["latency_sum"]:.6f}', f'{name}_count{{pid="{pid}"}} {cumulative}']
+    return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
+
 @app.route('/health', methods=['GET'])
 def health():
+    # The first probe loads the agent ids, so users never wait on Secrets Manager
+    credentials.get()
     return jsonify(
         status="healthy" if AGENT_ID else "unhealthy",
         agent_id=AGENT_ID,
         alias_id=AGENT_ALIAS_ID
     )
 
+def log_chat(started, session_id, message, reply, cached):
+    """One INFO line per chat with sizes and timing; the texts themselves only at DEBUG"""
+    elapsed_ms = round((time.perf_counter() - started) * 1000)
+    fields = {"session_id": session_id, "cached": cached, "duration_ms": elapsed_ms,
+              "prompt_chars": len(message), "reply_chars": len(reply)}
+    app.logger.info("chat answered in %d ms", elapsed_ms, extra=fields)
+    app.logger.debug("chat prompt %r reply %r", message, reply, extra={"session_id": session_id})
+
 @app.route('/chat', methods=['POST'])
+@limited
 def chat():
-    print("DEBUG: Chat endpoint called")
     if not request.is_json:
-        print("DEBUG: Request is not JSON")
         return jsonify(error="JSON required"), 400
-    
+
     body = request.get_json()
-    print(f"DEBUG: Request body: {body}")
     msg = body.get("message")
-    print(f"DEBUG: Message: {msg}")
-    
     if not msg or not isinstance(msg, str) or not msg.strip():
-        print("DEBUG: Invalid message format")
         return jsonify(error="message must be a non-empty string"), 400
+
+    try:
+        session_id = read_session_id(body)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
     
+    credentials.get()
     if not AGENT_ID:
-        print("DEBUG: Agent not configured")
         return jsonify(error="Agent not configured"), 503
-    
+
+    started = time.perf_counter()
+    session_id, agent_session_id, is_new = resolve_session(session_id)
+    # Only opening prompts are cacheable; follow-ups depend on the conversation
+    if is_new:
+        cached = cached_reply(msg)
+        if cached is not None:
+            remember_cached_turn(agent_session_id, msg, cached)
+            log_chat(started, session_id, msg, cached, cached=True)
+            return jsonify(response=cached, session_id=session_id, cached=True)
+
     try:
-        print(f"DEBUG: Calling invoke_with_retry with message: {msg}")
-        raw = invoke_with_retry(msg)
-        print(f"DEBUG: Raw response: {raw}")
+        raw = invoke_in_session(msg, agent_session_id)
         reply = parse_reply(raw)
-        print(f"DEBUG: Parsed reply: {reply}")
-        return jsonify(response=reply)
+        if is_new:
+            remember_reply(msg, reply)
+        log_chat(started, session_id, msg, reply, cached=False)
+        return jsonify(response=reply, session_id=session_id, cached=False)
+    except CircuitOpenError:
+        raise
     except ReadTimeoutError as e:
-        print(f"DEBUG: ReadTimeoutError: {e}")
+        app.logger.warning("chat timed out invoking agent: %s", e, extra={"session_id": session_id})
+        return jsonify(error="Timeout invoking agent"), 504
+    except ClientError as e:
+        err = e.response.get("Error", {})
+        app.logger.error("chat agent error %s: %s", err.get("Code"), err.get("Message"),
+                         extra={"session_id": session_id})
+        return jsonify(error=err.get("Code", "ClientError") + ": " + err.get("Message", str(e))), 500
+    except Exception as e:
+        app.logger.exception("chat failed", extra={"session_id": session_id})
+        return jsonify(error=str(e)), 500
+
+def sse_event(event, data):
+    """One server-sent event; data is JSON so newlines in the text are safe"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def stream_reply(response, started, session_id=None, on_complete=None):
+    """SSE body: a chunk event per agent chunk, then done (or error)"""
+    first_token_ms = None
+    parts = []
+    chunks = 0
+    try:
+        for text in iter_reply_chunks(response):
+            if not text:
+                continue
+            if first_token_ms is None:
+                first_token_ms = round((time.perf_counter() - started) * 1000)
+                app.logger.info("chat/stream time to first token: %d ms", first_token_ms)
+            chunks += 1
+            parts.append(text)
+            yield sse_event("chunk", {"text": text})
+        if not chunks:
+            yield sse_event("error", {"error": "Empty completion from agent"})
+            return
+        if on_complete:
+            on_complete("".join(parts))
+        yield sse_event("done", {
+            "chunks": chunks,
+            "first_token_ms": first_token_ms,
+            "total_ms": round((time.perf_counter() - started) * 1000),
+            "session_id": session_id,
+            "cached": False
+        })
+    except Exception as e:
+        # Headers are already sent, so failures mid-stream become an event
+        app.logger.exception("chat/stream failed after %d chunks", chunks)
+        yield sse_event("error", {"error": str(e)})
+
+@app.route('/chat/stream', methods=['POST'])
+@limited
+def chat_stream():
+    if not request.is_json:
+        return jsonify(error="JSON required"), 400
+
+    body = request.get_json()
+    msg = body.get("message")
+    if not msg or not isinstance(msg, str) or not msg.strip():
+        return jsonify(error="message must be a non-empty string"), 400
+
+    try:
+        session_id = read_session_id(body)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+    credentials.get()
+    if not AGENT_ID:
+        return jsonify(error="Agent not configured"), 503
+
+    started = time.perf_counter()
+    session_id, agent_session_id, is_new = resolve_session(session_id)
+    on_complete = None
+    if is_new:
+        cached = cached_reply(msg)
+        if cached is not None:
+            remember_cached_turn(agent_session_id, msg, cached)
+            events = [
+                sse_event("chunk", {"text": cached}),
+                sse_event("done", {"chunks": 1, "first_token_ms": 0, "total_ms": 0,
+                                   "session_id": session_id, "cached": True})
+            ]
+            return Response(events, mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+        on_complete = lambda reply: remember_reply(msg, reply)
+
+    try:
+        # Ask the agent to stream the final answer instead of returning it in
+        # one chunk at the end; errors before the first byte keep real status codes
+        raw = invoke_in_session(msg, agent_session_id,
+                                streamingConfigurations={"streamFinalResponse": True})
+    except CircuitOpenError:
+        raise
+    except ReadTimeoutError:
         return jsonify(error="Timeout invoking agent"), 504
     except ClientError as e:
-        print(f"DEBUG: ClientError: {e}")
         err = e.response.get("Error", {})
         return jsonify(error=err.get("Code", "ClientError") + ": " + err.get("Message", str(e))), 500
     except Exception as e:
-        print(f"DEBUG: Unexpected error: {e}")
-        import traceback
-        print(f"DEBUG: Traceback: {traceback.format_exc()}")
         return jsonify(error=str(e)), 500
+
+    return Response(
+        stream_with_context(stream_reply(raw, started, session_id, on_complete)),
+        mimetype="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Keep proxies (nginx ingress, ALB) from buffering the stream
+            "X-Accel-Buffering": "no"
+        }
+    )
+
 #startup
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=8091)
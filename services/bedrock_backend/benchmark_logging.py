@@ -0,0 +1,100 @@
+# benchmark_logging.py
+# Per-request cost of logging on /chat, with a stubbed agent that answers
+# instantly so only the Flask + logging work is measured.
+#
+#   python benchmark_logging.py                 # LOG_LEVEL CRITICAL, INFO, DEBUG
+#   python benchmark_logging.py --requests 5000 --repeat 5
+#   LOG_QUEUE_SIZE=0 python benchmark_logging.py  # write from the request thread
+#
+# Each level runs in its own process with stdout going to a file, as it
+# would to the container log driver. Caches are disabled so every request
+# reaches the agent stub. Levels are interleaved --repeat times and the
+# fastest run of each is reported, which keeps machine noise out of the
+# overhead column (CRITICAL = no log lines at all).
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+REPLY = "Here are some movies you might like: " + ", ".join(f"Movie {i} ({1990 + i})" for i in range(60))
+
+
+class InstantAgentRuntime:
+    def invoke_agent(self, **kwargs):
+        return {
+            "completion": [{"chunk": {"bytes": REPLY.encode()}}],
+            "contentType": "application/json",
+            "sessionId": kwargs["sessionId"],
+            "ResponseMetadata": {"RequestId": "0" * 36, "HTTPStatusCode": 200,
+                                 "HTTPHeaders": {f"x-amzn-header-{i}": "value" * 4 for i in range(12)}},
+        }
+
+
+def measure(requests):
+    sys.path.insert(0, HERE)
+    import loadtest
+    loadtest.SlowAgentRuntime = lambda delay: InstantAgentRuntime()
+    app = loadtest.load_app(0)
+    client = app.test_client()
+    for i in range(50):
+        client.post("/chat", json={"message": f"warm up {i}"})
+
+    timings = []
+    for i in range(requests):
+        start = time.perf_counter()
+        response = client.post("/chat", json={"message": f"recommend me sci-fi movies like number {i}"})
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == 200
+    try:
+        from logging_setup import flush_logging
+        flush_logging(5)
+    except ImportError:
+        pass
+    print(f"{statistics.mean(timings) * 1e6:.1f} {statistics.median(timings) * 1e6:.1f}", file=sys.stderr)
+
+
+def run_level(level, requests):
+    env = dict(os.environ, LOG_LEVEL=level, RESPONSE_CACHE_TTL_SECONDS="0", SEMANTIC_CACHE_THRESHOLD="0")
+    with tempfile.TemporaryFile() as out:
+        result = subprocess.run([sys.executable, __file__, "--measure", "--requests", str(requests)],
+                                env=env, stdout=out, stderr=subprocess.PIPE, text=True, check=True)
+        out.seek(0, os.SEEK_END)
+        written = out.tell()
+    mean_us, median_us = map(float, result.stderr.strip().splitlines()[-1].split())
+    return mean_us, median_us, written / requests
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--levels", default="CRITICAL,INFO,DEBUG")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--measure", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(args.requests)
+        return
+
+    print(f"{args.requests} /chat requests per level")
+    print(f"{'LOG_LEVEL':<10} {'mean us':>9} {'median us':>10} {'overhead us':>12} {'log bytes/req':>14}")
+    levels = args.levels.split(",")
+    best = {}
+    for _ in range(args.repeat):
+        for level in levels:
+            result = run_level(level, args.requests)
+            if level not in best or result[1] < best[level][1]:
+                best[level] = result
+    baseline = best[levels[0]][1]
+    for level in levels:
+        mean_us, median_us, written = best[level]
+        print(f"{level:<10} {mean_us:>9.1f} {median_us:>10.1f} {median_us - baseline:>12.1f} {written:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
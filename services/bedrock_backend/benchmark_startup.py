@@ -0,0 +1,84 @@
+# benchmark_startup.py
+# Pod startup time and first-request latency with the agent ids loaded
+# eagerly at import (as before) vs lazily by config_provider.
+#
+#   python benchmark_startup.py
+#   python benchmark_startup.py --secret-latency 0.8 --runs 5
+#
+# Secrets Manager is a stub that takes --secret-latency seconds (a cold
+# client's TLS handshake plus the call); the agent answers instantly. Every
+# run is a fresh interpreter, as in a new pod.
+#   import ms      time until the WSGI app object exists (gunicorn can bind)
+#   health ms      first /health, i.e. the readiness probe
+#   first chat ms  first /chat after that
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def measure(mode, secret_latency):
+    from unittest.mock import Mock, patch
+
+    class SlowSecrets:
+        def get_secret_value(self, **kwargs):
+            time.sleep(secret_latency)
+            return {"SecretString": json.dumps({
+                "BEDROCK_AGENT_ID": "bench-agent",
+                "BEDROCK_AGENT_ALIAS_ARN": "arn:aws:bedrock:us-east-1:123456789012:agent-alias/bench-agent/alias"
+            })}
+
+    class InstantAgentRuntime:
+        def invoke_agent(self, **kwargs):
+            return {"completion": [{"chunk": {"bytes": b"Try Arrival."}}]}
+
+    clients = {"secretsmanager": SlowSecrets(), "bedrock-agent-runtime": InstantAgentRuntime()}
+    sys.path.insert(0, HERE)
+    started = time.perf_counter()
+    with patch("boto3.client", side_effect=lambda name, **kwargs: clients.get(name, Mock())):
+        import app as app_module
+        if mode == "eager":
+            app_module.credentials.get()
+    imported = time.perf_counter()
+
+    client = app_module.app.test_client()
+    client.get("/health")
+    probed = time.perf_counter()
+    assert client.post("/chat", json={"message": "recommend me a film"}).status_code == 200
+    chatted = time.perf_counter()
+    print(json.dumps([(imported - started) * 1000, (probed - imported) * 1000, (chatted - probed) * 1000]),
+          file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--secret-latency", type=float, default=0.35)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(args.measure, args.secret_latency)
+        return
+
+    print(f"Secrets Manager stub latency {args.secret_latency * 1000:.0f} ms, median of {args.runs} runs")
+    print(f"{'mode':<8} {'import ms':>10} {'health ms':>10} {'first chat ms':>14}")
+    for mode in ("eager", "lazy"):
+        results = []
+        for _ in range(args.runs):
+            env = dict(os.environ, LOG_LEVEL="WARNING", SECRETS_FILE="")
+            result = subprocess.run([sys.executable, __file__, "--measure", mode,
+                                     "--secret-latency", str(args.secret_latency)],
+                                    env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+            results.append(json.loads(result.stderr.strip().splitlines()[-1]))
+        import_ms, health_ms, chat_ms = (statistics.median(column) for column in zip(*results))
+        print(f"{mode:<8} {import_ms:>10.0f} {health_ms:>10.1f} {chat_ms:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
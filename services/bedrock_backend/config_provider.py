@@ -0,0 +1,144 @@
+"""
+Lazy, cached, background-refreshed secrets.
+
+Nothing is fetched at import time. The first get() loads the secret; later
+calls return the cached value, and once it is older than ttl seconds the
+stale value is still returned while a background thread fetches a fresh one
+(so rotated credentials arrive without any request waiting on Secrets
+Manager).
+
+Sources, in order:
+  1. SECRETS_FILE (or file_path): a local JSON file, for offline/dev runs
+  2. AWS Secrets Manager
+  3. env_keys read from the environment, if Secrets Manager is unreachable
+
+A fallback result is kept for error_ttl seconds only, so Secrets Manager is
+retried soon. Used by bedrock_backend and authentication-service; keep the
+copies identical.
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class SecretProvider:
+    def __init__(self, secret_name, region=None, ttl=300.0, error_ttl=30.0, env_keys=(),
+                 env_defaults=None, file_path=None, client=None, clock=time.monotonic):
+        self.secret_name = secret_name
+        self.region = region
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.env_keys = tuple(env_keys)
+        self.env_defaults = dict(env_defaults or {})
+        self.file_path = file_path if file_path is not None else os.getenv("SECRETS_FILE")
+        self._client = client
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._value = None
+        self._expires = 0.0
+        self._subscribers = []
+
+        self.source = None
+        self.loads = 0
+        self.failures = 0
+        self.last_error = None
+        self.last_load_seconds = None
+
+    @property
+    def loaded(self):
+        return self._value is not None
+
+    def subscribe(self, callback):
+        """callback(values) runs after every load, including background refreshes"""
+        self._subscribers.append(callback)
+
+    def get(self):
+        """The secret as a dict; blocks only on the very first load"""
+        if self._value is None:
+            with self._lock:
+                if self._value is None:
+                    self._load()
+        elif self._clock() >= self._expires:
+            self._refresh_in_background()
+        return self._value
+
+    def refresh(self):
+        """Load now, in the calling thread"""
+        with self._lock:
+            self._load()
+        return self._value
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Background refresh of %s failed", self.secret_name)
+            finally:
+                self._refreshing = False
+        threading.Thread(target=run, name=f"refresh-{self.secret_name}", daemon=True).start()
+
+    def _load(self):
+        started = time.perf_counter()
+        ttl = self.ttl
+        try:
+            if self.file_path:
+                values, source = self._read_file(), "file"
+            else:
+                values, source = self._fetch(), "secretsmanager"
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            if self._value is not None and self.source == "secretsmanager":
+                # Keep serving the last good secret rather than env stand-ins
+                logger.warning("Refreshing %s failed, keeping cached value: %s", self.secret_name, e)
+                self._expires = self._clock() + self.error_ttl
+                return
+            logger.warning("Loading %s failed, using environment: %s", self.secret_name, e)
+            values, source, ttl = self._from_env(), "env", self.error_ttl
+
+        self._value = values
+        self._expires = self._clock() + ttl
+        self.source = source
+        self.loads += 1
+        self.last_load_seconds = time.perf_counter() - started
+        logger.info("Loaded %s from %s in %.0f ms", self.secret_name, source, self.last_load_seconds * 1000)
+        for callback in self._subscribers:
+            callback(values)
+
+    def _fetch(self):
+        if self._client is None:
+            import boto3
+            self._client = boto3.client("secretsmanager", region_name=self.region)
+        response = self._client.get_secret_value(SecretId=self.secret_name)
+        if "SecretString" not in response:
+            raise ValueError("Secret string not found in the response")
+        return json.loads(response["SecretString"])
+
+    def _read_file(self):
+        with open(self.file_path) as f:
+            return json.load(f)
+
+    def _from_env(self):
+        values = dict(self.env_defaults)
+        values.update({key: os.environ[key] for key in self.env_keys if key in os.environ})
+        return values
+
+    def stats(self):
+        return {
+            "source": self.source,
+            "loads": self.loads,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "last_load_seconds": self.last_load_seconds,
+        }
@@ -0,0 +1,20 @@
+# gunicorn.conf.py
+# Threaded workers: agent calls spend their time waiting on Bedrock, so a
+# thread per in-flight chat is cheap and one worker can hold dozens of them.
+# The chat limiter in app.py keeps a few threads free for /health.
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8091')}"
+worker_class = "gthread"
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+threads = int(os.getenv("GUNICORN_THREADS", "64"))
+
+# gthread workers heartbeat from their main loop, so this does not cut off
+# long agent calls; graceful_timeout lets in-flight chats finish on rollout.
+timeout = 60
+graceful_timeout = 310
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info")
@@ -0,0 +1,88 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Overloaded(Exception):
+    """Raised when a request can neither run nor wait for a free slot"""
+
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class ConcurrencyLimiter:
+    """
+    Bounded concurrency for slow agent calls.
+
+    At most max_concurrent callers run at once and at most max_queue wait for
+    a slot (for up to queue_timeout seconds); anyone beyond that is rejected
+    straight away. Waiting callers still hold a server thread, so
+    max_concurrent + max_queue must stay below the thread count to leave
+    threads free for /health and other fast requests.
+    """
+
+    def __init__(self, max_concurrent, max_queue=0, queue_timeout=10.0):
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent must be at least 1")
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self._cond = threading.Condition()
+        self.in_flight = 0
+        self.queued = 0
+        self.max_queued_seen = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def acquire(self):
+        with self._cond:
+            if self.in_flight < self.max_concurrent and self.queued == 0:
+                self.in_flight += 1
+                return
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                raise Overloaded("queue full")
+
+            self.queued += 1
+            self.max_queued_seen = max(self.max_queued_seen, self.queued)
+            deadline = time.monotonic() + self.queue_timeout
+            try:
+                while self.in_flight >= self.max_concurrent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timed_out += 1
+                        raise Overloaded("timed out waiting for a free slot")
+                    self._cond.wait(remaining)
+                self.in_flight += 1
+            finally:
+                self.queued -= 1
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self.completed += 1
+            self._cond.notify()
+
+    @contextmanager
+    def slot(self):
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "limit": self.max_concurrent,
+                "queue_limit": self.max_queue,
+                "in_flight": self.in_flight,
+                "queue_depth": self.queued,
+                "max_queue_depth": self.max_queued_seen,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+            }
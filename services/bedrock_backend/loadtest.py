@@ -0,0 +1,174 @@
+# loadtest.py
+# Concurrent-chat capacity of one chatbot pod with a stubbed agent whose
+# replies take --delay seconds (20 by default), while /health is probed.
+#
+#   python loadtest.py                       # all serving modes
+#   python loadtest.py --modes gthread --chats 80
+#
+# Modes:
+#   dev            python app.py (Werkzeug dev server, the previous default)
+#   gunicorn-sync  gunicorn with 4 sync workers, one request per process
+#   gthread        gunicorn.conf.py (threaded worker + chat limiter)
+# The first two run without the chat limiter, as the service did before.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from unittest.mock import Mock, patch
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+class SlowAgentRuntime:
+    """bedrock-agent-runtime stub: every invoke_agent takes delay seconds"""
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    def invoke_agent(self, **kwargs):
+        time.sleep(self.delay)
+        return {"completion": [{"chunk": {"bytes": b"Here are some movies you might like."}}]}
+
+
+def load_app(delay):
+    secrets = Mock()
+    secrets.get_secret_value.return_value = {"SecretString": json.dumps({
+        "BEDROCK_AGENT_ID": "load-test-agent",
+        "BEDROCK_AGENT_ALIAS_ARN": "arn:aws:bedrock:us-east-1:123456789012:agent-alias/load-test-agent/alias"
+    })}
+    clients = {"secretsmanager": secrets, "bedrock-agent-runtime": SlowAgentRuntime(delay)}
+    with patch("boto3.client", side_effect=lambda name, **kwargs: clients.get(name, Mock())):
+        sys.path.insert(0, HERE)
+        from app import app
+    return app
+
+
+def serve(mode, port, delay):
+    app = load_app(delay)
+    if mode == "dev":
+        app.run(host="127.0.0.1", port=port, threaded=True)
+        return
+
+    from gunicorn.app.base import BaseApplication
+
+    class Server(BaseApplication):
+        def load_config(self):
+            with open(os.path.join(HERE, "gunicorn.conf.py")) as f:
+                settings = {}
+                exec(f.read(), settings)
+            for key, value in settings.items():
+                if key in self.cfg.settings and value is not None:
+                    self.cfg.set(key, value)
+            self.cfg.set("bind", f"127.0.0.1:{port}")
+            self.cfg.set("accesslog", None)
+            if mode == "gunicorn-sync":
+                self.cfg.set("worker_class", "sync")
+                self.cfg.set("workers", int(os.getenv("SYNC_WORKERS", "4")))
+                # gunicorn silently upgrades sync workers to gthread when threads > 1
+                self.cfg.set("threads", 1)
+                self.cfg.set("timeout", 330)
+
+        def load(self):
+            return app
+
+    Server().run()
+
+
+def request(url, data=None, timeout=60):
+    body = json.dumps(data).encode() if data is not None else None
+    req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except Exception:
+        status = None
+    return status, time.perf_counter() - start
+
+
+def run_mode(mode, port, chats, delay):
+    env = dict(os.environ)
+    if mode != "gthread":
+        env["CHAT_MAX_CONCURRENCY"] = "100000"
+    server = subprocess.Popen([sys.executable, __file__, "--serve", mode, "--port", str(port),
+                               "--delay", str(delay)],
+                              env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(100):
+            if request(f"{base}/health", timeout=1)[0] == 200:
+                break
+            time.sleep(0.1)
+        else:
+            raise RuntimeError(f"{mode} server did not start")
+
+        results = []
+        health = []
+        done = threading.Event()
+
+        def chat():
+            results.append(request(f"{base}/chat", {"message": "recommend me sci-fi movies"},
+                                   timeout=delay + 10))
+
+        def probe():
+            while not done.is_set():
+                health.append(request(f"{base}/health", timeout=delay + 10))
+                time.sleep(0.25)
+
+        prober = threading.Thread(target=probe)
+        prober.start()
+        workers = [threading.Thread(target=chat) for _ in range(chats)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        done.set()
+        prober.join()
+    finally:
+        server.terminate()
+        server.wait()
+
+    # Served concurrently: answered without waiting behind another agent call
+    concurrent = sum(1 for status, elapsed in results if status == 200 and elapsed < delay * 1.5)
+    ok = sum(1 for status, _ in results if status == 200)
+    rejected = sum(1 for status, _ in results if status == 503)
+    failed = len(results) - ok - rejected
+    health_ok = [elapsed for status, elapsed in health if status == 200]
+    health_failed = len(health) - len(health_ok)
+    p50 = statistics.median(health_ok) * 1000 if health_ok else float("nan")
+    worst = max(health_ok) * 1000 if health_ok else float("nan")
+    print(f"{mode:<14} {concurrent:>10} {ok:>5} {rejected:>9} {failed:>14} "
+          f"{p50:>12.0f} {worst:>12.0f} {health_failed:>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modes", default="dev,gunicorn-sync,gthread")
+    parser.add_argument("--chats", type=int, default=80)
+    parser.add_argument("--delay", type=float, default=20)
+    parser.add_argument("--port", type=int, default=18091)
+    parser.add_argument("--serve", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port, args.delay)
+        return
+
+    print(f"{args.chats} simultaneous chats, agent replies take {args.delay:.0f}s")
+    print(f"{'mode':<14} {'concurrent':>10} {'ok':>5} {'rejected':>9} {'failed/timeout':>14} "
+          f"{'health p50ms':>12} {'health maxms':>12} {'health fails':>12}")
+    for i, mode in enumerate(args.modes.split(",")):
+        run_mode(mode, args.port + i, args.chats, args.delay)
+
+
+if __name__ == "__main__":
+    main()
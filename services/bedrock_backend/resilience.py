@@ -0,0 +1,224 @@
+"""
+Retries and circuit breaking for calls to AWS services.
+
+Framework agnostic (standard library + botocore exceptions only), so the same
+file is used by bedrock_backend, machine_learning_service (app/core) and
+user-service (app/core). Keep the copies identical.
+
+    breaker = CircuitBreaker("bedrock-agent", failure_threshold=5, recovery_timeout=30)
+    policy = RetryPolicy(max_attempts=3, base_delay=0.5, max_delay=8, deadline=120)
+    result = call_with_resilience(client.invoke_agent, policy, breaker, **kwargs)
+
+Clients wrapped this way should be created with botocore retries turned off
+(retries={"max_attempts": 1}) so the two retry layers do not multiply.
+"""
+import logging
+import random
+import threading
+import time
+
+try:
+    from botocore.exceptions import (
+        ClientError,
+        ConnectionClosedError,
+        ConnectTimeoutError,
+        EndpointConnectionError,
+        ReadTimeoutError,
+    )
+    TRANSIENT_EXCEPTIONS = (ConnectionClosedError, ConnectTimeoutError, EndpointConnectionError, ReadTimeoutError)
+except ImportError:  # pragma: no cover - every service ships boto3
+    ClientError = None
+    TRANSIENT_EXCEPTIONS = ()
+
+logger = logging.getLogger(__name__)
+
+# Error codes that mean "try again later" rather than "this request is wrong"
+RETRYABLE_ERROR_CODES = frozenset({
+    "ThrottlingException",
+    "Throttling",
+    "TooManyRequestsException",
+    "RequestLimitExceeded",
+    "ProvisionedThroughputExceededException",
+    "ServiceUnavailableException",
+    "ServiceUnavailable",
+    "InternalServerException",
+    "InternalServerError",
+    "InternalFailure",
+    "DependencyFailedException",
+    "BadGatewayException",
+    "ModelNotReadyException",
+    "RequestTimeout",
+    "RequestTimeoutException",
+})
+
+
+class CircuitOpenError(Exception):
+    """The downstream service is considered unhealthy; the call was not made"""
+
+    def __init__(self, name, retry_after):
+        super().__init__(f"{name} is unavailable, retry in {retry_after:.0f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+def is_retryable(exc):
+    """True for throttling, 5xx and transport errors; False for client mistakes"""
+    if isinstance(exc, TRANSIENT_EXCEPTIONS) or isinstance(exc, (ConnectionError, TimeoutError)):
+        return True
+    if ClientError is not None and isinstance(exc, ClientError):
+        error = exc.response.get("Error", {})
+        if error.get("Code") in RETRYABLE_ERROR_CODES:
+            return True
+        status = exc.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+        return status == 429 or status >= 500
+    return False
+
+
+class RetryPolicy:
+    """
+    Full-jitter exponential backoff inside a total time budget.
+
+    Attempt n (from 1) sleeps a random time in [0, min(max_delay,
+    base_delay * 2**n)], so clients that failed together do not retry
+    together. No retry is started if its sleep would overrun the deadline.
+
+    The policy cannot interrupt an attempt, so the client's own timeouts
+    must bound it: pass their sum as attempt_timeout (at most the deadline)
+    and a retry is only started if it could also time out within the budget.
+    """
+
+    def __init__(self, max_attempts=3, base_delay=0.5, max_delay=8.0, deadline=60.0,
+                 retryable=is_retryable, sleep=time.sleep, clock=time.monotonic, attempt_timeout=0.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.attempt_timeout = attempt_timeout
+        self.retryable = retryable
+        self._sleep = sleep
+        self._clock = clock
+
+    def backoff(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def call(self, fn, *args, **kwargs):
+        started = self._clock()
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if attempt == self.max_attempts or not self.retryable(e):
+                    raise
+                delay = self.backoff(attempt)
+                remaining = self.deadline - (self._clock() - started)
+                if delay + self.attempt_timeout >= remaining:
+                    logger.warning("Giving up after attempt %d: deadline budget spent (%s)", attempt, e)
+                    raise
+                logger.warning("Attempt %d failed with %s, retrying in %.2fs", attempt, e, delay)
+                self._sleep(delay)
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after failure_threshold consecutive retryable failures;
+    open -> half-open after recovery_timeout, letting one trial call through;
+    half-open -> closed on success, back to open on failure.
+
+    Errors that are not retryable (bad input, missing resources) say nothing
+    about the health of the service and do not count as failures.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name, failure_threshold=5, recovery_timeout=30.0,
+                 counts_as_failure=is_retryable, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.counts_as_failure = counts_as_failure
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.rejected = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.recovery_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def before_call(self):
+        with self._lock:
+            if self._state == self.OPEN:
+                waited = self._clock() - self._opened_at
+                if waited < self.recovery_timeout:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.name, self.recovery_timeout - waited)
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self._state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.name, self.recovery_timeout)
+                self._trial_in_flight = True
+
+    def on_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def on_failure(self, exc):
+        if not self.counts_as_failure(exc):
+            # The service answered; only the request was bad
+            self.on_success()
+            return
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.error("Circuit %s opened after %d failures: %s", self.name, self._failures, exc)
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+
+    def call(self, fn, *args, **kwargs):
+        self.before_call()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self.on_failure(e)
+            raise
+        self.on_success()
+        return result
+
+
+def call_with_resilience(fn, policy, breaker, *args, **kwargs):
+    """Retry fn under policy; every attempt goes through the breaker"""
+    return policy.call(breaker.call, fn, *args, **kwargs)
+
+
+class ResilientClient:
+    """
+    Proxy for a boto3 client: every API method call goes through
+    call_with_resilience. Other attributes (meta, exceptions, paginators)
+    are passed through untouched.
+    """
+
+    def __init__(self, client, policy, breaker):
+        self._client = client
+        self._policy = policy
+        self._breaker = breaker
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr) or name.startswith("get_paginator") or name in ("can_paginate", "get_waiter"):
+            return attr
+
+        def call(*args, **kwargs):
+            return call_with_resilience(attr, self._policy, self._breaker, *args, **kwargs)
+        return call
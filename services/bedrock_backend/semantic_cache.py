@@ -0,0 +1,186 @@
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+# Words that say *how* something is asked rather than *what* is asked about.
+# They still count, just much less than titles, genres, names and years.
+LOW_WEIGHT_WORDS = frozenset("""
+    a an the and or of to in on for from with about me my i you your we us please can could would will
+    what which who whats is are be do doe some any something anything good great best top nice new
+    recommend recommendation suggest suggestion give tell find look want like love need
+    watch see kind type similar other more
+""".split())
+LOW_WEIGHT = 0.1
+
+# Fold the ways users name the two catalogs onto one token each
+SYNONYMS = {"film": "movie", "flick": "movie", "show": "series", "tv": "series", "serie": "series"}
+
+# Lookup latency histogram buckets in seconds
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025)
+
+
+def _stem(word):
+    # Crude suffix folding: "movies"/"movie", "comedies"/"comedy",
+    # "directed"/"director"/"directing". Only has to be consistent.
+    if len(word) > 6 and word.endswith("ies"):
+        word = word[:-3] + "y"
+    elif len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        word = word[:-1]
+    for suffix in ("ing", "ed", "or", "er"):
+        if len(word) > len(suffix) + 4 and word.endswith(suffix):
+            word = word[:-len(suffix)]
+            break
+    return SYNONYMS.get(word, word)
+
+
+class HashingEmbedder:
+    """
+    Bag-of-words embedding via the hashing trick: no model files, no fitting,
+    stable across processes. Words and adjacent word pairs are hashed into
+    dim buckets with a sign bit, then the vector is L2 normalized, so a dot
+    product is the cosine similarity.
+    """
+
+    def __init__(self, dim=1024):
+        self.dim = dim
+
+    def tokens(self, text):
+        words = [_stem(word) for word in re.findall(r"[a-z0-9]+", text.lower())]
+        weighted = [(word, LOW_WEIGHT if word in LOW_WEIGHT_WORDS else 1.0) for word in words]
+        content = [word for word, weight in weighted if weight == 1.0]
+        # Pairs of content words keep "science fiction" apart from "fiction"
+        pairs = [(f"{a}_{b}", 1.0) for a, b in zip(content, content[1:])]
+        return weighted + pairs
+
+    def embed(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token, weight in self.tokens(text):
+            h = zlib.crc32(token.encode())
+            vector[h % self.dim] += weight if h & 0x80000000 else -weight
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class SemanticCache:
+    """
+    Replies keyed by meaning instead of exact text.
+
+    Vectors are indexed with random-hyperplane LSH (n_tables tables of n_bits
+    signs each); a lookup only scores the entries sharing a bucket with the
+    query in at least one table, and returns the best reply whose cosine
+    similarity reaches threshold. Entries expire after ttl seconds and the
+    least recently used ones are evicted beyond max_entries.
+    """
+
+    def __init__(self, threshold=0.9, max_entries=2048, ttl=3600, dim=1024,
+                 n_tables=16, n_bits=8, seed=13, clock=time.monotonic):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.embedder = HashingEmbedder(dim)
+        self._clock = clock
+        self._planes = np.random.default_rng(seed).standard_normal((n_tables, n_bits, dim)).astype(np.float32)
+        self._powers = 1 << np.arange(n_bits)
+        self._tables = [dict() for _ in range(n_tables)]
+        self._entries = OrderedDict()  # id -> (vector, reply, bucket keys, expires)
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+        self.lookups = 0
+        self.hits = 0
+        self.evictions = 0
+        self.latency_sum = 0.0
+        self.latency_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 and self.ttl > 0 and 0 < self.threshold <= 1
+
+    def _buckets(self, vector):
+        signs = (self._planes @ vector) > 0
+        return (signs @ self._powers).tolist()
+
+    def _remove(self, entry_id):
+        _, _, buckets, _ = self._entries.pop(entry_id)
+        for table, bucket in zip(self._tables, buckets):
+            members = table.get(bucket)
+            if members is not None:
+                members.discard(entry_id)
+                if not members:
+                    del table[bucket]
+
+    def lookup(self, text):
+        """(reply, similarity) for the closest cached prompt, or (None, best similarity)"""
+        if not self.enabled:
+            return None, 0.0
+        started = time.perf_counter()
+        vector = self.embedder.embed(text)
+        buckets = self._buckets(vector)
+        now = self._clock()
+        best_id, best_score = None, 0.0
+        with self._lock:
+            candidates = set()
+            for table, bucket in zip(self._tables, buckets):
+                candidates |= table.get(bucket, set())
+            for entry_id in candidates:
+                entry_vector, _, _, expires = self._entries[entry_id]
+                if expires <= now:
+                    self._remove(entry_id)
+                    continue
+                score = float(entry_vector @ vector)
+                if score > best_score:
+                    best_id, best_score = entry_id, score
+
+            reply = None
+            if best_id is not None and best_score >= self.threshold:
+                reply = self._entries[best_id][1]
+                self._entries.move_to_end(best_id)
+                self.hits += 1
+            self.lookups += 1
+            self._observe(time.perf_counter() - started)
+        return reply, best_score
+
+    def add(self, text, reply):
+        if not self.enabled:
+            return
+        vector = self.embedder.embed(text)
+        if not vector.any():
+            return
+        buckets = self._buckets(vector)
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (vector, reply, buckets, self._clock() + self.ttl)
+            for table, bucket in zip(self._tables, buckets):
+                table.setdefault(bucket, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _observe(self, seconds):
+        self.latency_sum += seconds
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.latency_counts[i] += 1
+                return
+        self.latency_counts[-1] += 1
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+                "evictions": self.evictions,
+                "latency_sum": self.latency_sum,
+                "latency_counts": list(self.latency_counts),
+            }
@@ -3,6 +3,11 @@ from botocore.exceptions import ClientError, ReadTimeoutError
 import pytest
 from unittest.mock import Mock, patch
 import json
+import socket
+import threading
+import time
+
+import boto3
 
 # Mock all AWS clients before importing app
 with patch('boto3.client') as mock_boto3:
@@ -37,7 +42,31 @@ with patch('boto3.client') as mock_boto3:
     
     mock_boto3.side_effect = mock_client
     
+    import app as app_module
     from app import app
+    from limiter import ConcurrencyLimiter, Overloaded
+    from cache import TTLCache
+    from semantic_cache import SemanticCache
+    from resilience import CircuitBreaker, CircuitOpenError, RetryPolicy, call_with_resilience
+    from config_provider import SecretProvider
+
+def loaded_credentials(values):
+    # Already loaded and never stale, so requests leave the patched AGENT_ID alone
+    provider = SecretProvider("test-secret", ttl=float("inf"), file_path="", client=Mock(**{
+        "get_secret_value.return_value": {"SecretString": json.dumps(values)}}))
+    provider.get()
+    return provider
+
+@pytest.fixture(autouse=True)
+def fresh_caches():
+    # Sessions and cached replies must not leak from one test into the next
+    with patch('app.sessions', TTLCache(100, 600)), patch('app.response_cache', TTLCache(100, 600)), \
+            patch('app.session_history', TTLCache(100, 600)), \
+            patch('app.semantic_cache', SemanticCache()), \
+            patch('app.agent_breaker', CircuitBreaker("test-agent", 3, 30)), \
+            patch('app.agent_retry', RetryPolicy(3, sleep=lambda seconds: None)), \
+            patch('app.credentials', loaded_credentials({})):
+        yield
 
 @pytest.fixture
 def client():
@@ -144,4 +173,581 @@ def test_chat_list_message(client):
 
 def test_chat_dict_message(client):
     response = client.post('/chat', json={'message': {}})
-    assert response.status_code == 400
\ No newline at end of file
+    assert response.status_code == 400
+
+class FakeAgentRuntime:
+    """Stands in for bedrock-agent-runtime: yields completion chunks on a timer"""
+
+    def __init__(self, chunks, delay=0.05, fail_after=None):
+        self.chunks = chunks
+        self.delay = delay
+        self.fail_after = fail_after
+        self.calls = []
+
+    def invoke_agent(self, **kwargs):
+        self.calls.append(kwargs)
+        return {'completion': self._events()}
+
+    def _events(self):
+        for i, text in enumerate(self.chunks):
+            if self.fail_after is not None and i == self.fail_after:
+                raise RuntimeError("stream broke")
+            time.sleep(self.delay)
+            yield {'chunk': {'bytes': text.encode()}}
+
+
+def read_sse(response, started):
+    """(event, data, seconds since started) for each event in a streamed response"""
+    events = []
+    buffer = ''
+    for piece in response.response:
+        buffer += piece.decode() if isinstance(piece, bytes) else piece
+        while '\n\n' in buffer:
+            block, buffer = buffer.split('\n\n', 1)
+            fields = dict(line.split(': ', 1) for line in block.split('\n'))
+            events.append((fields['event'], json.loads(fields['data']), time.perf_counter() - started))
+    return events
+
+
+@patch('app.AGENT_ID', 'test-agent')
+@patch('app.AGENT_ALIAS_ID', 'test-alias')
+def test_chat_stream_forwards_chunks_as_they_arrive(client):
+    fake = FakeAgentRuntime(['Hel', 'lo ', 'wor', 'ld!'], delay=0.1)
+    with patch('app.agent_rt', fake):
+        started = time.perf_counter()
+        response = client.post('/chat/stream', json={'message': 'Hi'}, buffered=False)
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        events = read_sse(response, started)
+
+    chunks = [event for event in events if event[0] == 'chunk']
+    assert ''.join(data['text'] for _, data, _ in chunks) == 'Hello world!'
+    # The first chunk reaches the client long before the agent is done
+    assert chunks[0][2] < 0.25
+    assert events[-1][2] >= 0.35
+    assert events[-1][0] == 'done'
+    assert events[-1][1]['chunks'] == 4
+    assert fake.calls[0]['streamingConfigurations'] == {'streamFinalResponse': True}
+
+
+@patch('app.AGENT_ID', 'test-agent')
+@patch('app.AGENT_ALIAS_ID', 'test-alias')
+def test_chat_stream_reports_errors_mid_stream(client):
+    fake = FakeAgentRuntime(['partial ', 'never'], delay=0, fail_after=1)
+    with patch('app.agent_rt', fake):
+        response = client.post('/chat/stream', json={'message': 'Hi'}, buffered=False)
+        events = read_sse(response, time.perf_counter())
+
+    assert [event for event, _, _ in events] == ['chunk', 'error']
+    assert 'stream broke' in events[-1][1]['error']
+
+
+@patch('app.AGENT_ID', 'test-agent')
+@patch('app.AGENT_ALIAS_ID', 'test-alias')
+def test_chat_stream_client_error_before_stream(client):
+    mock_agent = Mock()
+    mock_agent.invoke_agent.side_effect = ClientError(
+        {"Error": {"Code": "ValidationException", "Message": "Invalid"}},
+        "InvokeAgent"
+    )
+    with patch('app.agent_rt', mock_agent), patch('app.time.sleep'):
+        response = client.post('/chat/stream', json={'message': 'Hi'})
+
+    assert response.status_code == 500
+    assert 'ValidationException' in json.loads(response.data)['error']
+
+
+def test_chat_stream_validation(client):
+    assert client.post('/chat/stream', data='not json').status_code == 400
+    assert client.post('/chat/stream', json={'message': '  '}).status_code == 400
+
+
+@patch('app.AGENT_ID', None)
+def test_chat_stream_no_agent(client):
+    response = client.post('/chat/stream', json={'message': 'Hi'})
+    assert response.status_code == 503
+
+
+def test_limiter_queues_then_rejects():
+    limiter = ConcurrencyLimiter(max_concurrent=1, max_queue=1, queue_timeout=5)
+    limiter.acquire()
+
+    waiter = threading.Thread(target=limiter.acquire)
+    waiter.start()
+    while limiter.stats()['queue_depth'] == 0:
+        time.sleep(0.01)
+
+    # One running, one waiting: the next caller is turned away immediately
+    with pytest.raises(Overloaded):
+        limiter.acquire()
+
+    limiter.release()
+    waiter.join(timeout=2)
+    stats = limiter.stats()
+    assert (stats['in_flight'], stats['queue_depth'], stats['rejected']) == (1, 0, 1)
+
+
+def test_limiter_queue_timeout():
+    limiter = ConcurrencyLimiter(max_concurrent=1, max_queue=1, queue_timeout=0.05)
+    limiter.acquire()
+
+    with pytest.raises(Overloaded):
+        limiter.acquire()
+    assert limiter.stats()['timed_out'] == 1
+
+
+@patch('app.AGENT_ID', 'test-agent')
+@patch('app.AGENT_ALIAS_ID', 'test-alias')
+def test_chat_rejected_when_busy_but_health_answers(client):
+    busy = ConcurrencyLimiter(max_concurrent=1, max_queue=0)
+    busy.acquire()
+    with patch('app.chat_limiter', busy):
+        response = client.post('/chat', json={'message': 'Hi'})
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '5'
+        assert client.get('/health').status_code == 200
+
+        metrics = client.get('/metrics').get_data(as_text=True)
+    assert 'chatbot_chat_in_flight{pid=' in metrics
+    assert [line for line in metrics.splitlines() if line.startswith('chatbot_chat_rejected_total')][0].endswith(' 1')
+
+
+@patch('app.agent_rt')
+@patch('app.AGENT_ID', 'test-agent')
+@patch('app.AGENT_ALIAS_ID', 'test-alias')
+def test_chat_releases_slot(mock_agent, client):
+    mock_agent.invoke_agent.return_value = {'completion': [{'chunk': {'bytes': b'Hello!'}}]}
+    limiter = ConcurrencyLimiter(max_concurrent=1, max_queue=0)
+    with patch('app.chat_limiter', limiter):
+        for _ in range(3):
+            assert client.post('/chat', json={'message': 'Hi'}).status_code == 200
+
+    assert limiter.stats()['in_flight'] == 0
+    assert limiter.stats()['completed'] == 3
+
+
+def test_ttl_cache_expires_and_evicts():
+    now = [0.0]
+    cache = TTLCache(maxsize=2, ttl=10, clock=lambda: now[0])
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)  # 'b' is least recently used
+    assert cache.get('b') is None
+    now[0] = 11
+    assert cache.get('a') is None
+    assert cache.stats()['evictions'] == 1
+
+
+def test_ttl_cache_touch_extends_lifetime():
+    now = [0.0]
+    cache = TTLCache(maxsize=10, ttl=10, clock=lambda: now[0])
+    cache.set('session', 'agent-1')
+    now[0] = 8
+    assert cache.get('session', touch=True) == 'agent-1'
+    now[0] = 15
+    assert cache.get('session') == 'agent-1'
+
+
+@patch('app.agent_rt')
+@patch('app.AGENT_ID', 'test-agent')
+@patch('app.AGENT_ALIAS_ID', 'test-alias')
+def test_chat_reuses_agent_session_for_client_session(mock_agent, client):
+    mock_agent.invoke_agent.side_effect = lambda **kwargs: {'completion': [{'chunk': {'bytes': b'Sure.'}}]}
+
+    first = json.loads(client.post('/chat', json={'message': 'Hi', 'session_id': 'browser-1'}).data)
+    client.post('/chat', json={'message': 'And another one?', 'session_id': 'browser-1'})
+    client.post('/chat', json={'message': 'Hello there', 'session_id': 'browser-2'})
+
+    session_ids = [call.kwargs['sessionId'] for call in mock_agent.invoke_agent.call_args_list]
+    assert first['session_id'] == 'browser-1'
+    assert session_ids[0] == session_ids[1]
+    assert session_ids[2] != session_ids[0]
+
+
+@patch('app.agent_rt')
+@patch('app.AGENT_ID', 'test-agent')
+@patch('app.AGENT_ALIAS_ID', 'test-alias')
+def test_chat_without_session_id_returns_one(mock_agent, client):
+    mock_agent.invoke_agent.return_value = {'completion': [{'chunk': {'bytes': b'Hello!'}}]}
+
+    data = json.loads(client.post('/chat', json={'message': 'Hi'}).data)
+
+    assert data['session_id']
+    assert mock_agent.invoke_agent.call_args.kwargs['sessionId'] != data['session_id']
+
+
+def test_chat_rejects_invalid_session_id(client):
+    response = client.post('/chat', json={'message': 'Hi', 'session_id': 'bad id!'})
+    assert response.status_code == 400
+
+
+@patch('app.agent_rt')
+@patch('app.AGENT_ID', 'test-agent')
+@patch('app.AGENT_ALIAS_ID', 'test-alias')
+def test_identical_opening_prompts_served_from_cache(mock_agent, client):
+    mock_agent.invoke_agent.return_value = {'completion': [{'chunk': {'bytes': b'Try Dune and Arrival.'}}]}
+
+    first = json.loads(client.post('/chat', json={'message': 'Recommend me sci-fi movies'}).data)
+    second = json.loads(client.post('/chat', json={'message': '  recommend me   SCI-FI movies? '}).data)
+
+    assert mock_agent.invoke_agent.call_count == 1
+    assert (first['cached'], second['cached']) == (False, True)
+    assert second['response'] == 'Try Dune and Arrival.'
+
+
+@patch('app.agent_rt')
+@patch('app.AGENT_ID', 'test-agent')
+@patch('app.AGENT_ALIAS_ID', 'test-alias')
+def test_follow_ups_are_not_cached(mock_agent, client):
+    mock_agent.invoke_agent.return_value = {'completion': [{'chunk': {'bytes': b'Here you go.'}}]}
+
+    client.post('/chat', json={'message': 'Hi', 'session_id': 'browser-1'})
+    client.post('/chat', json={'message': 'more please', 'session_id': 'browser-1'})
+    data = json.loads(client.post('/chat', json={'message': 'more please', 'session_id': 'browser-1'}).data)
+
+    assert mock_agent.invoke_agent.call_count == 3
+    assert data['cached'] == False
+
+
+@patch('app.AGENT_ID', 'test-agent')
+@patch('app.AGENT_ALIAS_ID', 'test-alias')
+def test_chat_stream_caches_opening_reply(client):
+    fake = FakeAgentRuntime(['Dune ', 'and Arrival.'], delay=0)
+    with patch('app.agent_rt', fake):
+        read_sse(client.post('/chat/stream', json={'message': 'sci-fi please'}, buffered=False), time.perf_counter())
+        events = read_sse(client.post('/chat/stream', json={'message': 'Sci-fi please'}, buffered=False),
+                          time.perf_counter())
+
+    assert len(fake.calls) == 1
+    assert events[0][1] == {'text': 'Dune and Arrival.'}
+    assert events[-1][1]['cached'] == True
+
+
+def test_semantic_cache_matches_paraphrases_only():
+    cache = SemanticCache(threshold=0.9)
+    cache.add('recommend me sci-fi movies', 'Dune, Arrival')
+    cache.add('who directed inception', 'Christopher Nolan')
+
+    assert cache.lookup('can you suggest some good sci-fi films?')[0] == 'Dune, Arrival'
+    assert cache.lookup('who is the director of Inception')[0] == 'Christopher Nolan'
+    assert cache.lookup('recommend me horror movies')[0] is None
+    assert cache.lookup('recommend me sci-fi series')[0] is None
+    assert cache.lookup('who directed interstellar')[0] is None
+
+    stats = cache.stats()
+    assert (stats['lookups'], stats['hits']) == (5, 2)
+    assert sum(stats['latency_counts']) == 5
+
+
+def test_semantic_cache_evicts_least_recently_used():
+    cache = SemanticCache(max_entries=2)
+    cache.add('horror movies', 'Hereditary')
+    cache.add('comedy movies', 'Airplane!')
+    assert cache.lookup('horror films')[0] == 'Hereditary'
+    cache.add('western movies', 'Unforgiven')
+
+    assert len(cache) == 2
+    assert cache.lookup('comedy films')[0] is None
+    assert cache.lookup('horror movie')[0] == 'Hereditary'
+
+
+def test_semantic_cache_expires_entries():
+    now = [0.0]
+    cache = SemanticCache(ttl=10, clock=lambda: now[0])
+    cache.add('horror movies', 'Hereditary')
+    now[0] = 11
+
+    assert cache.lookup('horror movies')[0] is None
+    assert len(cache) == 0
+
+
+@patch('app.agent_rt')
+@patch('app.AGENT_ID', 'test-agent')
+@patch('app.AGENT_ALIAS_ID', 'test-alias')
+def test_paraphrased_prompt_served_from_semantic_cache(mock_agent, client):
+    mock_agent.invoke_agent.return_value = {'completion': [{'chunk': {'bytes': b'Try Dune and Arrival.'}}]}
+
+    client.post('/chat', json={'message': 'Recommend me sci-fi movies'})
+    data = json.loads(client.post('/chat', json={'message': 'Any good sci-fi films you would suggest?'}).data)
+    client.post('/chat', json={'message': 'Recommend me horror movies'})
+
+    assert data['cached'] == True
+    assert data['response'] == 'Try Dune and Arrival.'
+    assert mock_agent.invoke_agent.call_count == 2
+
+    metrics = client.get('/metrics').get_data(as_text=True)
+    assert [line for line in metrics.splitlines()
+            if line.startswith('chatbot_agent_calls_avoided_total')][0].endswith(' 1')
+    assert 'chatbot_semantic_cache_lookup_seconds_bucket{' in metrics
+
+
+@patch('app.AGENT_ID', 'test-agent')
+@patch('app.AGENT_ALIAS_ID', 'test-alias')
+def test_follow_up_after_cached_opener_carries_it_to_the_agent(client):
+    fake = FakeAgentRuntime(['Try Dune and Arrival.'], delay=0)
+    with patch('app.agent_rt', fake):
+        client.post('/chat', json={'message': 'Recommend me sci-fi movies', 'session_id': 'browser-1'})
+        # Exact and semantic cache hits, then a follow-up in each session
+        for session_id, opener in [('browser-2', 'recommend me SCI-FI movies'),
+                                   ('browser-3', 'Any good sci-fi films you would suggest?')]:
+            assert json.loads(client.post('/chat', json={'message': opener, 'session_id': session_id}).data)['cached']
+            client.post('/chat', json={'message': 'Which one is shorter?', 'session_id': session_id})
+        read_sse(client.post('/chat/stream', json={'message': 'recommend me sci-fi movies!', 'session_id': 'browser-4'},
+                             buffered=False), time.perf_counter())
+        read_sse(client.post('/chat/stream', json={'message': 'And newer ones?', 'session_id': 'browser-4'},
+                             buffered=False), time.perf_counter())
+        client.post('/chat', json={'message': 'Thanks', 'session_id': 'browser-2'})
+
+    first, follow_up, semantic_follow_up, stream_follow_up, later = fake.calls
+    assert 'sessionState' not in first
+    assert len({call['sessionId'] for call in fake.calls[:4]}) == 4
+    assert follow_up['sessionState']['conversationHistory']['messages'] == [
+        {'role': 'user', 'content': [{'text': 'recommend me SCI-FI movies'}]},
+        {'role': 'assistant', 'content': [{'text': 'Try Dune and Arrival.'}]},
+    ]
+    assert semantic_follow_up['sessionState']['conversationHistory']['messages'][0]['content'] == [
+        {'text': 'Any good sci-fi films you would suggest?'}]
+    assert stream_follow_up['sessionState']['conversationHistory']['messages'][0]['content'] == [
+        {'text': 'recommend me sci-fi movies!'}]
+    # The agent has the opener now; later turns do not repeat it
+    assert later['sessionId'] == follow_up['sessionId'] and 'sessionState' not in later
+
+
+def throttled():
+    return ClientError({"Error": {"Code": "ThrottlingException", "Message": "Rate exceeded"},
+                        "ResponseMetadata": {"HTTPStatusCode": 429}}, "InvokeAgent")
+
+
+def test_retry_policy_retries_only_retryable_errors():
+    sleeps = []
+    policy = RetryPolicy(3, base_delay=1, max_delay=8, sleep=sleeps.append)
+    calls = Mock(side_effect=[throttled(), throttled(), 'ok'])
+    assert policy.call(calls) == 'ok'
+    assert len(sleeps) == 2
+    # Full jitter: each sleep is somewhere in [0, base * 2**attempt]
+    assert 0 <= sleeps[0] <= 2 and 0 <= sleeps[1] <= 4
+
+    invalid = Mock(side_effect=ClientError({"Error": {"Code": "ValidationException"}}, "InvokeAgent"))
+    with pytest.raises(ClientError):
+        policy.call(invalid)
+    assert invalid.call_count == 1
+
+
+def test_retry_policy_stops_at_deadline():
+    now = [0.0]
+    policy = RetryPolicy(10, base_delay=4, max_delay=4, deadline=5,
+                         sleep=lambda seconds: now.__setitem__(0, now[0] + seconds), clock=lambda: now[0])
+    calls = Mock(side_effect=throttled())
+    with patch('resilience.random.uniform', return_value=4):
+        with pytest.raises(ClientError):
+            policy.call(calls)
+    # Second retry would have ended at 8s, past the 5s budget
+    assert calls.call_count == 2
+
+
+def test_retry_policy_skips_retries_that_could_outlast_the_deadline():
+    now = [0.0]
+
+    def slow_timeout():
+        now[0] += 100
+        raise ReadTimeoutError(endpoint_url="https://bedrock")
+
+    policy = RetryPolicy(3, base_delay=0.5, max_delay=8, deadline=120, attempt_timeout=110,
+                         sleep=lambda seconds: now.__setitem__(0, now[0] + seconds), clock=lambda: now[0])
+    calls = Mock(side_effect=slow_timeout)
+    with pytest.raises(ReadTimeoutError):
+        policy.call(calls)
+    # 20s left cannot hold another 110s attempt
+    assert calls.call_count == 1
+
+    now[0] = 0.0
+    calls = Mock(side_effect=[throttled(), 'ok'])
+    assert policy.call(calls) == 'ok'
+
+
+def test_slow_agent_attempt_ends_at_the_deadline():
+    # An endpoint that accepts the request and never answers
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(8)
+    accepted = []
+    threading.Thread(target=lambda: accepted.append(server.accept()), daemon=True).start()
+
+    deadline = 1.0
+    config = app_module.client_config(deadline)
+    agent = boto3.client("bedrock-agent-runtime", region_name="us-east-1", config=config,
+                         endpoint_url=f"http://127.0.0.1:{server.getsockname()[1]}",
+                         aws_access_key_id="test", aws_secret_access_key="test")
+    policy = RetryPolicy(3, deadline=deadline, attempt_timeout=config.connect_timeout + config.read_timeout)
+    started = time.monotonic()
+    try:
+        with pytest.raises(ReadTimeoutError):
+            call_with_resilience(agent.invoke_agent, policy, CircuitBreaker("test-agent", 3, 30),
+                                 agentId="a", agentAliasId="b", sessionId="s1", inputText="Hi")
+        assert time.monotonic() - started < deadline + 0.5
+        assert len(accepted) == 1
+    finally:
+        server.close()
+        for conn, _ in accepted:
+            conn.close()
+
+
+def test_circuit_breaker_opens_and_recovers():
+    now = [0.0]
+    breaker = CircuitBreaker("agent", failure_threshold=2, recovery_timeout=30, clock=lambda: now[0])
+    failing = Mock(side_effect=throttled())
+    for _ in range(2):
+        with pytest.raises(ClientError):
+            breaker.call(failing)
+    assert breaker.state == breaker.OPEN
+
+    with pytest.raises(CircuitOpenError) as excinfo:
+        breaker.call(failing)
+    assert failing.call_count == 2
+    assert excinfo.value.retry_after == 30
+
+    now[0] = 31
+    assert breaker.call(lambda: 'ok') == 'ok'
+    assert breaker.state == breaker.CLOSED
+
+
+def test_circuit_breaker_ignores_client_mistakes():
+    breaker = CircuitBreaker("agent", failure_threshold=1)
+    with pytest.raises(ClientError):
+        breaker.call(Mock(side_effect=ClientError({"Error": {"Code": "ValidationException"}}, "InvokeAgent")))
+    assert breaker.state == breaker.CLOSED
+
+
+@patch('app.agent_rt')
+@patch('app.AGENT_ID', 'test-agent')
+@patch('app.AGENT_ALIAS_ID', 'test-alias')
+def test_chat_fails_fast_while_agent_circuit_is_open(mock_agent, client):
+    mock_agent.invoke_agent.side_effect = throttled()
+
+    # 3 attempts trip the test breaker (threshold 3)
+    assert client.post('/chat', json={'message': 'Hi'}).status_code == 500
+    assert mock_agent.invoke_agent.call_count == 3
+
+    response = client.post('/chat', json={'message': 'Hi again'})
+    assert response.status_code == 503
+    assert int(response.headers['Retry-After']) > 0
+    stream = client.post('/chat/stream', json={'message': 'Hi again'})
+    assert stream.status_code == 503
+    assert mock_agent.invoke_agent.call_count == 3
+
+    metrics = client.get('/metrics').get_data(as_text=True)
+    assert [line for line in metrics.splitlines()
+            if line.startswith('chatbot_agent_circuit_open')][0].endswith(' 1')
+
+
+def test_json_log_lines_carry_extra_fields():
+    import io, logging
+    from logging_setup import JsonFormatter
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(JsonFormatter("chatbot"))
+    logger = logging.getLogger("test.json")
+    logger.addHandler(handler)
+    logger.propagate = False
+    try:
+        logger.warning("chat answered in %d ms", 12, extra={"session_id": "abc", "cached": True})
+    finally:
+        logger.removeHandler(handler)
+
+    entry = json.loads(stream.getvalue())
+    assert entry["msg"] == "chat answered in 12 ms"
+    assert entry["service"] == "chatbot"
+    assert entry["level"] == "WARNING"
+    assert entry["session_id"] == "abc" and entry["cached"] is True
+
+
+def test_queue_handler_samples_and_never_blocks():
+    import logging, queue
+    from logging_setup import DroppingQueueHandler, SamplingFilter
+    handler = DroppingQueueHandler(queue.Queue(2))
+    handler.addFilter(SamplingFilter(0.0))
+    logger = logging.getLogger("test.queue")
+    logger.addHandler(handler)
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    try:
+        for i in range(10):
+            logger.info("sampled away %d", i)
+        logger.error("kept %s", {"a": 1})
+        logger.error("kept too")
+        logger.error("dropped, queue full")
+    finally:
+        logger.removeHandler(handler)
+
+    records = [handler.queue.get_nowait() for _ in range(2)]
+    assert [r.msg for r in records] == ["kept {'a': 1}", "kept too"]
+    assert records[0].args is None
+    assert handler.dropped == 1
+
+
+@patch('app.agent_rt')
+@patch('app.AGENT_ID', 'test-agent')
+@patch('app.AGENT_ALIAS_ID', 'test-alias')
+def test_chat_logs_one_info_line_without_texts(mock_agent, client, caplog):
+    mock_agent.invoke_agent.return_value = {'completion': [{'chunk': {'bytes': b'Watch Arrival.'}}]}
+    with caplog.at_level('INFO', logger='app'):
+        client.post('/chat', json={'message': 'secret plans'})
+
+    records = [r for r in caplog.records if r.name == 'app']
+    assert [r.getMessage().split(' in ')[0] for r in records] == ['chat answered']
+    assert records[0].reply_chars == len('Watch Arrival.')
+    assert 'secret plans' not in caplog.text
+
+
+def test_secret_provider_loads_lazily_and_refreshes_in_background():
+    now = [0.0]
+    client = Mock()
+    client.get_secret_value.return_value = {"SecretString": json.dumps({"KEY": "v1"})}
+    provider = SecretProvider("s", ttl=60, file_path="", client=client, clock=lambda: now[0])
+    assert client.get_secret_value.call_count == 0
+
+    assert provider.get() == {"KEY": "v1"}
+    assert provider.get() == {"KEY": "v1"}
+    assert client.get_secret_value.call_count == 1
+
+    release = threading.Event()
+    def slow_fetch(**kwargs):
+        release.wait(5)
+        return {"SecretString": json.dumps({"KEY": "v2"})}
+    client.get_secret_value.side_effect = slow_fetch
+    now[0] = 61
+    # Stale value is served at once while the refresh runs in the background
+    assert provider.get() == {"KEY": "v1"}
+    release.set()
+    for _ in range(200):
+        if provider.loads == 2:
+            break
+        time.sleep(0.005)
+    assert provider.get() == {"KEY": "v2"}
+
+
+def test_secret_provider_falls_back_to_env_and_file(tmp_path, monkeypatch):
+    client = Mock()
+    client.get_secret_value.side_effect = ClientError({"Error": {"Code": "AccessDeniedException"}}, "GetSecretValue")
+    monkeypatch.setenv("BEDROCK_AGENT_ID", "env-agent")
+    provider = SecretProvider("s", file_path="", client=client, env_keys=("BEDROCK_AGENT_ID", "MISSING"))
+    assert provider.get() == {"BEDROCK_AGENT_ID": "env-agent"}
+    assert provider.source == "env" and provider.failures == 1
+
+    secrets_file = tmp_path / "secrets.json"
+    secrets_file.write_text(json.dumps({"BEDROCK_AGENT_ID": "file-agent"}))
+    provider = SecretProvider("s", file_path=str(secrets_file), client=client)
+    assert provider.get() == {"BEDROCK_AGENT_ID": "file-agent"}
+    assert provider.source == "file"
+
+
+def test_agent_ids_load_on_first_health_probe(client):
+    import app as app_module
+    provider = SecretProvider("s", file_path="", client=mock_secretsmanager)
+    provider.subscribe(app_module.load_credentials)
+    with patch('app.credentials', provider), patch('app.AGENT_ID', None), patch('app.AGENT_ALIAS_ID', None):
+        data = json.loads(client.get('/health').data)
+
+    assert data['status'] == 'healthy'
+    assert data['alias_id'] == 'test-alias'
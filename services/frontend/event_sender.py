@@ -0,0 +1,332 @@
+"""
+Background delivery of analytics events to kinesis-producer.
+
+send() only appends to a bounded in-memory queue; a daemon thread drains
+it in micro-batches (up to batch_size events or flush_interval seconds) to
+POST /produce/batch. When the producer is unreachable the batch is appended
+to a local JSON-lines spill file and delivery pauses with a growing
+backoff; once a batch goes through again the spill file is replayed. Events
+are only dropped when the queue or the spill file is full, and every
+outcome is counted (see stats()).
+
+Events the producer would refuse (no partition key, event type or data)
+are refused by send() already. If the producer still answers a batch with
+a 4xx, the batch is split until the bad events are found; those are
+counted as rejected and never retried.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# kinesis-producer's limit for one /produce/batch request
+MAX_BATCH_RECORDS = 500
+# 4xx answers that are worth retrying; any other 4xx means the events are invalid
+RETRYABLE_CLIENT_ERRORS = (408, 429)
+
+
+class RejectedBatch(Exception):
+    """The producer refused a batch as invalid; sending it again cannot help"""
+
+    def __init__(self, status: int):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
+def is_rejection(status: int) -> bool:
+    return 400 <= status < 500 and status != 404 and status not in RETRYABLE_CLIENT_ERRORS
+
+
+def is_valid_event(event: Any) -> bool:
+    """Whether kinesis-producer accepts the event (partitionKey, event_type and data object)"""
+    return (isinstance(event, dict) and isinstance(event.get('partitionKey'), str) and bool(event['partitionKey'])
+            and isinstance(event.get('event_type'), str) and bool(event['event_type'])
+            and isinstance(event.get('data'), dict))
+
+
+class EventSender:
+    def __init__(self, url: str, stream_name: str, region: str, session: Optional[requests.Session] = None,
+                 max_queue: int = 10000, batch_size: int = 100, flush_interval: float = 0.5,
+                 spill_path: Optional[str] = None, spill_max_bytes: int = 50 * 1024 * 1024,
+                 timeout: float = 5.0, max_backoff: float = 60.0):
+        self.url = url.rstrip('/')
+        self.stream_name = stream_name
+        self.region = region
+        self.session = session or requests.Session()
+        self.batch_size = max(1, min(batch_size, MAX_BATCH_RECORDS))
+        self.flush_interval = flush_interval
+        self.spill_path = spill_path
+        self.spill_max_bytes = spill_max_bytes
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopping = threading.Event()
+        self._failures = 0
+        self._retry_at = 0.0
+        self._batch_endpoint = True
+
+        self.enqueued = 0
+        self.sent = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.failed_batches = 0
+
+    def send(self, partition_key: str, event_type: str, data: Dict[str, Any]) -> bool:
+        """Queue one event; False if it is invalid or the queue is full (the event is dropped)"""
+        event = {'partitionKey': partition_key, 'event_type': event_type, 'data': data}
+        if not is_valid_event(event):
+            logger.warning("Refusing invalid analytics event %r for %r", event_type, partition_key)
+            with self._lock:
+                self.rejected += 1
+            return False
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.enqueued += 1
+        return True
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until every queued event has been sent or spilled"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self, timeout: float = 2.0) -> None:
+        """Stop the worker; what it could not send in time is spilled for the next start"""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        pending = self._drain(self._queue.qsize())
+        if pending:
+            self._spill(pending)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'queued': self._queue.qsize(),
+                'enqueued': self.enqueued,
+                'sent': self.sent,
+                'spilled': self.spilled,
+                'replayed': self.replayed,
+                'dropped': self.dropped,
+                'rejected': self.rejected,
+                'failed_batches': self.failed_batches,
+                'spill_bytes': self._spill_size(),
+            }
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='event-sender', daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self._replay_spill()
+                continue
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._deliver(batch)
+            except Exception:
+                logger.exception("Delivering %d analytics events failed", len(batch))
+                self._spill(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _drain(self, limit: int) -> List[Dict[str, Any]]:
+        events = []
+        for _ in range(limit):
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+            self._queue.task_done()
+        return events
+
+    def _deliver(self, batch: List[Dict[str, Any]]) -> None:
+        """Send a batch, or spill it while the producer is backing off"""
+        if time.monotonic() < self._retry_at:
+            self._spill(batch)
+            return
+        if self._send_batch(batch):
+            self._failures = 0
+            self._replay_spill()
+
+    def _send_batch(self, batch: List[Dict[str, Any]], replay: bool = False) -> bool:
+        """Post a batch and account for every event in it; False if the producer could not be reached"""
+        try:
+            result = self._post(batch)
+        except RejectedBatch as e:
+            if len(batch) == 1:
+                logger.warning("kinesis-producer rejected an analytics event (%s), dropping it", e)
+                with self._lock:
+                    self.rejected += 1
+                return True
+            # Split to find the bad events; the good ones still go out
+            middle = len(batch) // 2
+            if not self._send_batch(batch[:middle], replay):
+                self._spill(batch[middle:])
+                return False
+            return self._send_batch(batch[middle:], replay)
+        if result is None:
+            self._backoff()
+            self._spill(batch)
+            return False
+        failed, rejected = result
+        delivered = len(batch) - len(failed) - rejected
+        with self._lock:
+            self.sent += delivered
+            self.rejected += rejected
+            if replay:
+                self.replayed += delivered
+        # Throttled by Kinesis: keep them for the next replay
+        self._spill([batch[i] for i in failed])
+        return True
+
+    def _post(self, batch: List[Dict[str, Any]]) -> Optional[Tuple[List[int], int]]:
+        """(indexes of events to retry, number of events refused), or None if the producer could
+        not be reached. Raises RejectedBatch when the producer refuses the batch as invalid."""
+        try:
+            if self._batch_endpoint:
+                response = self.session.post(f"{self.url}/produce/batch", json={
+                    'streamName': self.stream_name, 'region': self.region, 'records': batch
+                }, timeout=self.timeout)
+                if response.status_code != 404:
+                    if is_rejection(response.status_code):
+                        raise RejectedBatch(response.status_code)
+                    if response.status_code != 200:
+                        return None
+                    return [i for i in response.json().get('failed', []) if 0 <= i < len(batch)], 0
+                # Producer without the batch endpoint: one request per event
+                logger.warning("kinesis-producer has no /produce/batch, sending events one by one")
+                self._batch_endpoint = False
+            failed = []
+            rejected = 0
+            for i, event in enumerate(batch):
+                response = self.session.post(f"{self.url}/produce", json={
+                    'streamName': self.stream_name, 'region': self.region, **event
+                }, timeout=self.timeout)
+                if is_rejection(response.status_code):
+                    logger.warning("kinesis-producer rejected an analytics event (HTTP %d), dropping it",
+                                   response.status_code)
+                    rejected += 1
+                elif response.status_code != 200:
+                    failed.append(i)
+            return None if failed and len(failed) == len(batch) else (failed, rejected)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.warning("kinesis-producer unavailable: %s", e)
+            return None
+
+    def _backoff(self) -> None:
+        self._failures += 1
+        delay = min(self.max_backoff, 0.5 * 2 ** self._failures)
+        self._retry_at = time.monotonic() + delay
+        with self._lock:
+            self.failed_batches += 1
+
+    def _spill(self, events: List[Dict[str, Any]]) -> None:
+        if not events:
+            return
+        if not self.spill_path:
+            with self._lock:
+                self.dropped += len(events)
+            return
+        lines = ''.join(json.dumps(event) + '\n' for event in events)
+        try:
+            if self._spill_size() + len(lines) > self.spill_max_bytes:
+                raise OSError("spill file is full")
+            with open(self.spill_path, 'a', encoding='utf-8') as f:
+                f.write(lines)
+        except OSError as e:
+            logger.warning("Dropping %d analytics events: %s", len(events), e)
+            with self._lock:
+                self.dropped += len(events)
+            return
+        with self._lock:
+            self.spilled += len(events)
+
+    def _spill_size(self) -> int:
+        try:
+            return os.path.getsize(self.spill_path) if self.spill_path else 0
+        except OSError:
+            return 0
+
+    def _replay_spill(self) -> None:
+        """Send spilled events again, once the producer is reachable"""
+        if not self.spill_path or time.monotonic() < self._retry_at:
+            return
+        replaying = f"{self.spill_path}.replay"
+        # A .replay file left by an interrupted replay goes first
+        if not os.path.exists(replaying) and not self._spill_size():
+            return
+        events = []
+        bad_lines = 0
+        try:
+            if not os.path.exists(replaying):
+                # New spills go to a fresh file while this one is replayed
+                os.replace(self.spill_path, replaying)
+            with open(replaying, encoding='utf-8', errors='replace') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        event = None
+                    if is_valid_event(event):
+                        events.append(event)
+                    else:
+                        bad_lines += 1
+            os.remove(replaying)
+        except OSError as e:
+            logger.warning("Could not read the analytics spill file: %s", e)
+            return
+        if bad_lines:
+            logger.warning("Skipped %d unreadable lines of the analytics spill file", bad_lines)
+        with self._lock:
+            # The file may hold events spilled before this process started
+            self.spilled = max(0, self.spilled - len(events) - bad_lines)
+            self.dropped += bad_lines
+        for start in range(0, len(events), self.batch_size):
+            batch = events[start:start + self.batch_size]
+            if time.monotonic() < self._retry_at:
+                self._spill(batch)
+                continue
+            self._send_batch(batch, replay=True)
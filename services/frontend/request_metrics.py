@@ -0,0 +1,153 @@
+"""
+Latency histograms of the frontend's backend calls, by service and route
+template, exported as OpenMetrics text.
+
+Percentiles are estimated from the histogram buckets the same way
+Prometheus' histogram_quantile does, so the diagnostics page and a
+dashboard built on the scraped metrics agree.
+"""
+import bisect
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Seconds; the last bucket is +Inf. Narrow around 50-300 ms, where most
+# backend calls land, so p95/p99 are estimated within a few tens of ms
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.5, 5.0, 10.0)
+OPENMETRICS_CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+_IMDB_ID = re.compile(r'^tt\d+$')
+_NUMBER = re.compile(r'^\d+$')
+
+
+def route_template(url: str) -> str:
+    """URL path with the variable parts replaced, e.g. /api/movies/id/{imdb_id}
+
+    The query string is dropped. A segment after {email} is a title (as in
+    /api/favorites/movies/{email}/{title}) unless it is a fixed word like page.
+    """
+    parts = []
+    for segment in urlsplit(url).path.split('/'):
+        if '@' in segment or '%40' in segment:
+            segment = '{email}'
+        elif _IMDB_ID.match(segment):
+            segment = '{imdb_id}'
+        elif _NUMBER.match(segment):
+            segment = '{id}'
+        elif parts and parts[-1] == '{email}' and segment not in ('page',):
+            segment = '{title}'
+        parts.append(segment)
+    return '/'.join(parts) or '/'
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class _Histogram:
+    __slots__ = ('buckets', 'count', 'sum')
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+
+class RequestMetrics:
+    """Process-wide latency histograms and status counts per (service, method, route)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, str, str], _Histogram] = {}
+        self._statuses: Dict[Tuple[str, str, str, str], int] = {}
+
+    def observe(self, service: str, method: str, route: str, status: str, seconds: float) -> None:
+        key = (service, method, route)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram()
+            histogram.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+            histogram.count += 1
+            histogram.sum += seconds
+            self._statuses[key + (status,)] = self._statuses.get(key + (status,), 0) + 1
+
+    @staticmethod
+    def _quantile(q: float, buckets: List[int], count: int) -> Optional[float]:
+        if not count:
+            return None
+        rank = q * count
+        cumulative = 0
+        for i, n in enumerate(buckets):
+            if cumulative + n >= rank and n:
+                if i == len(BUCKETS):
+                    # Beyond the last finite bucket: its bound is all we know
+                    return BUCKETS[-1]
+                lower = BUCKETS[i - 1] if i else 0.0
+                return lower + (BUCKETS[i] - lower) * (rank - cumulative) / n
+            cumulative += n
+        return BUCKETS[-1]
+
+    def report(self) -> List[Dict[str, object]]:
+        """One row per route: calls, errors, mean and p50/p95/p99 in milliseconds"""
+        with self._lock:
+            histograms = {key: (list(h.buckets), h.count, h.sum) for key, h in self._histograms.items()}
+            statuses = dict(self._statuses)
+        rows = []
+        for (service, method, route), (buckets, count, total) in sorted(histograms.items()):
+            errors = sum(n for (s, m, r, status), n in statuses.items()
+                         if (s, m, r) == (service, method, route) and not status.startswith(('2', '3')))
+            row = {'service': service, 'method': method, 'route': route, 'calls': count, 'errors': errors,
+                   'mean ms': round(total / count * 1000, 1)}
+            for name, q in (('p50 ms', 0.5), ('p95 ms', 0.95), ('p99 ms', 0.99)):
+                row[name] = round(self._quantile(q, buckets, count) * 1000, 1)
+            rows.append(row)
+        return rows
+
+    def openmetrics(self) -> str:
+        with self._lock:
+            histograms = {key: (list(h.buckets), h.count, h.sum) for key, h in self._histograms.items()}
+            statuses = dict(self._statuses)
+        name = 'frontend_backend_request_duration_seconds'
+        lines = [f'# TYPE {name} histogram', f'# UNIT {name} seconds',
+                 f'# HELP {name} Duration of calls from the frontend to backend services.']
+        for (service, method, route), (buckets, count, total) in sorted(histograms.items()):
+            labels = f'service="{_escape(service)}",method="{method}",route="{_escape(route)}"'
+            cumulative = 0
+            for bound, n in zip([*BUCKETS, '+Inf'], buckets):
+                cumulative += n
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_count{{{labels}}} {count}')
+            lines.append(f'{name}_sum{{{labels}}} {total:.6f}')
+        name = 'frontend_backend_requests'
+        lines += [f'# TYPE {name} counter', f'# HELP {name} Calls from the frontend to backend services by status.']
+        for (service, method, route, status), n in sorted(statuses.items()):
+            lines.append(f'{name}_total{{service="{_escape(service)}",method="{method}",'
+                         f'route="{_escape(route)}",status="{status}"}} {n}')
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+
+def serve_metrics(metrics: RequestMetrics, port: int, host: str = '0.0.0.0') -> ThreadingHTTPServer:
+    """Serve metrics.openmetrics() at GET /metrics on port from a daemon thread"""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = metrics.openmetrics().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', OPENMETRICS_CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    return server
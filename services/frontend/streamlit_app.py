@@ -1,8 +1,32 @@
 import streamlit as st
 import requests
+import inspect
 import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import Counter
+from collections import OrderedDict
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional, Dict, Any
+from http.cookiejar import DefaultCookiePolicy
+from functools import wraps
+from typing import Optional, Dict, Any, Callable, Iterator, Tuple, Hashable, List
+from urllib.parse import quote, urlencode, urlsplit
+from requests.adapters import HTTPAdapter
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+try:
+    from streamlit.runtime.scriptrunner_utils.script_run_context import SCRIPT_RUN_CONTEXT_ATTR_NAME
+except ImportError:  # Streamlit < 1.39
+    from streamlit.runtime.scriptrunner.script_run_context import SCRIPT_RUN_CONTEXT_ATTR_NAME
+
+from event_sender import EventSender
+from request_metrics import RequestMetrics, route_template, serve_metrics
+
+logger = logging.getLogger(__name__)
 
 st.set_page_config(
     page_title="Movie & Series Recommendation App",
@@ -110,27 +134,251 @@ API_URLS = {
     'search': 'http://search.services.svc.cluster.local:8084',
     'chatbot': 'http://chatbot.ai.svc.cluster.local:8091',
     'personalize': 'http://personalize.recommendation.svc.cluster.local:8000',
-    'kinesis': 'http://kinesis-producer.streaming.svc.cluster.local:3000'
+    'kinesis': 'http://kinesis-producer.streaming.svc.cluster.local:3000',
+    'posters': 'http://poster-proxy.services.svc.cluster.local:8093'
+}
+
+# Proxies in front of Streamlit that append to X-Forwarded-For (the ALB). The
+# browser's address is the entry the outermost one appended; it is forwarded
+# to the authentication service, whose per-IP rate limit would otherwise see
+# every user as this pod
+FORWARDED_PROXY_HOPS = int(os.getenv('FORWARDED_PROXY_HOPS', '1'))
+
+def browser_ip() -> Optional[str]:
+    """Address of the browser behind this session, None when Streamlit cannot tell"""
+    context = getattr(st, 'context', None)  # Streamlit >= 1.37
+    if context is None:
+        return None
+    try:
+        forwarded = context.headers.get('X-Forwarded-For')
+        if forwarded and FORWARDED_PROXY_HOPS > 0:
+            hops = [hop.strip() for hop in forwarded.split(',') if hop.strip()]
+            if len(hops) >= FORWARDED_PROXY_HOPS:
+                return hops[-FORWARDED_PROXY_HOPS]
+        return getattr(context, 'ip_address', None)
+    except Exception:
+        # No script run context (e.g. a background thread)
+        return None
+
+# Kept-alive connections per service host; at least CONCURRENT_REQUESTS so
+# a gather() never waits for a connection
+HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '16'))
+# Independent calls issued at once by APIClient.gather
+CONCURRENT_REQUESTS = int(os.getenv('CONCURRENT_REQUESTS', '8'))
+
+# Every backend call is timed: into this browser session's ring buffer
+# (the diagnostics page's waterfall) and into process-wide histograms,
+# served as OpenMetrics at :METRICS_PORT/metrics (0 disables the server)
+REQUEST_TIMINGS_PER_SESSION = int(os.getenv('REQUEST_TIMINGS_PER_SESSION', '500'))
+METRICS_PORT = int(os.getenv('METRICS_PORT', '9464'))
+SERVICE_BY_HOST = {urlsplit(url).netloc: name for name, url in API_URLS.items()}
+
+@st.cache_resource
+def get_request_metrics() -> RequestMetrics:
+    metrics = RequestMetrics()
+    if METRICS_PORT:
+        try:
+            serve_metrics(metrics, METRICS_PORT)
+        except OSError as e:
+            logger.warning("Request metrics not served on port %d: %s", METRICS_PORT, e)
+    return metrics
+
+def start_page_timing(page: str) -> None:
+    """Start a page run; the calls it makes (prefetches too) form its waterfall"""
+    previous = st.session_state.get('_timing_run')
+    st.session_state['_timing_run'] = {'id': previous['id'] + 1 if previous else 1, 'page': page,
+                                       'started': time.perf_counter()}
+
+def record_timing(run: Optional[Dict[str, Any]], method: str, url: str, status: str,
+                  started: float, seconds: float) -> None:
+    service = SERVICE_BY_HOST.get(urlsplit(url).netloc, urlsplit(url).netloc)
+    route = route_template(url)
+    get_request_metrics().observe(service, method, route, status, seconds)
+    if run is not None:
+        timings = st.session_state.setdefault('request_timings', deque(maxlen=REQUEST_TIMINGS_PER_SESSION))
+        timings.append({'run': run['id'], 'page': run['page'], 'service': service, 'method': method,
+                        'route': route, 'status': status, 'start': started - run['started'], 'duration': seconds})
+
+class TimedSession(requests.Session):
+    """Session that records every call's service, route template, status and duration"""
+
+    def send(self, request, **kwargs):
+        # Threads without a script run (the analytics sender) only count
+        # towards the histograms
+        run = st.session_state.get('_timing_run') if get_script_run_ctx(suppress_warning=True) else None
+        started = time.perf_counter()
+        status = 'error'
+        try:
+            response = super().send(request, **kwargs)
+            status = str(response.status_code)
+            return response
+        finally:
+            record_timing(run, request.method, request.url, status, started, time.perf_counter() - started)
+
+@st.cache_resource
+def get_http_session() -> requests.Session:
+    """One pooled session shared by every browser session (Streamlit reruns keep it)"""
+    session = TimedSession()
+    adapter = HTTPAdapter(pool_connections=len(API_URLS), pool_maxsize=HTTP_POOL_MAXSIZE)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    # Shared by all users, so never keep cookies between requests
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    return session
+
+@st.cache_resource
+def get_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=CONCURRENT_REQUESTS, thread_name_prefix='api')
+
+# Analytics events are queued and sent in batches by a background thread;
+# while kinesis-producer is down they are spilled to ANALYTICS_SPILL_PATH
+ANALYTICS_STREAM = os.getenv('ANALYTICS_STREAM', 'onur-master-events-stream')
+ANALYTICS_REGION = os.getenv('ANALYTICS_REGION', 'us-east-1')
+
+@st.cache_resource
+def get_event_sender() -> EventSender:
+    return EventSender(
+        API_URLS['kinesis'], ANALYTICS_STREAM, ANALYTICS_REGION, session=get_http_session(),
+        max_queue=int(os.getenv('ANALYTICS_QUEUE_SIZE', '10000')),
+        batch_size=int(os.getenv('ANALYTICS_BATCH_SIZE', '100')),
+        flush_interval=float(os.getenv('ANALYTICS_FLUSH_SECONDS', '0.5')),
+        spill_path=os.getenv('ANALYTICS_SPILL_PATH', '/tmp/analytics-spill.jsonl') or None,
+        spill_max_bytes=int(os.getenv('ANALYTICS_SPILL_MAX_BYTES', str(50 * 1024 * 1024))),
+    )
+
+# Bulk item lookups keep the last response per URL and revalidate it with
+# If-None-Match, so an unchanged favorites list costs a bodiless 304
+ETAG_STORE_MAX_ENTRIES = int(os.getenv('ETAG_STORE_MAX_ENTRIES', '1000'))
+# The catalog services answer at most this many IDs per bulk request
+BULK_IDS_PER_REQUEST = 100
+# Favorites shown per page of the movies and series grids
+FAVORITES_PAGE_SIZE = int(os.getenv('FAVORITES_PAGE_SIZE', '12'))
+
+@st.cache_resource
+def get_etag_store() -> Dict[str, Any]:
+    return {'lock': threading.Lock(), 'responses': OrderedDict()}
+
+# How long successful lookups are reused, per class of data. The Glue ETL
+# rewrites and deletes items, so item metadata is kept for minutes; a user's
+# favorites and recommendations are also dropped whenever that user adds a
+# favorite.
+CACHE_TTLS = {
+    'item': int(os.getenv('ITEM_CACHE_TTL_SECONDS', '300')),
+    'favorites': int(os.getenv('FAVORITES_CACHE_TTL_SECONDS', '30')),
+    'recommendations': int(os.getenv('RECOMMENDATIONS_CACHE_TTL_SECONDS', '120')),
+    'posters': int(os.getenv('POSTER_CACHE_TTL_SECONDS', '86400')),
 }
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', '5000'))
+# Users whose cache generation is remembered. A forgotten user goes back to
+# generation 0, whose entries are long expired unless this many users added
+# favorites within one favorites/recommendations TTL.
+USER_GENERATIONS_MAX_ENTRIES = int(os.getenv('USER_GENERATIONS_MAX_ENTRIES', '100000'))
+# Emails allowed to clear every cache from the diagnostics page
+DIAGNOSTICS_ADMINS = frozenset(email.strip().lower() for email in
+                               os.getenv('DIAGNOSTICS_ADMINS', '').split(',') if email.strip())
+
+@st.cache_resource
+def get_cache_stats() -> Dict[str, Any]:
+    """Lookups and misses per data class, for every session of this process"""
+    return {'lock': threading.Lock(), 'calls': Counter(), 'misses': Counter(), 'cleared': Counter()}
+
+def _count(kind: str, data_class: str) -> None:
+    stats = get_cache_stats()
+    with stats['lock']:
+        stats[kind][data_class] += 1
+
+@st.cache_resource
+def get_user_generations() -> Dict[str, Any]:
+    """Cache generation per user email, for every session of this process"""
+    return {'lock': threading.Lock(), 'generations': OrderedDict()}
+
+def user_generation(email: str) -> int:
+    store = get_user_generations()
+    with store['lock']:
+        return store['generations'].get(email, 0)
+
+def invalidate_user(email: str) -> None:
+    """Orphan email's cached user-scoped lookups; other users' entries stay"""
+    store = get_user_generations()
+    with store['lock']:
+        generations = store['generations']
+        generations[email] = generations.get(email, 0) + 1
+        generations.move_to_end(email)
+        while len(generations) > USER_GENERATIONS_MAX_ENTRIES:
+            generations.popitem(last=False)
+
+class _Uncached(Exception):
+    """Carries a failed result out of a cached function so it is not cached"""
+
+    def __init__(self, result: Dict[str, Any]):
+        super().__init__(result.get('message'))
+        self.result = result
+
+def cached_lookup(data_class: str, user_scoped: bool = False) -> Callable:
+    """Cache successful results of an API lookup for CACHE_TTLS[data_class]
+
+    A user_scoped lookup has an email parameter; its entries are also keyed
+    by that user's cache generation, so invalidate_user(email) drops them.
+    """
+    def decorator(fn):
+        email_index = list(inspect.signature(fn).parameters).index('email') if user_scoped else None
+
+        @st.cache_data(ttl=CACHE_TTLS[data_class], max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+        def cached(generation, *args):
+            # Only runs on a miss
+            _count('misses', data_class)
+            result = fn(*args)
+            if not result.get('success'):
+                raise _Uncached(result)
+            return result
+
+        @wraps(fn)
+        def wrapper(*args):
+            _count('calls', data_class)
+            generation = user_generation(args[email_index]) if user_scoped else 0
+            try:
+                return cached(generation, *args)
+            except _Uncached as e:
+                return e.result
+
+        wrapper.data_class = data_class
+        wrapper.clear = cached.clear
+        return wrapper
+    return decorator
+
+def cache_report() -> list:
+    """One row per data class: calls, hits, misses, hit rate, TTL
+
+    The 'bulk' row is the ETag-revalidated bulk item lookups; a hit there
+    is a 304 from the catalog service.
+    """
+    stats = get_cache_stats()
+    with stats['lock']:
+        rows = []
+        for data_class, ttl in [*CACHE_TTLS.items(), ('bulk', None)]:
+            calls, misses = stats['calls'][data_class], stats['misses'][data_class]
+            rows.append({
+                'data': data_class,
+                'calls': calls,
+                'hits': calls - misses,
+                'misses': misses,
+                'hit rate': f"{(calls - misses) / calls:.0%}" if calls else '-',
+                'ttl (s)': ttl,
+                'invalidations': stats['cleared'][data_class],
+            })
+    return rows
 
 class APIClient:
     @staticmethod
     def send_kinesis_event(event_type: str, user_id: str, data: Dict) -> None:
-        """Send event to Kinesis - fire and forget"""
+        """Queue an event for Kinesis - fire and forget, never blocks the page"""
         try:
-            event_data = {
-                "streamName": "onur-master-events-stream",
-                "partitionKey": user_id,
-                "region": "us-east-1",
-                "event_type": event_type,
-                "data": {
-                    "user_id": user_id,
-                    "time": datetime.now().isoformat(),
-                    **data
-                }
-            }
-            requests.post(f"{API_URLS['kinesis']}/produce", json=event_data, timeout=5)
-        except:
+            get_event_sender().send(user_id, event_type, {
+                "user_id": user_id,
+                "time": datetime.now().isoformat(),
+                **data
+            })
+        except Exception:
             pass  # Silent fail for analytics
 
     @staticmethod
@@ -142,12 +390,17 @@ class APIClient:
             
             if 'token' in st.session_state:
                 headers['Authorization'] = f'Bearer {st.session_state.token}'
+
+            if url.startswith(API_URLS['auth']):
+                client_address = browser_ip()
+                if client_address:
+                    headers['X-Forwarded-For'] = client_address
             
             response = None
             if method.upper() == 'POST':
-                response = requests.post(url, json=data, headers=headers, timeout=10)
+                response = get_http_session().post(url, json=data, headers=headers, timeout=10)
             elif method.upper() == 'GET':
-                response = requests.get(url, headers=headers, timeout=10)
+                response = get_http_session().get(url, headers=headers, timeout=10)
             
             if response.status_code in [200, 201]:
                 try:
@@ -160,16 +413,159 @@ class APIClient:
                     return {
                         'success': False, 
                         'message': error_data.get('error', f'HTTP {response.status_code}'),
-                        'error_code': error_data.get('error_code', 'UNKNOWN')
+                        'error_code': error_data.get('error_code', 'UNKNOWN'),
+                        'status_code': response.status_code
                     }
                 except:
-                    return {'success': False, 'message': f'HTTP {response.status_code}'}
+                    return {'success': False, 'message': f'HTTP {response.status_code}',
+                            'status_code': response.status_code}
                 
         except requests.exceptions.RequestException as e:
             return {'success': False, 'message': f'Connection error: {str(e)}'}
         except Exception as e:
             return {'success': False, 'message': f'Error: {str(e)}'}
 
+    @staticmethod
+    def gather(calls: Dict[Hashable, Callable[[], Dict[str, Any]]]) -> Dict[Hashable, Dict[str, Any]]:
+        """Run independent API calls at once and return their results by key
+
+        The page waits for the slowest call instead of the sum of all of them.
+        Workers get this script run's context, so calls can read
+        st.session_state (the auth token) as they do on the main thread.
+        """
+        # Calls made from a worker run inline: waiting on the same pool
+        # from inside it could deadlock once every worker is waiting
+        if len(calls) <= 1 or threading.current_thread().name.startswith('api_'):
+            return {key: call() for key, call in calls.items()}
+        ctx = get_script_run_ctx()
+        futures = {key: get_executor().submit(APIClient._run_in_context, ctx, call) for key, call in calls.items()}
+        return {key: future.result() for key, future in futures.items()}
+
+    @staticmethod
+    def prefetch(calls: List[Callable[[], Any]]) -> None:
+        """Start calls in the background and return at once; they only fill the caches"""
+        ctx = get_script_run_ctx()
+        for call in calls:
+            get_executor().submit(APIClient._run_in_context, ctx, call)
+
+    @staticmethod
+    def _run_in_context(ctx, call: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        thread = threading.current_thread()
+        previous = getattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME, None)
+        add_script_run_ctx(thread, ctx)
+        try:
+            return call()
+        except Exception as e:
+            return {'success': False, 'message': f'Error: {str(e)}'}
+        finally:
+            # Put back what the pooled thread had (nothing) so the next task,
+            # maybe another browser's, cannot see this session's state;
+            # add_script_run_ctx(ctx=None) would keep the current context
+            if previous is None:
+                thread.__dict__.pop(SCRIPT_RUN_CONTEXT_ATTR_NAME, None)
+            else:
+                setattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME, previous)
+
+    @staticmethod
+    @cached_lookup('posters')
+    def get_poster(url: str, width: int) -> Dict[str, Any]:
+        """Poster resized to width by the poster proxy, as JPEG bytes"""
+        try:
+            # JPEG, not WebP: st.image passes JPEG bytes through unchanged
+            response = get_http_session().get(f"{API_URLS['posters']}/posters/{width}",
+                                              params={'url': url, 'format': 'jpeg'}, timeout=10)
+            if response.status_code == 200:
+                return {'success': True, 'data': response.content}
+            return {'success': False, 'message': f'HTTP {response.status_code}'}
+        except Exception as e:
+            return {'success': False, 'message': f'Error: {str(e)}'}
+
+    @staticmethod
+    def prefetch_posters(urls: List[str], width: int) -> None:
+        """Load the posters of a grid at once, so rendering it only reads the cache"""
+        APIClient.gather({
+            url: lambda url=url: APIClient.get_poster(url, width)
+            for url in dict.fromkeys(urls) if url and url != 'N/A'
+        })
+
+    @staticmethod
+    def invalidate_user_data(email: str) -> None:
+        """Drop the user's cached favorites and recommendations after they add a favorite"""
+        invalidate_user(email)
+        for data_class in ('favorites', 'recommendations'):
+            _count('cleared', data_class)
+
+    @staticmethod
+    def conditional_get(url: str) -> Dict[str, Any]:
+        """GET revalidated with the ETag of the last response for url; a 304 reuses its data"""
+        store = get_etag_store()
+        with store['lock']:
+            stored = store['responses'].get(url)
+
+        headers = {'Content-Type': 'application/json'}
+        if 'token' in st.session_state:
+            headers['Authorization'] = f'Bearer {st.session_state.token}'
+        if stored:
+            headers['If-None-Match'] = stored[0]
+
+        _count('calls', 'bulk')
+        try:
+            response = get_http_session().get(url, headers=headers, timeout=10)
+        except requests.exceptions.RequestException as e:
+            return {'success': False, 'message': f'Connection error: {str(e)}'}
+        if response.status_code == 304 and stored:
+            return {'success': True, 'data': stored[1]}
+
+        _count('misses', 'bulk')
+        if response.status_code != 200:
+            return {'success': False, 'message': f'HTTP {response.status_code}'}
+        try:
+            data = response.json()
+        except ValueError:
+            return {'success': False, 'message': 'Invalid response'}
+
+        etag = response.headers.get('ETag')
+        if etag:
+            with store['lock']:
+                store['responses'][url] = (etag, data)
+                store['responses'].move_to_end(url)
+                while len(store['responses']) > ETAG_STORE_MAX_ENTRIES:
+                    store['responses'].popitem(last=False)
+        return {'success': True, 'data': data}
+
+    @staticmethod
+    def get_items_by_ids(kind: str, imdb_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Details for many movies or series ('movies' / 'series') by IMDB ID
+
+        One request per 100 IDs to the catalog service's bulk endpoint; the
+        result maps each ID to what get_movie_by_id / get_series_by_id would
+        return. Falls back to one lookup per ID if the bulk request fails.
+        """
+        imdb_ids = list(dict.fromkeys(imdb_id for imdb_id in imdb_ids if imdb_id))
+        single = APIClient.get_movie_by_id if kind == 'movies' else APIClient.get_series_by_id
+        results = {}
+        for start in range(0, len(imdb_ids), BULK_IDS_PER_REQUEST):
+            chunk = imdb_ids[start:start + BULK_IDS_PER_REQUEST]
+            response = APIClient.conditional_get(
+                f"{API_URLS[kind]}/api/{kind}/items?ids={quote(','.join(chunk), safe=',')}")
+            if not response.get('success'):
+                results.update(APIClient.gather({
+                    imdb_id: lambda imdb_id=imdb_id: single(imdb_id) for imdb_id in chunk
+                }))
+                continue
+            for item in response['data'].get('items', []):
+                results[item.get('imdbID')] = {'success': True, 'data': item}
+            for imdb_id in response['data'].get('missing', []):
+                results[imdb_id] = {'success': False, 'message': 'Not found'}
+        return results
+
+    @staticmethod
+    def post_favorite(url: str, email: str) -> Dict[str, Any]:
+        """Add a favorite; the user's cached favorites and recommendations are dropped"""
+        result = APIClient.make_request('POST', url)
+        APIClient.invalidate_user_data(email)
+        return result
+
     @staticmethod
     def register_user(email: str, password: str) -> Dict[str, Any]:
         """User registration"""
@@ -235,7 +631,7 @@ class APIClient:
         
         # Search service doesn't need authentication
         try:
-            response = requests.get(f"{API_URLS['search']}/api/search?title={query}&type=movie", timeout=10)
+            response = get_http_session().get(f"{API_URLS['search']}/api/search?title={query}&type=movie", timeout=10)
             if response.status_code in [200, 201]:
                 try:
                     return {'success': True, 'data': response.json()}
@@ -259,7 +655,7 @@ class APIClient:
         
         # Search service doesn't need authentication
         try:
-            response = requests.get(f"{API_URLS['search']}/api/search?title={query}&type=series", timeout=10)
+            response = get_http_session().get(f"{API_URLS['search']}/api/search?title={query}&type=series", timeout=10)
             if response.status_code in [200, 201]:
                 try:
                     return {'success': True, 'data': response.json()}
@@ -271,11 +667,12 @@ class APIClient:
             return {'success': False, 'message': f'Error: {str(e)}'}
 
     @staticmethod
+    @cached_lookup('item')
     def search_series_by_id(imdb_id: str) -> Dict[str, Any]:
         """Search series by IMDB ID"""
         # Search service doesn't need authentication
         try:
-            response = requests.get(f"{API_URLS['search']}/api/search?i={imdb_id}&type=series", timeout=10)
+            response = get_http_session().get(f"{API_URLS['search']}/api/search?i={imdb_id}&type=series", timeout=10)
             if response.status_code in [200, 201]:
                 try:
                     return {'success': True, 'data': response.json()}
@@ -287,23 +684,27 @@ class APIClient:
             return {'success': False, 'message': f'Error: {str(e)}'}
 
     @staticmethod
+    @cached_lookup('recommendations', user_scoped=True)
     def get_recommendations(email: str) -> Dict[str, Any]:
         """Get personalized recommendations"""
         # Get movie recommendations
         return APIClient.make_request('GET', f"{API_URLS['personalize']}/api/movies/recommendations/?user_id={email}&num_results=5")
 
     @staticmethod
+    @cached_lookup('recommendations', user_scoped=True)
     def get_series_recommendations(email: str) -> Dict[str, Any]:
         """Get personalized series recommendations"""
         # Get series recommendations
         return APIClient.make_request('GET', f"{API_URLS['personalize']}/api/series/recommendations/?user_id={email}&num_results=5")
 
     @staticmethod
+    @cached_lookup('item')
     def get_movie_by_id(movie_id: str) -> Dict[str, Any]:
         """Get movie details by ID"""
         return APIClient.make_request('GET', f"{API_URLS['movies']}/api/movies/id/{movie_id}")
 
     @staticmethod
+    @cached_lookup('item')
     def get_series_by_id(series_id: str) -> Dict[str, Any]:
         """Get series details by ID"""
         return APIClient.make_request('GET', f"{API_URLS['series']}/api/series/id/{series_id}")
@@ -320,7 +721,7 @@ class APIClient:
             if title:
                 url = f"{API_URLS['user']}/api/favorites/movies/{email}/{title}?imdb_id={movie_id}"
                 st.write(f"DEBUG: Calling URL: {url}")
-                result = APIClient.make_request('POST', url)
+                result = APIClient.post_favorite(url, email)
                 
                 # Send like event to Kinesis
                 if result.get('success') or 'added to favorites' in str(result):
@@ -346,7 +747,7 @@ class APIClient:
             if title:
                 url = f"{API_URLS['user']}/api/favorites/series/{email}/{title}?imdb_id={series_id}"
                 st.write(f"DEBUG: Calling URL: {url}")
-                result = APIClient.make_request('POST', url)
+                result = APIClient.post_favorite(url, email)
                 
                 # Send like event to Kinesis
                 if result.get('success') or 'added to favorites' in str(result):
@@ -361,11 +762,47 @@ class APIClient:
         return {'success': False, 'message': 'Could not get series title'}
 
     @staticmethod
+    @cached_lookup('favorites', user_scoped=True)
     def get_favorite_movies(email: str) -> Dict[str, Any]:
         """Get user's favorite movies"""
         return APIClient.make_request('GET', f"{API_URLS['user']}/api/favorites/movies/{email}")
 
     @staticmethod
+    @cached_lookup('favorites', user_scoped=True)
+    def get_favorites_page(kind: str, email: str, cursor: Optional[str]) -> Dict[str, Any]:
+        """One page of favorite movies or series ('movies' / 'series'): {'items', 'next_cursor'}
+
+        Pages come from user-service by cursor. Without its page endpoint the
+        full list is fetched and paged here, with 'offset:N' cursors.
+        """
+        if not (cursor or '').startswith('offset:'):
+            params = {'limit': FAVORITES_PAGE_SIZE, **({'cursor': cursor} if cursor else {})}
+            result = APIClient.make_request(
+                'GET', f"{API_URLS['user']}/api/favorites/{kind}/{quote(email, safe='@')}/page?{urlencode(params)}")
+            if result.get('success') or cursor:
+                return result
+        full = APIClient.get_favorite_movies(email) if kind == 'movies' else APIClient.get_favorite_series(email)
+        if not full.get('success'):
+            return full
+        start = int(cursor[len('offset:'):]) if cursor else 0
+        end = start + FAVORITES_PAGE_SIZE
+        return {'success': True, 'data': {
+            'items': full['data'][start:end],
+            'next_cursor': f'offset:{end}' if end < len(full['data']) else None,
+        }}
+
+    @staticmethod
+    def preload_favorites_page(kind: str, email: str, cursor: str) -> Dict[str, Any]:
+        """Warm the caches for a favorites page: the page, its items' details and posters"""
+        page = APIClient.get_favorites_page(kind, email, cursor)
+        if page.get('success'):
+            details = APIClient.get_items_by_ids(kind, [item.get('imdbID', '') for item in page['data']['items']])
+            APIClient.prefetch_posters([result['data'].get('Poster', '') for result in details.values()
+                                        if result.get('success')], 150)
+        return page
+
+    @staticmethod
+    @cached_lookup('favorites', user_scoped=True)
     def get_favorite_series(email: str) -> Dict[str, Any]:
         """Get user's favorite series"""
         return APIClient.make_request('GET', f"{API_URLS['user']}/api/favorites/series/{email}")
@@ -373,32 +810,101 @@ class APIClient:
     @staticmethod
     def add_favorite_movie(email: str, title: str) -> Dict[str, Any]:
         """Add movie to favorites"""
-        return APIClient.make_request('POST', f"{API_URLS['user']}/api/favorites/movies/{email}/{title}")
+        return APIClient.post_favorite(f"{API_URLS['user']}/api/favorites/movies/{email}/{title}", email)
 
     @staticmethod
     def add_favorite_series(email: str, title: str) -> Dict[str, Any]:
         """Add series to favorites"""
-        return APIClient.make_request('POST', f"{API_URLS['user']}/api/favorites/series/{email}/{title}")
+        return APIClient.post_favorite(f"{API_URLS['user']}/api/favorites/series/{email}/{title}", email)
+
+    @staticmethod
+    def iter_sse(response) -> Iterator[Tuple[str, Dict]]:
+        """Yield (event, data) pairs from a text/event-stream response"""
+        event, data_lines = 'message', []
+        for line in response.iter_lines(decode_unicode=True):
+            if line:
+                field, _, value = line.partition(':')
+                if field == 'event':
+                    event = value.strip()
+                elif field == 'data':
+                    data_lines.append(value[1:] if value.startswith(' ') else value)
+                continue
+            if data_lines:
+                yield event, json.loads('\n'.join(data_lines))
+            event, data_lines = 'message', []
 
     @staticmethod
-    def chat_with_bot(message: str) -> Dict[str, Any]:
-        """Chat with chatbot"""
+    def chat_with_bot(message: str, on_chunk: Optional[Callable[[str], None]] = None,
+                      session_id: Optional[str] = None) -> Dict[str, Any]:
+        """Chat with chatbot
+
+        Without on_chunk this is the plain /chat request. With it, the reply is
+        streamed from /chat/stream and on_chunk is called with each piece of
+        text as it arrives; the full reply is still returned at the end.
+        Passing the same session_id keeps the conversation going on the agent.
+        """
         data = {'message': message}
-        return APIClient.make_request('POST', f"{API_URLS['chatbot']}/chat", data)
+        if session_id:
+            data['session_id'] = session_id
+        if on_chunk is None:
+            return APIClient.make_request('POST', f"{API_URLS['chatbot']}/chat", data)
+
+        headers = {'Content-Type': 'application/json', 'Accept': 'text/event-stream'}
+        if 'token' in st.session_state:
+            headers['Authorization'] = f'Bearer {st.session_state.token}'
+
+        started = time.perf_counter()
+        first_token_ms = None
+        cached = False
+        parts = []
+        try:
+            # Short connect timeout, generous gap between chunks for slow agent steps
+            with get_http_session().post(f"{API_URLS['chatbot']}/chat/stream", json=data, headers=headers,
+                               stream=True, timeout=(5, 120)) as response:
+                if response.status_code != 200:
+                    try:
+                        error = response.json().get('error', f'HTTP {response.status_code}')
+                    except Exception:
+                        error = f'HTTP {response.status_code}'
+                    return {'success': False, 'message': error}
+
+                for event, payload in APIClient.iter_sse(response):
+                    if event == 'chunk':
+                        if first_token_ms is None:
+                            first_token_ms = round((time.perf_counter() - started) * 1000)
+                        parts.append(payload.get('text', ''))
+                        on_chunk(payload.get('text', ''))
+                    elif event == 'error':
+                        return {'success': False, 'message': payload.get('error', 'Unknown error'),
+                                'data': {'response': ''.join(parts)}}
+                    elif event == 'done':
+                        session_id = payload.get('session_id', session_id)
+                        cached = payload.get('cached', False)
+                        break
+        except requests.exceptions.RequestException as e:
+            return {'success': False, 'message': f'Connection error: {str(e)}'}
+
+        return {'success': True, 'data': {
+            'response': ''.join(parts),
+            'session_id': session_id,
+            'cached': cached,
+            'first_token_ms': first_token_ms,
+            'total_ms': round((time.perf_counter() - started) * 1000)
+        }}
 
     @staticmethod
     def test_add_movie_favorite(email: str, movie_id: str, title: str) -> Dict[str, Any]:
         """Test function to add movie to favorites"""
         url = f"{API_URLS['user']}/api/favorites/movies/{email}/{title}?imdb_id={movie_id}"
         st.write(f"TEST: Calling URL: {url}")
-        return APIClient.make_request('POST', url)
+        return APIClient.post_favorite(url, email)
 
     @staticmethod
     def test_add_series_favorite(email: str, series_id: str, title: str) -> Dict[str, Any]:
         """Test function to add series to favorites"""
         url = f"{API_URLS['user']}/api/favorites/series/{email}/{title}?imdb_id={series_id}"
         st.write(f"TEST: Calling URL: {url}")
-        return APIClient.make_request('POST', url)
+        return APIClient.post_favorite(url, email)
 
 def show_custom_message(message_type: str, message: str):
     """Show custom styled messages"""
@@ -579,12 +1085,13 @@ def show_dashboard():
     # Get user favorites
     email = st.session_state.get('username', '')
     if email:
-        # Get favorite movies count
-        movies_result = APIClient.get_favorite_movies(email)
+        # Get favorite movies and series counts
+        results = APIClient.gather({
+            'movies': lambda: APIClient.get_favorite_movies(email),
+            'series': lambda: APIClient.get_favorite_series(email),
+        })
+        movies_result, series_result = results['movies'], results['series']
         movies_count = len(movies_result.get('data', [])) if movies_result.get('success') else 0
-        
-        # Get favorite series count
-        series_result = APIClient.get_favorite_series(email)
         series_count = len(series_result.get('data', [])) if series_result.get('success') else 0
     else:
         movies_count = 0
@@ -603,6 +1110,50 @@ def show_dashboard():
     st.write("Bu uygulama Marmara Üniversitesi Bilgisayar Mühendisliği Tezli Yüksek Lisans öğrencisi Onur Yurtsever tarafından geliştirilmiştir. Uygulamanın amacı yeni nesil yazılım geliştirme yöntemlerinin, yazılım geliştirme süreçlerine olan etkisi incelenmiş, metrikler sayısal olarak ortaya konmuştur.")
     st.write("This application was developed by Onur Yurtsever, a Master's thesis student in Computer Engineering at Marmara University. The purpose of the application was to examine the impact of next-generation software development methods on software development processes and to present numerical metrics.")
 
+def reset_favorites_pages(kind: str, email: str) -> List[Optional[str]]:
+    """Back to page 0 of email's list; returns the fresh cursor stack"""
+    st.session_state[f'{kind}_page_cursors'] = cursors = [None]
+    st.session_state[f'{kind}_page_owner'] = email
+    st.session_state[f'{kind}_page'] = 0
+    return cursors
+
+def favorites_page(kind: str, email: str) -> Tuple[int, Dict[str, Any]]:
+    """(page number, result) of the favorites page the user is on; the next page is prefetched"""
+    cursors = st.session_state.get(f'{kind}_page_cursors')
+    if cursors is None or st.session_state.get(f'{kind}_page_owner') != email:
+        # Cursors are only valid for the list they came from
+        cursors = reset_favorites_pages(kind, email)
+    page = min(st.session_state.get(f'{kind}_page', 0), len(cursors) - 1)
+    result = APIClient.get_favorites_page(kind, email, cursors[page])
+    if page and result.get('status_code') == 400:
+        # user-service rejected the cursor (e.g. the list changed shape); start over
+        cursors = reset_favorites_pages(kind, email)
+        page = 0
+        result = APIClient.get_favorites_page(kind, email, None)
+    next_cursor = result.get('data', {}).get('next_cursor') if result.get('success') else None
+    if next_cursor:
+        APIClient.prefetch([lambda: APIClient.preload_favorites_page(kind, email, next_cursor)])
+    return page, result
+
+def go_to_favorites_page(kind: str, page: int, cursor: Optional[str]) -> None:
+    cursors = st.session_state[f'{kind}_page_cursors']
+    if cursor is not None:
+        # cursors[i] opens page i; a new next page replaces what followed
+        del cursors[page:]
+        cursors.append(cursor)
+    st.session_state[f'{kind}_page'] = page
+
+def show_page_buttons(kind: str, page: int, next_cursor: Optional[str]) -> None:
+    col_prev, col_page, col_next = st.columns([1, 2, 1])
+    with col_prev:
+        st.button("← Previous", key=f'{kind}_prev', disabled=page == 0,
+                  on_click=go_to_favorites_page, args=(kind, page - 1, None))
+    with col_page:
+        st.write(f"Page {page + 1}")
+    with col_next:
+        st.button("Next →", key=f'{kind}_next', disabled=not next_cursor,
+                  on_click=go_to_favorites_page, args=(kind, page + 1, next_cursor))
+
 def show_movies_page(email: str):
     """Movies page showing user's favorite movies"""
     st.subheader("🎬 Your Favorite Movies")
@@ -611,29 +1162,33 @@ def show_movies_page(email: str):
         st.warning("Please login to view your favorite movies")
         return
     
-    result = APIClient.get_favorite_movies(email)
+    page, result = favorites_page('movies', email)
     
     if result.get('success'):
-        movies = result.get('data', [])
-        if movies:
+        movies = result['data'].get('items', [])
+        if movies or page:
+            # Details for this page only, from movie service in one bulk request
+            details = APIClient.get_items_by_ids('movies', [movie.get('imdbID', '') for movie in movies])
+            APIClient.prefetch_posters([result['data'].get('Poster', '') for result in details.values()
+                                        if result.get('success')], 150)
             # Display movies in a grid
             cols = st.columns(3)
             for i, movie in enumerate(movies):
                 with cols[i % 3]:
                     st.write(f"**{movie.get('Title', 'Unknown')}**")
-                    # Try to get poster from movie service by ID
-                    movie_result = APIClient.get_movie_by_id(movie.get('imdbID', ''))
+                    movie_result = details.get(movie.get('imdbID', ''), {})
                     if movie_result.get('success'):
                         movie_data = movie_result.get('data', {})
                         poster_url = movie_data.get('Poster', '')
                         if poster_url and poster_url != "N/A":
-                            st.image(poster_url, width=150, caption=movie.get('Title', ''))
+                            show_poster(poster_url, 150, movie.get('Title', ''))
                         else:
                             st.write("🎬 No poster available")
                     else:
                         st.write("🎬 No poster available")
                     st.write(f"IMDB ID: {movie.get('imdbID', 'Unknown')}")
                     st.divider()
+            show_page_buttons('movies', page, result['data'].get('next_cursor'))
         else:
             st.info("No favorite movies found. Add some movies to your favorites!")
     else:
@@ -647,24 +1202,39 @@ def show_series_page(email: str):
         st.warning("Please login to view your favorite series")
         return
     
-    result = APIClient.get_favorite_series(email)
+    page, result = favorites_page('series', email)
     
     if result.get('success'):
-        series = result.get('data', [])
-        if series:
+        series = result['data'].get('items', [])
+        if series or page:
+            # This page's details from series service in one bulk request; series
+            # missing from the catalog come from search service (OMDB API)
+            details = APIClient.get_items_by_ids('series', [show.get('imdbID', '') for show in series])
+            searched = APIClient.gather({
+                show['imdbID']: lambda imdb_id=show['imdbID']: APIClient.search_series_by_id(imdb_id)
+                for show in series
+                if show.get('imdbID') and not details.get(show['imdbID'], {}).get('success')
+            })
+            APIClient.prefetch_posters(
+                [result['data'].get('Poster', '') for result in details.values() if result.get('success')] +
+                [result['data'].get('data', {}).get('Poster', '') for result in searched.values() if result.get('success')],
+                150)
             # Display series in a grid
             cols = st.columns(3)
             for i, show in enumerate(series):
                 with cols[i % 3]:
                     st.write(f"**{show.get('Title', 'Unknown')}**")
                     
-                    # Try to get poster from search service by ID (OMDB API)
-                    search_result = APIClient.search_series_by_id(show.get('imdbID', ''))
-                    if search_result.get('success'):
-                        search_data = search_result.get('data', {}).get('data', {})
+                    catalog_result = details.get(show.get('imdbID', ''), {})
+                    search_result = searched.get(show.get('imdbID', ''), {})
+                    if catalog_result.get('success') or search_result.get('success'):
+                        if catalog_result.get('success'):
+                            search_data = catalog_result.get('data', {})
+                        else:
+                            search_data = search_result.get('data', {}).get('data', {})
                         poster_url = search_data.get('Poster', '')
                         if poster_url and poster_url != "N/A":
-                            st.image(poster_url, width=150, caption=show.get('Title', ''))
+                            show_poster(poster_url, 150, show.get('Title', ''))
                         else:
                             st.write("📺 No poster available")
                     else:
@@ -672,6 +1242,7 @@ def show_series_page(email: str):
                     
                     st.write(f"IMDB ID: {show.get('imdbID', 'Unknown')}")
                     st.divider()
+            show_page_buttons('series', page, result['data'].get('next_cursor'))
         else:
             st.info("No favorite series found. Add some series to your favorites!")
     else:
@@ -699,8 +1270,12 @@ def show_recommendations_page(email: str):
             st.write(f"TEST RESULT: {result}")
     st.write("---")
     
-    # Get recommendations
-    recommendations_result = APIClient.get_recommendations(email)
+    # Get movie and series recommendations together
+    results = APIClient.gather({
+        'movies': lambda: APIClient.get_recommendations(email),
+        'series': lambda: APIClient.get_series_recommendations(email),
+    })
+    recommendations_result = results['movies']
     
     # Handle nested data structure
     if recommendations_result.get('success'):
@@ -712,8 +1287,7 @@ def show_recommendations_page(email: str):
     else:
         recommendations = []
     
-    # Get series recommendations
-    series_recommendations_result = APIClient.get_series_recommendations(email)
+    series_recommendations_result = results['series']
     
     # Handle nested data structure for series
     if series_recommendations_result.get('success'):
@@ -725,6 +1299,19 @@ def show_recommendations_page(email: str):
     else:
         series_recommendations = []
     
+    # Details for every recommended item: one bulk request per tab, both at once
+    def item_ids(recs):
+        if not isinstance(recs, list):
+            return []
+        return [rec['item_id'] for rec in recs if isinstance(rec, dict) and rec.get('item_id')]
+
+    details = APIClient.gather({
+        'movies': lambda: APIClient.get_items_by_ids('movies', item_ids(recommendations)),
+        'series': lambda: APIClient.get_items_by_ids('series', item_ids(series_recommendations)),
+    })
+    APIClient.prefetch_posters([result['data'].get('Poster', '') for result in details['movies'].values()
+                                if result.get('success')], 150)
+    
     # Movies and Series recommendations in tabs
     rec_tab1, rec_tab2 = st.tabs(["🎬 Movies", "📺 Series"])
     
@@ -732,8 +1319,8 @@ def show_recommendations_page(email: str):
         if recommendations and isinstance(recommendations, list):
             for rec in recommendations:
                 if isinstance(rec, dict) and rec.get('item_id'):
-                    # Get movie details by ID
-                    movie_result = APIClient.get_movie_by_id(rec['item_id'])
+                    # Movie details by ID
+                    movie_result = details['movies'].get(rec['item_id'], {})
                     
                     if movie_result.get('success'):
                         movie_data = movie_result.get('data', {})
@@ -744,7 +1331,7 @@ def show_recommendations_page(email: str):
                             # Show poster if available
                             poster_url = movie_data.get('Poster', '')
                             if poster_url and poster_url != 'N/A':
-                                st.image(poster_url, width=150, caption=title)
+                                show_poster(poster_url, 150, title)
                             else:
                                 st.write("🎬 No poster available")
                         with col2:
@@ -775,7 +1362,7 @@ def show_recommendations_page(email: str):
             for i, rec in enumerate(series_recommendations):
                 if isinstance(rec, dict) and rec.get('item_id'):
                     # Series service'den detayları al
-                    series_result = APIClient.get_series_by_id(rec['item_id'])
+                    series_result = details['series'].get(rec['item_id'], {})
                     
                     if series_result.get('success'):
                         series_data = series_result.get('data', {})
@@ -834,6 +1421,9 @@ def show_chatbot_page():
     # Chat input
     if "messages" not in st.session_state:
         st.session_state.messages = []
+    # One agent conversation per browser session, so follow-ups keep context
+    if "chat_session_id" not in st.session_state:
+        st.session_state.chat_session_id = uuid.uuid4().hex
     
     # Display chat history
     for message in st.session_state.messages:
@@ -849,20 +1439,29 @@ def show_chatbot_page():
         with st.chat_message("user"):
             st.markdown(prompt)
         
-        # Get bot response
+        # Get bot response, rendering it as the chunks arrive
         with st.chat_message("assistant"):
-            with st.spinner("Thinking..."):
-                result = APIClient.chat_with_bot(prompt)
-                
-                if result.get('success'):
-                    response = result.get('data', {}).get('response', 'Sorry, I could not process your request.')
-                else:
-                    response = f"Error: {result.get('message', 'Unknown error')}"
-                
-                st.markdown(response)
-                
-                # Add assistant response to chat history
-                st.session_state.messages.append({"role": "assistant", "content": response})
+            placeholder = st.empty()
+            placeholder.markdown("Thinking...")
+            streamed = []
+
+            def show_chunk(text):
+                streamed.append(text)
+                placeholder.markdown("".join(streamed) + "▌")
+
+            result = APIClient.chat_with_bot(prompt, on_chunk=show_chunk,
+                                             session_id=st.session_state.chat_session_id)
+
+            if result.get('success'):
+                response = result.get('data', {}).get('response') or 'Sorry, I could not process your request.'
+            else:
+                partial = result.get('data', {}).get('response', '')
+                response = f"{partial}\n\nError: {result.get('message', 'Unknown error')}".strip()
+
+            placeholder.markdown(response)
+
+            # Add assistant response to chat history
+            st.session_state.messages.append({"role": "assistant", "content": response})
 
 def show_search_page(email: str):
     """Search page for movies and series"""
@@ -904,7 +1503,7 @@ def show_search_page(email: str):
                     with col1:
                         poster_url = data.get('Poster', '')
                         if poster_url and poster_url != "N/A":
-                            st.image(poster_url, width=200, caption=data.get('Title', ''))
+                            show_poster(poster_url, 200, data.get('Title', ''))
                         else:
                             st.write("🎬 No poster available")
                     
@@ -953,10 +1552,70 @@ def show_search_page(email: str):
             else:
                 st.error(f"Search error: {result.get('message', 'Unknown error')}")
 
+def query_param(name: str) -> Optional[str]:
+    """A URL query parameter (st.query_params on newer Streamlit versions)"""
+    if hasattr(st, 'query_params'):
+        return st.query_params.get(name)
+    values = st.experimental_get_query_params().get(name)
+    return values[0] if values else None
+
+def show_poster(url: str, width: int, caption: str) -> None:
+    """A poster through the poster proxy; the original URL if the proxy fails"""
+    result = APIClient.get_poster(url, width)
+    st.image(result['data'] if result.get('success') else url, width=width, caption=caption)
+
+def show_request_timings() -> None:
+    """Latency per backend route and a waterfall of one of this session's page runs"""
+    st.write("Backend calls, for every session of this process")
+    metrics = get_request_metrics()
+    st.dataframe(metrics.report(), use_container_width=True, hide_index=True)
+    st.download_button("Download OpenMetrics", metrics.openmetrics(), file_name='frontend-metrics.txt',
+                       mime='application/openmetrics-text')
+
+    current = st.session_state.get('_timing_run', {}).get('id')
+    timings = [t for t in st.session_state.get('request_timings', []) if t['run'] != current]
+    runs = list(dict.fromkeys((t['run'], t['page']) for t in reversed(timings)))
+    if not runs:
+        return
+    run_id, _ = st.selectbox("Page run (this session)", runs, format_func=lambda run: f"#{run[0]} {run[1]}")
+    calls = sorted((t for t in timings if t['run'] == run_id), key=lambda t: t['start'])
+    rows = [{
+        'call': f"{i + 1}. {t['method']} {t['service']} {t['route']}",
+        'start ms': round(t['start'] * 1000, 1),
+        'end ms': round((t['start'] + t['duration']) * 1000, 1),
+        'duration ms': round(t['duration'] * 1000, 1),
+        'status': t['status'],
+    } for i, t in enumerate(calls)]
+    import altair as alt
+    chart = alt.Chart(alt.Data(values=rows)).mark_bar().encode(
+        x=alt.X('start ms:Q', title='ms since the page run started'),
+        x2='end ms:Q',
+        y=alt.Y('call:N', sort=None, title=None),
+        color='status:N',
+        tooltip=['call:N', 'duration ms:Q', 'status:N'],
+    )
+    st.altair_chart(chart, use_container_width=True)
+    st.dataframe(rows, use_container_width=True, hide_index=True)
+
+def show_diagnostics_page():
+    """Cache hit rates, backend latency and analytics delivery; not in the menu, open with ?page=diagnostics"""
+    st.subheader("🩺 Diagnostics")
+    st.write("Frontend caches, for every session of this process")
+    st.dataframe(cache_report(), use_container_width=True, hide_index=True)
+    show_request_timings()
+    st.write("Analytics events")
+    st.dataframe([get_event_sender().stats()], use_container_width=True, hide_index=True)
+    if (st.session_state.get('username') or '').lower() in DIAGNOSTICS_ADMINS and st.button("Clear all caches"):
+        st.cache_data.clear()
+        st.rerun()
+
 def logout():
     """Logout user"""
     # Clear all session state
-    keys_to_clear = ['token', 'user_data', 'username', 'current_page', 'verification_email']
+    keys_to_clear = ['token', 'user_data', 'username', 'current_page', 'verification_email',
+                     'messages', 'chat_session_id',
+                     'movies_page_cursors', 'movies_page', 'movies_page_owner',
+                     'series_page_cursors', 'series_page', 'series_page_owner']
     for key in keys_to_clear:
         if key in st.session_state:
             del st.session_state[key]
@@ -972,6 +1631,7 @@ def main():
     if 'token' not in st.session_state:
         # Check current page for authentication flow
         current_page = st.session_state.get('current_page', 'login')
+        start_page_timing(current_page)
         
         if current_page == 'signup':
             show_signup_page()
@@ -1011,8 +1671,11 @@ def main():
         
         # Main content area
         current_page = st.session_state.get('current_page', 'Dashboard')
+        start_page_timing('Diagnostics' if query_param('page') == 'diagnostics' else current_page)
         
-        if current_page == "Dashboard":
+        if query_param('page') == 'diagnostics':
+            show_diagnostics_page()
+        elif current_page == "Dashboard":
             show_dashboard()
         elif current_page == "Movies":
             show_movies_page(st.session_state.get('username', ''))
@@ -4,13 +4,41 @@ import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+# No metrics server from the test process
+os.environ.setdefault('METRICS_PORT', '0')
 
-from streamlit_app import APIClient, show_custom_message
+import streamlit as st
+from streamlit_app import APIClient, show_custom_message, get_http_session, get_cache_stats, cache_report, get_etag_store
+from event_sender import EventSender
+from request_metrics import RequestMetrics, route_template
+
+@pytest.fixture(autouse=True)
+def fresh_caches():
+    """Cached lookups and their counters must not leak between tests"""
+    st.cache_data.clear()
+    stats = get_cache_stats()
+    for kind in ('calls', 'misses', 'cleared'):
+        stats[kind].clear()
+    get_etag_store()['responses'].clear()
+    import streamlit_app
+    streamlit_app.get_request_metrics.clear()
+    st.session_state.pop('request_timings', None)
+    # Analytics events from the tested calls must not reach the network
+    with patch('streamlit_app.get_event_sender') as sender:
+        yield sender
+    st.cache_data.clear()
+
+def json_response(payload, status_code=200, headers=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.json.return_value = payload
+    response.headers = headers or {}
+    return response
 
 class TestAPIClient:
     """Test APIClient class"""
     
-    @patch('streamlit_app.requests.post')
+    @patch('streamlit_app.requests.Session.post')
     def test_register_user_success(self, mock_post):
         """Test successful user registration"""
         mock_response = MagicMock()
@@ -28,7 +56,7 @@ class TestAPIClient:
         assert 'Registration successful' in result['data']['message']
         assert result['data']['userSub'] == 'test-user-sub'
     
-    @patch('streamlit_app.requests.post')
+    @patch('streamlit_app.requests.Session.post')
     def test_register_user_exists(self, mock_post):
         """Test registration with existing user"""
         mock_response = MagicMock()
@@ -45,7 +73,7 @@ class TestAPIClient:
         assert 'already registered' in result['message']
         assert result['error_code'] == 'USER_EXISTS_VERIFIED'
     
-    @patch('streamlit_app.requests.post')
+    @patch('streamlit_app.requests.Session.post')
     def test_login_user_success(self, mock_post):
         """Test successful user login"""
         mock_response = MagicMock()
@@ -68,7 +96,7 @@ class TestAPIClient:
         assert result['data']['token'] == 'test-token'
         assert result['data']['user']['email'] == 'test@example.com'
     
-    @patch('streamlit_app.requests.post')
+    @patch('streamlit_app.requests.Session.post')
     def test_login_user_failed(self, mock_post):
         """Test failed user login"""
         mock_response = MagicMock()
@@ -85,6 +113,489 @@ class TestAPIClient:
         assert 'Incorrect username or password' in result['message']
         assert result['error_code'] == 'NotAuthorizedException'
 
+    @patch('streamlit_app.requests.Session.post')
+    def test_login_forwards_browser_address(self, mock_post):
+        """The auth service rate-limits per browser, not per frontend pod"""
+        mock_post.return_value = json_response({'access_token': 'token'})
+        context = MagicMock()
+        context.headers = {'X-Forwarded-For': '198.51.100.7, 203.0.113.9'}
+
+        with patch.object(st, 'context', context):
+            APIClient.login_user('test@example.com', 'password123')
+
+        # The ALB appended the last entry; the first is whatever the client sent
+        assert mock_post.call_args[1]['headers']['X-Forwarded-For'] == '203.0.113.9'
+
+class TestChatStreaming:
+    """Test the streamed chatbot reply"""
+
+    @staticmethod
+    def sse_response(lines, status_code=200):
+        response = MagicMock()
+        response.status_code = status_code
+        response.iter_lines.return_value = iter(lines)
+        response.__enter__.return_value = response
+        return response
+
+    @patch('streamlit_app.requests.Session.post')
+    def test_chat_with_bot_streams_chunks(self, mock_post):
+        """Chunks are passed to on_chunk in order and joined in the result"""
+        mock_post.return_value = self.sse_response([
+            'event: chunk', 'data: {"text": "Hello "}', '',
+            'event: chunk', 'data: {"text": "there\\n!"}', '',
+            'event: done', 'data: {"chunks": 2, "session_id": "browser-1", "cached": false}', '',
+        ])
+        received = []
+
+        result = APIClient.chat_with_bot('Hi', on_chunk=received.append, session_id='browser-1')
+
+        assert received == ['Hello ', 'there\n!']
+        assert result['success'] == True
+        assert result['data']['response'] == 'Hello there\n!'
+        assert result['data']['first_token_ms'] is not None
+        assert mock_post.call_args[0][0].endswith('/chat/stream')
+        assert mock_post.call_args[1]['stream'] == True
+        assert mock_post.call_args[1]['json'] == {'message': 'Hi', 'session_id': 'browser-1'}
+        assert result['data']['session_id'] == 'browser-1'
+
+    @patch('streamlit_app.requests.Session.post')
+    def test_chat_with_bot_stream_error_event(self, mock_post):
+        """An error event after some chunks keeps the partial reply"""
+        mock_post.return_value = self.sse_response([
+            'event: chunk', 'data: {"text": "Half"}', '',
+            'event: error', 'data: {"error": "stream broke"}', '',
+        ])
+
+        result = APIClient.chat_with_bot('Hi', on_chunk=lambda text: None)
+
+        assert result['success'] == False
+        assert result['message'] == 'stream broke'
+        assert result['data']['response'] == 'Half'
+
+    @patch('streamlit_app.requests.Session.post')
+    def test_chat_with_bot_stream_http_error(self, mock_post):
+        """Errors raised before the stream starts come back as JSON"""
+        response = self.sse_response([], status_code=503)
+        response.json.return_value = {'error': 'Agent not configured'}
+        mock_post.return_value = response
+
+        result = APIClient.chat_with_bot('Hi', on_chunk=lambda text: None)
+
+        assert result['success'] == False
+        assert result['message'] == 'Agent not configured'
+
+    @patch('streamlit_app.requests.Session.post')
+    def test_chat_with_bot_without_callback_uses_chat(self, mock_post):
+        """Without on_chunk the plain /chat endpoint is used"""
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {'response': 'Hello!'}
+        mock_post.return_value = mock_response
+
+        result = APIClient.chat_with_bot('Hi')
+
+        assert result['data']['response'] == 'Hello!'
+        assert mock_post.call_args[0][0].endswith('/chat')
+
+class TestHTTPClient:
+    """Test the shared session and concurrent calls"""
+
+    def test_session_is_shared_and_pooled(self):
+        """Every call reuses one kept-alive pool and no cookies are kept"""
+        session = get_http_session()
+        assert get_http_session() is session
+        assert session.get_adapter('http://movies.services.svc.cluster.local:8081')._pool_maxsize >= 8
+        assert session.cookies.get_policy().allowed_domains() == ()
+
+    def test_gather_runs_calls_concurrently(self):
+        """Five 0.2s calls take about 0.2s, results are returned by key"""
+        import time
+
+        def slow(value):
+            time.sleep(0.2)
+            return {'success': True, 'data': value}
+
+        started = time.perf_counter()
+        results = APIClient.gather({i: lambda i=i: slow(i) for i in range(5)})
+        elapsed = time.perf_counter() - started
+
+        assert [results[i]['data'] for i in range(5)] == [0, 1, 2, 3, 4]
+        assert elapsed < 0.6
+
+    def test_gather_reports_failed_call(self):
+        """A call that raises becomes a failed result, the others still return"""
+        def broken():
+            raise ValueError('boom')
+
+        results = APIClient.gather({'ok': lambda: {'success': True}, 'broken': broken})
+
+        assert results['ok'] == {'success': True}
+        assert results['broken']['success'] == False
+        assert 'boom' in results['broken']['message']
+
+    def test_workers_drop_the_session_context_after_gather(self):
+        """Pooled threads do not keep one browser session's context for the next task"""
+        import threading
+        import streamlit_app
+        from unittest.mock import Mock
+        attr = streamlit_app.SCRIPT_RUN_CONTEXT_ATTR_NAME
+        ctx = Mock()
+
+        def call():
+            return {'success': True, 'data': getattr(threading.current_thread(), attr, None)}
+
+        with patch('streamlit_app.get_script_run_ctx', return_value=ctx):
+            results = APIClient.gather({i: call for i in range(3)})
+
+        assert [results[i]['data'] for i in range(3)] == [ctx] * 3
+        workers = streamlit_app.get_executor()._threads
+        assert workers
+        assert all(getattr(thread, attr, None) is None for thread in workers)
+
+class TestCaching:
+    """Test the cached lookups"""
+
+    @patch('streamlit_app.requests.Session.get')
+    def test_item_lookup_is_cached(self, mock_get):
+        """Item metadata is fetched once and then served from the cache"""
+        mock_get.return_value = json_response({'Title': 'Arrival'})
+
+        first = APIClient.get_movie_by_id('tt2543164')
+        second = APIClient.get_movie_by_id('tt2543164')
+
+        assert first == second == {'success': True, 'data': {'Title': 'Arrival'}}
+        assert mock_get.call_count == 1
+        item = next(row for row in cache_report() if row['data'] == 'item')
+        assert (item['calls'], item['hits'], item['misses'], item['hit rate']) == (2, 1, 1, '50%')
+
+    @patch('streamlit_app.requests.Session.get')
+    def test_failed_lookup_is_not_cached(self, mock_get):
+        """An error is returned as before and the next call tries again"""
+        mock_get.return_value = json_response({'error': 'Not found'}, status_code=404)
+
+        assert APIClient.get_series_by_id('tt0000000')['success'] == False
+        mock_get.return_value = json_response({'Title': 'Dark'})
+        assert APIClient.get_series_by_id('tt0000000')['data'] == {'Title': 'Dark'}
+        assert mock_get.call_count == 2
+
+    @patch('streamlit_app.requests.Session.post')
+    @patch('streamlit_app.requests.Session.get')
+    def test_adding_favorite_invalidates_favorites(self, mock_get, mock_post):
+        """Favorites are fetched again after the user adds one"""
+        mock_get.return_value = json_response([{'Title': 'Shrek'}])
+        mock_post.return_value = json_response({'message': 'added to favorites'})
+
+        APIClient.get_favorite_movies('test@example.com')
+        APIClient.get_favorite_movies('test@example.com')
+        assert mock_get.call_count == 1
+
+        APIClient.add_favorite_movie('test@example.com', 'Arrival')
+        mock_get.return_value = json_response([{'Title': 'Shrek'}, {'Title': 'Arrival'}])
+
+        assert len(APIClient.get_favorite_movies('test@example.com')['data']) == 2
+        assert mock_get.call_count == 2
+        favorites = next(row for row in cache_report() if row['data'] == 'favorites')
+        assert favorites['invalidations'] == 1
+
+    @patch('streamlit_app.requests.Session.post')
+    @patch('streamlit_app.requests.Session.get')
+    def test_favorite_invalidates_only_that_user(self, mock_get, mock_post):
+        """Another user's cached favorites survive someone adding a favorite"""
+        mock_get.return_value = json_response([{'Title': 'Shrek'}])
+        mock_post.return_value = json_response({'message': 'added to favorites'})
+        APIClient.get_favorite_movies('a@example.com')
+        APIClient.get_favorite_movies('b@example.com')
+
+        APIClient.add_favorite_movie('a@example.com', 'Arrival')
+        APIClient.get_favorite_movies('a@example.com')
+        APIClient.get_favorite_movies('b@example.com')
+
+        fetched = [call[0][0].rsplit('/', 1)[1] for call in mock_get.call_args_list]
+        assert fetched == ['a@example.com', 'b@example.com', 'a@example.com']
+
+class TestBulkItems:
+    """Test the bulk item lookups"""
+
+    @patch('streamlit_app.requests.Session.get')
+    def test_one_request_for_many_items(self, mock_get):
+        """Fifty favorites need one request; unchanged lists are revalidated with the ETag"""
+        ids = [f'tt{i:07d}' for i in range(50)]
+        mock_get.return_value = json_response(
+            {'items': [{'imdbID': imdb_id, 'Title': f'Movie {imdb_id}'} for imdb_id in ids[1:]], 'missing': ids[:1]},
+            headers={'ETag': '"v1"'})
+
+        first = APIClient.get_items_by_ids('movies', ids)
+
+        assert mock_get.call_count == 1
+        assert '/api/movies/items?ids=tt0000000,tt0000001,' in mock_get.call_args[0][0]
+        assert first[ids[1]] == {'success': True, 'data': {'imdbID': ids[1], 'Title': f'Movie {ids[1]}'}}
+        assert first[ids[0]]['success'] == False
+
+        mock_get.return_value = json_response(None, status_code=304)
+        second = APIClient.get_items_by_ids('movies', ids)
+
+        assert mock_get.call_args[1]['headers']['If-None-Match'] == '"v1"'
+        assert second == first
+        bulk = next(row for row in cache_report() if row['data'] == 'bulk')
+        assert (bulk['calls'], bulk['hits']) == (2, 1)
+
+    @patch('streamlit_app.requests.Session.get')
+    def test_falls_back_to_single_lookups(self, mock_get):
+        """Without the bulk endpoint each ID is looked up on its own"""
+        def respond(url, **kwargs):
+            if '/items?' in url:
+                return json_response({'error': 'not found'}, status_code=404)
+            return json_response({'imdbID': url.rsplit('/', 1)[-1], 'Title': 'Dark'})
+        mock_get.side_effect = respond
+
+        results = APIClient.get_items_by_ids('series', ['tt5753856', 'tt0944947'])
+
+        assert mock_get.call_count == 3
+        assert results['tt0944947']['data']['imdbID'] == 'tt0944947'
+
+class TestFavoritesPages:
+    """Test paged favorites"""
+
+    @patch('streamlit_app.requests.Session.get')
+    def test_page_by_cursor(self, mock_get):
+        """Pages come from user-service and the cursor is passed on"""
+        mock_get.return_value = json_response({'items': [{'Title': 'Arrival', 'imdbID': 'tt2543164'}],
+                                               'next_cursor': 'abc'})
+
+        result = APIClient.get_favorites_page('movies', 'test@example.com', 'xyz')
+
+        assert result['data']['next_cursor'] == 'abc'
+        assert '/api/favorites/movies/test@example.com/page?limit=12&cursor=xyz' in mock_get.call_args[0][0]
+
+    @patch('streamlit_app.requests.Session.get')
+    def test_pages_full_list_without_page_endpoint(self, mock_get):
+        """An older user-service without pages is paged here"""
+        favorites = [{'Title': f'Movie {i}', 'imdbID': f'tt{i:07d}'} for i in range(30)]
+        def respond(url, **kwargs):
+            if '/page?' in url:
+                return json_response({'detail': 'Not Found'}, status_code=404)
+            return json_response(favorites)
+        mock_get.side_effect = respond
+
+        first = APIClient.get_favorites_page('series', 'test@example.com', None)
+        second = APIClient.get_favorites_page('series', 'test@example.com', first['data']['next_cursor'])
+        third = APIClient.get_favorites_page('series', 'test@example.com', second['data']['next_cursor'])
+
+        assert first['data']['items'] == favorites[:12]
+        assert second['data']['items'] == favorites[12:24]
+        assert third['data'] == {'items': favorites[24:], 'next_cursor': None}
+        assert mock_get.call_count == 2
+
+    @patch('streamlit_app.requests.Session.get')
+    def test_rejected_or_foreign_cursor_restarts_at_first_page(self, mock_get):
+        """A cursor from another user's list, or one user-service rejects, goes back to page 0"""
+        from streamlit_app import favorites_page, logout
+        def respond(url, **kwargs):
+            if 'cursor=' in url:
+                return json_response({'detail': 'Cursor belongs to another list'}, status_code=400)
+            return json_response({'items': [], 'next_cursor': None})
+        mock_get.side_effect = respond
+        st.session_state['movies_page_cursors'] = [None, 'theirs']
+        st.session_state['movies_page'] = 1
+        st.session_state['movies_page_owner'] = 'previous@example.com'
+
+        try:
+            assert favorites_page('movies', 'test@example.com') == (0, {'success': True, 'data': {
+                'items': [], 'next_cursor': None}})
+            st.session_state['movies_page_cursors'].append('stale')
+            st.session_state['movies_page'] = 1
+            page, result = favorites_page('movies', 'test@example.com')
+            assert (page, result['success']) == (0, True)
+            assert st.session_state['movies_page_cursors'] == [None]
+
+            logout()
+            assert 'movies_page_cursors' not in st.session_state and 'movies_page' not in st.session_state
+        finally:
+            for key in ('movies_page_cursors', 'movies_page', 'movies_page_owner'):
+                st.session_state.pop(key, None)
+
+class TestRequestTimings:
+    """Test backend call timings"""
+
+    def test_route_templates(self):
+        assert route_template('http://movies:8081/api/movies/id/tt0111161') == '/api/movies/id/{imdb_id}'
+        assert route_template('http://user:8080/api/favorites/series/a%40b.com/Dark%20Matter?imdb_id=tt1') == \
+            '/api/favorites/series/{email}/{title}'
+        assert route_template('http://user:8080/api/favorites/movies/a@b.com/page?cursor=x') == \
+            '/api/favorites/movies/{email}/page'
+
+    def test_calls_are_recorded(self):
+        """Calls through the shared session land in the session's buffer and the histograms"""
+        import streamlit_app
+        from requests.models import Response
+
+        def send(adapter, request, **kwargs):
+            response = Response()
+            response.status_code = 404 if 'missing' in request.url else 200
+            response._content = b'{}'
+            response.url = request.url
+            return response
+
+        with patch('requests.adapters.HTTPAdapter.send', send), \
+                patch('streamlit_app.get_script_run_ctx', return_value=object()):
+            streamlit_app.start_page_timing('Movies')
+            APIClient.make_request('GET', 'http://movies.services.svc.cluster.local:8081/api/movies/id/tt2543164')
+            APIClient.make_request('GET', 'http://movies.services.svc.cluster.local:8081/api/movies/id/missing')
+
+        timings = list(st.session_state['request_timings'])
+        assert [(t['page'], t['service'], t['status']) for t in timings] == [('Movies', 'movies', '200'),
+                                                                            ('Movies', 'movies', '404')]
+        assert timings[0]['start'] <= timings[1]['start']
+        report = {row['route']: row for row in streamlit_app.get_request_metrics().report()}
+        assert report['/api/movies/id/{imdb_id}']['calls'] == 1
+        assert report['/api/movies/id/missing']['errors'] == 1
+
+    def test_openmetrics_histogram(self):
+        """Cumulative buckets, count, sum and status counters, ending with # EOF"""
+        metrics = RequestMetrics()
+        for seconds in (0.02, 0.04, 0.09, 0.6):
+            metrics.observe('search', 'GET', '/api/search', '200', seconds)
+
+        text = metrics.openmetrics()
+
+        labels = 'service="search",method="GET",route="/api/search"'
+        assert f'frontend_backend_request_duration_seconds_bucket{{{labels},le="0.05"}} 2' in text
+        assert f'frontend_backend_request_duration_seconds_bucket{{{labels},le="+Inf"}} 4' in text
+        assert f'frontend_backend_request_duration_seconds_count{{{labels}}} 4' in text
+        assert f'frontend_backend_requests_total{{{labels},status="200"}} 4' in text
+        assert text.endswith('# EOF\n')
+        row = metrics.report()[0]
+        assert 25 <= row['p50 ms'] <= 50 and row['p99 ms'] >= 500
+
+class TestPosters:
+    """Test posters through the poster proxy"""
+
+    @patch('streamlit_app.requests.Session.get')
+    def test_poster_fetched_once_from_proxy(self, mock_get):
+        """The resized JPEG comes from the proxy and is then served from the cache"""
+        mock_get.return_value = json_response(None)
+        mock_get.return_value.content = b'jpeg bytes'
+        url = 'https://m.media-amazon.com/images/M/poster.jpg'
+
+        APIClient.prefetch_posters([url, url, 'N/A'], 150)
+        result = APIClient.get_poster(url, 150)
+
+        assert result == {'success': True, 'data': b'jpeg bytes'}
+        assert mock_get.call_count == 1
+        assert mock_get.call_args[0][0].endswith('/posters/150')
+        assert mock_get.call_args[1]['params'] == {'url': url, 'format': 'jpeg'}
+
+    @patch('streamlit_app.st.image')
+    @patch('streamlit_app.requests.Session.get')
+    def test_falls_back_to_original_url(self, mock_get, mock_image):
+        """If the proxy fails the browser loads the original poster as before"""
+        from streamlit_app import show_poster
+        mock_get.return_value = json_response({'error': 'Upstream unavailable'}, status_code=502)
+        url = 'https://m.media-amazon.com/images/M/poster.jpg'
+
+        show_poster(url, 200, 'Arrival')
+
+        mock_image.assert_called_once_with(url, width=200, caption='Arrival')
+
+class TestEventSender:
+    """Test the background analytics sender"""
+
+    def sender(self, session, tmp_path, **kwargs):
+        options = dict(batch_size=50, flush_interval=0.05, spill_path=str(tmp_path / 'spill.jsonl'))
+        options.update(kwargs)
+        return EventSender('http://kinesis:3000', 'events', 'us-east-1', session=session, **options)
+
+    def test_send_kinesis_event_only_queues(self, fresh_caches):
+        """The page hands the event to the sender and does no HTTP itself"""
+        APIClient.send_kinesis_event('movies_search', 'test@example.com', {'query': 'Arrival'})
+
+        partition_key, event_type, data = fresh_caches.return_value.send.call_args[0]
+        assert (partition_key, event_type) == ('test@example.com', 'movies_search')
+        assert data['query'] == 'Arrival' and data['user_id'] == 'test@example.com'
+
+    def test_events_are_sent_in_batches(self, tmp_path):
+        """A hundred queued events go out in a few /produce/batch requests"""
+        session = MagicMock()
+        session.post.side_effect = lambda url, json, timeout: json_response({'failed': []})
+        sender = self.sender(session, tmp_path)
+
+        for i in range(100):
+            assert sender.send(f'user{i}', 'movies_search', {'query': i})
+        assert sender.flush(timeout=5)
+
+        assert 2 <= session.post.call_count <= 10
+        assert all(call[0][0] == 'http://kinesis:3000/produce/batch' for call in session.post.call_args_list)
+        sent = [record['data']['query'] for call in session.post.call_args_list for record in call[1]['json']['records']]
+        assert sent == list(range(100))
+        assert sender.stats()['sent'] == 100
+        sender.close()
+
+    def test_spilled_while_producer_is_down_then_replayed(self, tmp_path):
+        """Events survive an outage on disk and are sent once the producer is back"""
+        import requests
+        session = MagicMock()
+        session.post.side_effect = requests.exceptions.ConnectionError('down')
+        sender = self.sender(session, tmp_path)
+
+        sender.send('user', 'user_login', {'n': 1})
+        sender.send('user', 'user_login', {'n': 2})
+        assert sender.flush(timeout=5)
+        assert sender.stats()['spilled'] == 2
+        assert sender.stats()['sent'] == 0
+
+        session.post.side_effect = lambda url, json, timeout: json_response({'failed': []})
+        sender._retry_at = 0
+        sender.send('user', 'user_login', {'n': 3})
+        assert sender.flush(timeout=5)
+
+        stats = sender.stats()
+        assert (stats['sent'], stats['replayed'], stats['spilled'], stats['spill_bytes']) == (3, 2, 0, 0)
+        sender.close()
+
+    def test_rejected_batch_is_split_and_not_retried(self, tmp_path):
+        """A 400 drops only the bad event; nothing is spilled and delivery does not back off"""
+        session = MagicMock()
+        def produce(url, json, timeout):
+            bad = any(record['data'].get('bad') for record in json['records'])
+            return json_response({'error': 'Record invalid'}, status_code=400) if bad else json_response({'failed': []})
+        session.post.side_effect = produce
+        sender = self.sender(session, tmp_path)
+
+        assert not sender.send('', 'movies_search', {'query': 1})
+        for i in range(8):
+            sender.send('user', 'movies_search', {'query': i, 'bad': i == 5})
+        assert sender.flush(timeout=5)
+
+        stats = sender.stats()
+        assert (stats['sent'], stats['rejected'], stats['spilled'], stats['failed_batches']) == (7, 2, 0, 0)
+        assert sender._retry_at == 0.0
+        sender.close()
+
+    def test_unreadable_spill_lines_are_skipped_and_counted(self, tmp_path):
+        """A damaged spill file costs only its bad lines"""
+        spill = tmp_path / 'spill.jsonl'
+        good = '{"partitionKey": "user", "event_type": "user_login", "data": {"n": 1}}\n'
+        spill.write_text(good + '{"partitionKey": "us\n' + '{"event_type": "no key"}\n' + good)
+        session = MagicMock()
+        session.post.side_effect = lambda url, json, timeout: json_response({'failed': []})
+        sender = self.sender(session, tmp_path)
+
+        sender._replay_spill()
+
+        stats = sender.stats()
+        assert (stats['sent'], stats['replayed'], stats['dropped'], stats['spilled']) == (2, 2, 2, 0)
+        assert not spill.exists() and not (tmp_path / 'spill.jsonl.replay').exists()
+
+    def test_full_queue_drops_without_blocking(self, tmp_path):
+        """A full queue costs the caller nothing and is counted"""
+        sender = self.sender(MagicMock(), tmp_path, max_queue=2)
+        sender._thread = MagicMock()  # no worker draining the queue
+
+        results = [sender.send('user', 'movies_likes', {'n': i}) for i in range(5)]
+
+        assert results == [True, True, False, False, False]
+        assert sender.stats()['dropped'] == 3
+
 class TestMessageDisplay:
     """Test message display functions"""
     
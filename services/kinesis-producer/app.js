@@ -41,6 +41,50 @@ app.post('/produce', async (req, res) => {
   }
 });
 
+// Many events in one PutRecords call (at most 500). Records Kinesis
+// rejects (throttling) are listed by index in `failed` so the caller can
+// send them again.
+const MAX_BATCH_RECORDS = 500;
+
+app.post('/produce/batch', async (req, res) => {
+  const { streamName, region, records } = req.body;
+
+  if (!streamName || !region || !Array.isArray(records) || records.length === 0) {
+    return res.status(400).json({ error: 'streamName, region and a non-empty records array are required.' });
+  }
+  if (records.length > MAX_BATCH_RECORDS) {
+    return res.status(400).json({ error: `At most ${MAX_BATCH_RECORDS} records per batch.` });
+  }
+  const invalid = records.findIndex(record => !record || !record.partitionKey || !record.event_type || !record.data);
+  if (invalid !== -1) {
+    return res.status(400).json({ error: `Record ${invalid}: partitionKey, event_type, and data are required.` });
+  }
+
+  AWS.config.update({ region });
+  const kinesis = new AWS.Kinesis();
+
+  const params = {
+    StreamName: streamName,
+    Records: records.map(record => ({
+      Data: Buffer.from(JSON.stringify({
+        event_type: record.event_type,
+        ...record.data
+      })),
+      PartitionKey: record.partitionKey
+    }))
+  };
+
+  try {
+    const result = await kinesis.putRecords(params).promise();
+    const failed = result.Records
+      .map((record, index) => (record.ErrorCode ? index : -1))
+      .filter(index => index !== -1);
+    res.status(200).json({ message: 'Records sent to Kinesis', sent: records.length - failed.length, failed });
+  } catch (err) {
+    res.status(500).json({ error: err.message });
+  }
+});
+
 
 if (require.main === module) {
   app.listen(port, () => {
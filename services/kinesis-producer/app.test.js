@@ -2,10 +2,20 @@ jest.mock('aws-sdk', () => {
   const putRecordMock = jest.fn().mockReturnValue({
     promise: jest.fn().mockRejectedValue(new Error("Kinesis failed"))
   });
+  // Second record of every batch is throttled
+  const putRecordsMock = jest.fn(params => ({
+    promise: jest.fn().mockResolvedValue({
+      FailedRecordCount: params.Records.length > 1 ? 1 : 0,
+      Records: params.Records.map((record, index) => (
+        index === 1 ? { ErrorCode: 'ProvisionedThroughputExceededException' } : { SequenceNumber: String(index) }
+      ))
+    })
+  }));
 
   return {
     Kinesis: jest.fn(() => ({
-      putRecord: putRecordMock
+      putRecord: putRecordMock,
+      putRecords: putRecordsMock
     })),
     config: {
       update: jest.fn()
@@ -54,3 +64,40 @@ describe('POST /produce', () => {
     expect(response.body.error).toBe("Kinesis failed");
   });
 });
+
+describe('POST /produce/batch', () => {
+  const record = (event_type) => ({ partitionKey: 'user@example.com', event_type, data: { source: 'frontend' } });
+
+  it('should return 400 if records are missing', async () => {
+    const response = await request(app)
+      .post('/produce/batch')
+      .send({ streamName: "test-stream", region: "us-east-1", records: [] });
+    expect(response.statusCode).toBe(400);
+    expect(response.body.error).toMatch(/records/);
+  });
+
+  it('should return 400 for a record without event_type', async () => {
+    const response = await request(app)
+      .post('/produce/batch')
+      .send({
+        streamName: "test-stream",
+        region: "us-east-1",
+        records: [record('user_login'), { partitionKey: 'abc', data: {} }]
+      });
+    expect(response.statusCode).toBe(400);
+    expect(response.body.error).toMatch(/Record 1/);
+  });
+
+  it('should report throttled records by index', async () => {
+    const response = await request(app)
+      .post('/produce/batch')
+      .send({
+        streamName: "test-stream",
+        region: "us-east-1",
+        records: [record('user_login'), record('movies_search'), record('movies_likes')]
+      });
+    expect(response.statusCode).toBe(200);
+    expect(response.body.sent).toBe(2);
+    expect(response.body.failed).toEqual([1]);
+  });
+});
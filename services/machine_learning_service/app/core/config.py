@@ -13,6 +13,16 @@ class Settings(BaseSettings):
     movies_campaign_arn: str = os.getenv('MOVIES_CAMPAIGN_ARN', '')
     series_dataset_arn: str = os.getenv('SERIES_DATASET_ARN', '')
     movies_dataset_arn: str = os.getenv('MOVIES_DATASET_ARN', '')
+
+    # Personalize runtime/events calls: retries with jittered backoff inside a
+    # per-request deadline, and a circuit breaker that fails fast with 503
+    personalize_max_attempts: int = int(os.getenv('PERSONALIZE_MAX_ATTEMPTS', '3'))
+    personalize_deadline_seconds: float = float(os.getenv('PERSONALIZE_DEADLINE_SECONDS', '5'))
+    personalize_breaker_failures: int = int(os.getenv('PERSONALIZE_BREAKER_FAILURES', '5'))
+    personalize_breaker_recovery_seconds: float = float(os.getenv('PERSONALIZE_BREAKER_RECOVERY_SECONDS', '30'))
+
+    # /ready serves the result of a background Personalize check run this often
+    ready_check_interval_seconds: float = float(os.getenv('READY_CHECK_INTERVAL_SECONDS', '30'))
     
     # .env file'ı opsiyonel yap
     class Config:
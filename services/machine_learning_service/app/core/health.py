@@ -0,0 +1,64 @@
+"""
+Background upstream checks for /ready.
+
+    monitor = HealthMonitor(check_personalize, interval=30)
+    monitor.start()           # in the lifespan; first check is the warm-up
+    monitor.status()          # (healthy, error, checked_at) or None
+
+Probes only read the last result, so however often Kubernetes calls /ready
+Personalize sees one check per interval per process.
+"""
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class HealthMonitor:
+    """
+    Runs check() in a background thread, once at start() and then every
+    interval seconds, and serves the last result. status() is None until the
+    first check has finished.
+    """
+
+    def __init__(self, check, interval=30.0, clock=time.time):
+        self.check = check
+        self.interval = interval
+        self._clock = clock
+        self._thread = None
+        self._stop = threading.Event()
+        self.result = None  # (healthy, error, checked_at)
+        self.checks = 0
+
+    def run_check(self):
+        try:
+            self.check()
+            result = (True, None, self._clock())
+        except Exception as e:
+            logger.warning("Upstream check failed: %s", e)
+            result = (False, str(e), self._clock())
+        self.result = result
+        self.checks += 1
+        return result
+
+    def _loop(self):
+        self.run_check()
+        while not self._stop.wait(self.interval):
+            self.run_check()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="health-monitor", daemon=True)
+            self._thread.start()
+
+    def status(self):
+        """(healthy, error, checked_at) of the latest check, None before the first"""
+        return self.result
+
+    def is_stale(self):
+        """True when no check finished within three intervals (a hung or dead thread)"""
+        return self.result is not None and self._clock() - self.result[2] > 3 * self.interval
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,157 @@
+"""
+Structured, sampled, non-blocking logging.
+
+Request threads only build the record and put it on a bounded queue; a
+background listener thread formats it (one JSON object per line) and writes
+it to stdout. Records below WARNING can be sampled (LOG_SAMPLE_RATE) and are
+dropped rather than blocking when the queue is full; warnings and errors are
+always kept.
+
+Used by bedrock_backend, authentication-service and machine_learning_service
+(app/core). Keep the copies identical.
+
+    setup_logging("chatbot")
+    logger.info("chat done in %d ms", elapsed_ms, extra={"session_id": sid})
+
+Always pass arguments instead of pre-formatting with f-strings: disabled
+levels then cost one isEnabledFor() check and no string building.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+
+# Attributes every LogRecord has; anything else was passed in extra=
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message and any extra= fields"""
+
+    def __init__(self, service):
+        super().__init__()
+        self.service = service
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "service": self.service,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a rate fraction of records below WARNING; warnings and errors always pass"""
+
+    def __init__(self, rate=1.0):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or self.rate >= 1 or random.random() < self.rate
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that never blocks the caller: a full queue drops the record
+    (counted in dropped) instead of waiting for the writer thread.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Merge args into msg here, while they are still what the caller
+        # passed; JSON formatting is left to the listener thread.
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener = None
+queue_handler = None
+
+
+def setup_logging(service, level=None, sample_rate=None, queue_size=None, stream=None):
+    """
+    Route the root logger through a DroppingQueueHandler to a JSON stdout writer.
+
+    level (LOG_LEVEL, default INFO), sample_rate (LOG_SAMPLE_RATE, default 1)
+    and queue_size (LOG_QUEUE_SIZE, default 10000) fall back to the environment.
+    queue_size 0 writes synchronously from the calling thread instead.
+    LOG_FORMAT=text switches to plain lines for local development. Calling it
+    again replaces the previous setup.
+    """
+    global _listener, queue_handler
+    level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+    sample_rate = float(os.getenv("LOG_SAMPLE_RATE", "1") if sample_rate is None else sample_rate)
+    queue_size = int(os.getenv("LOG_QUEUE_SIZE", "10000") if queue_size is None else queue_size)
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = queue_handler = None
+
+    writer = logging.StreamHandler(stream or sys.stdout)
+    if os.getenv("LOG_FORMAT", "json").lower() == "text":
+        writer.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    else:
+        writer.setFormatter(JsonFormatter(service))
+
+    if queue_size > 0:
+        handler = queue_handler = DroppingQueueHandler(queue.Queue(queue_size))
+        _listener = logging.handlers.QueueListener(queue_handler.queue, writer, respect_handler_level=False)
+        _listener.start()
+    else:
+        handler = writer
+    handler.addFilter(SamplingFilter(sample_rate))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+    # botocore logs every request at DEBUG; keep it quiet unless asked for
+    for name in ("botocore", "boto3", "urllib3"):
+        logging.getLogger(name).setLevel(max(logging.getLevelName(level), logging.INFO))
+    return handler
+
+
+def flush_logging(timeout=1.0):
+    """Wait (up to timeout seconds) until the writer thread has emptied the queue"""
+    if queue_handler is None:
+        return
+    deadline = time.monotonic() + timeout
+    while not queue_handler.queue.empty() and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+@atexit.register
+def _stop_listener():
+    if _listener is not None:
+        _listener.stop()
@@ -0,0 +1,203 @@
+"""
+Prometheus metrics for the ML API, rendered as text at /metrics.
+
+    app.add_middleware(MetricsMiddleware)
+    client = TimedClient(boto3_client, PERSONALIZE_CALL_DURATION)
+
+MetricsMiddleware counts requests, tracks the requests in flight and
+records latency per route template (/api/movies/recommendations/, not the
+raw path, so label values stay bounded). TimedClient records how long each
+Personalize API call took, retries included, by operation and outcome.
+"""
+import bisect
+import os
+import threading
+import time
+
+from app.core.resilience import CircuitOpenError
+
+# Seconds; Prometheus' default buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _labels(names, values, pid):
+    pairs = [f'pid="{pid}"'] + [f'{name}="{value}"' for name, value in zip(names, values)]
+    return ",".join(pairs)
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self, pid):
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{{{_labels(self.labelnames, labels, pid)}}} {value}" for labels, value in values]
+        return lines
+
+
+class Gauge(Counter):
+    def __init__(self, name, help_text, labelnames=()):
+        super().__init__(name, help_text, labelnames)
+        if not self.labelnames:
+            self._values[()] = 0
+
+    def dec(self, labels=(), amount=1):
+        self.inc(labels, -amount)
+
+    def render(self, pid):
+        lines = super().render(pid)
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, labels, seconds):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[bisect.bisect_left(self.buckets, seconds)] += 1
+            series[-1] += seconds
+
+    def count(self, labels):
+        with self._lock:
+            series = self._series.get(labels)
+            return sum(series[:-1]) if series else 0
+
+    def render(self, pid):
+        with self._lock:
+            series = sorted((labels, list(values)) for labels, values in self._series.items())
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, values in series:
+            base = _labels(self.labelnames, labels, pid)
+            cumulative = 0
+            for bound, count in zip([*self.buckets, "+Inf"], values[:-1]):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{base},le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_count{{{base}}} {cumulative}")
+            lines.append(f"{self.name}_sum{{{base}}} {values[-1]:.6f}")
+        return lines
+
+
+HTTP_REQUESTS = Counter("ml_http_requests_total", "HTTP requests by route template and status",
+                        ("method", "route", "status"))
+HTTP_IN_FLIGHT = Gauge("ml_http_requests_in_flight", "HTTP requests being served")
+HTTP_DURATION = Histogram("ml_http_request_duration_seconds", "HTTP request latency by route template",
+                          ("method", "route"))
+PERSONALIZE_CALL_DURATION = Histogram(
+    "ml_personalize_call_duration_seconds",
+    "Personalize API call latency including retries, by operation and outcome (ok, error, circuit_open)",
+    ("operation", "outcome"),
+    buckets=(0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.2, 0.3, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0),
+)
+REGISTRY = [HTTP_REQUESTS, HTTP_IN_FLIGHT, HTTP_DURATION, PERSONALIZE_CALL_DURATION]
+
+
+def render_metrics(extra=()):
+    """Prometheus text of every registered metric, plus extra lines"""
+    pid = os.getpid()
+    lines = []
+    for metric in REGISTRY:
+        lines += metric.render(pid)
+    lines += extra
+    return "\n".join(lines) + "\n"
+
+
+class TimedClient:
+    """Proxy for a boto3 (or resilient) client that records every API call in histogram"""
+
+    def __init__(self, client, histogram=PERSONALIZE_CALL_DURATION):
+        self._client = client
+        self._histogram = histogram
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr) or name.startswith("get_paginator") or name in ("can_paginate", "get_waiter"):
+            return attr
+
+        def call(*args, **kwargs):
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                result = attr(*args, **kwargs)
+                outcome = "ok"
+                return result
+            except CircuitOpenError:
+                outcome = "circuit_open"
+                raise
+            finally:
+                self._histogram.observe((name, outcome), time.perf_counter() - started)
+        return call
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording count, in-flight and latency of HTTP requests.
+    Plain ASGI rather than BaseHTTPMiddleware, so it adds microseconds and
+    sees every response, including those of the auth middleware inside it.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._templates = None
+
+    def _route_template(self, scope):
+        # Newer FastAPI includes routers lazily: scope["route"] is the route
+        # as declared on its router, without the include prefix
+        context = scope.get("fastapi", {}).get("effective_route_context")
+        if context is not None:
+            return context.path
+        route = scope.get("route")
+        if route is not None:
+            return route.path
+        # Older Starlette: the router leaves the matched endpoint in the scope
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        if self._templates is None:
+            self._templates = {
+                getattr(r, "endpoint", None): r.path for r in scope["app"].routes if hasattr(r, "path")
+            }
+        return self._templates.get(endpoint, "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = self._route_template(scope)
+            method = scope["method"]
+            HTTP_DURATION.observe((method, route), time.perf_counter() - started)
+            HTTP_REQUESTS.inc((method, route, str(status)))
@@ -0,0 +1,297 @@
+"""
+Local verification of Cognito access tokens.
+
+Tokens are checked against the user pool's JWKS (public keys), fetched once
+and cached; no Cognito call per request. A token whose kid is not in the
+cache triggers one JWKS refetch (key rotation), at most every
+min_refresh_interval seconds. Verified tokens are kept in an LRU keyed by
+the token's SHA-256 until they expire, so repeat requests skip the RSA check.
+
+The event loop never waits on the network: the JWKS is fetched at startup,
+kept fresh by a background thread, and a refetch for an unknown kid runs in
+the thread pool, one at a time.
+
+Shared by machine_learning_service and user-service (app/core/security.py).
+The copy is deliberate: each service is its own Docker build context, so
+there is no shared package to import it from. Keep the copies identical.
+
+    verifier = verifier_from_env()
+    if verifier:
+        app.add_middleware(TokenAuthMiddleware, verifier=verifier)
+
+    # in the lifespan
+    await start_jwks(verifier)
+
+Routes read the verified claims from request.state.user.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+
+import jwt
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+# Never require a token for probes, metrics and the API docs
+PUBLIC_PATHS = frozenset({"/", "/health", "/ready", "/metrics", "/docs", "/redoc", "/openapi.json"})
+
+
+class InvalidToken(Exception):
+    """The bearer token is missing, malformed, expired or not for this client"""
+
+
+class KeyRefreshNeeded(Exception):
+    """The signing key may be found by fetching the JWKS (JWKSCache.refresh), which get() never does"""
+
+    def __init__(self, kid):
+        super().__init__(f"JWKS refresh needed for kid {kid!r}")
+        self.kid = kid
+
+
+def fetch_json(url, timeout=5):
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return json.load(response)
+
+
+class JWKSCache:
+    """
+    Signing keys by kid. get() only reads memory; refresh() fetches and is
+    called from a thread: at startup (load), every ttl by the thread start()
+    runs, and for an unknown kid at most every min_refresh_interval seconds.
+    """
+
+    def __init__(self, url, ttl=3600.0, min_refresh_interval=60.0, fetch=fetch_json, clock=time.monotonic):
+        self.url = url
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self._fetch = fetch
+        self._clock = clock
+        # Held only while fetching; get() never takes it
+        self._refresh_lock = threading.Lock()
+        self._keys = {}
+        self._fetched_at = None
+        self._attempted_at = None
+        self._thread = None
+        self._stop = threading.Event()
+        self.fetches = 0
+
+    def _due(self, kid, now):
+        if self._fetched_at is None:
+            return True
+        if kid in self._keys:
+            # With the background thread running, keys never go stale here
+            return self._thread is None and now - self._fetched_at >= self.ttl
+        return self._attempted_at is None or now - self._attempted_at >= self.min_refresh_interval
+
+    def get(self, kid):
+        """Cached key for kid; raises KeyRefreshNeeded when a fetch is due, InvalidToken if unknown"""
+        if self._due(kid, self._clock()):
+            raise KeyRefreshNeeded(kid)
+        key = self._keys.get(kid)
+        if key is None:
+            raise InvalidToken("Unknown signing key")
+        return key
+
+    def refresh(self, kid=None, force=False):
+        """Fetch the JWKS if still due for kid (or if force). Blocking: call it off the event loop"""
+        with self._refresh_lock:
+            now = self._clock()
+            # Requests that queued behind a fetch find it done
+            if not force and not self._due(kid, now):
+                return
+            self._attempted_at = now
+            try:
+                jwks = self._fetch(self.url)
+            except Exception as e:
+                if not self._keys:
+                    raise
+                # Keep verifying with the keys we have; try again later
+                logger.warning("JWKS refresh from %s failed: %s", self.url, e)
+                self._fetched_at = now
+                return
+            # One assignment, so get() sees the old keys or the new ones
+            self._keys = {
+                jwk["kid"]: jwt.PyJWK(jwk, algorithm=jwk.get("alg", "RS256"))
+                for jwk in jwks.get("keys", []) if jwk.get("kid")
+            }
+            self._fetched_at = self._clock()
+            self.fetches += 1
+        logger.info("Fetched %d signing keys from %s", len(self._keys), self.url)
+
+    def load(self):
+        """Fetch the keys now (startup); blocking"""
+        self.refresh(force=True)
+
+    def start(self):
+        """Refetch every ttl seconds from a daemon thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="jwks-refresh", daemon=True)
+            self._thread.start()
+
+    def _loop(self):
+        while not self._stop.wait(self.ttl):
+            try:
+                self.refresh(force=True)
+            except Exception as e:
+                logger.warning("JWKS refresh from %s failed: %s", self.url, e)
+
+    def stop(self):
+        self._stop.set()
+
+
+class TokenVerifier:
+    """Verifies RS256 Cognito access tokens for one user pool (and optionally one app client)"""
+
+    def __init__(self, issuer, jwks, client_id=None, cache_size=10000, leeway=30, clock=time.time):
+        self.issuer = issuer
+        self.client_id = client_id
+        self.jwks = jwks
+        self.cache_size = cache_size
+        self.leeway = leeway
+        self._clock = clock
+        self._cache = OrderedDict()  # sha256(token) -> claims
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+
+    def verify(self, token):
+        """Claims of a valid token; raises InvalidToken otherwise"""
+        digest = hashlib.sha256(token.encode()).digest()
+        now = self._clock()
+        with self._lock:
+            claims = self._cache.get(digest)
+            if claims is not None:
+                if claims["exp"] + self.leeway > now:
+                    self._cache.move_to_end(digest)
+                    self.hits += 1
+                    return claims
+                del self._cache[digest]
+            self.misses += 1
+
+        try:
+            claims = self._decode(token)
+        except InvalidToken:
+            self.failures += 1
+            raise
+        except jwt.PyJWTError as e:
+            self.failures += 1
+            raise InvalidToken(str(e)) from e
+
+        with self._lock:
+            self._cache[digest] = claims
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return claims
+
+    def _decode(self, token):
+        header = jwt.get_unverified_header(token)
+        if header.get("alg") != "RS256":
+            raise InvalidToken("Unexpected signing algorithm")
+        key = self.jwks.get(header.get("kid"))
+        claims = jwt.decode(
+            token, key.key, algorithms=["RS256"], issuer=self.issuer, leeway=self.leeway,
+            # Access tokens carry client_id instead of aud
+            options={"require": ["exp", "iss", "token_use"], "verify_aud": False},
+        )
+        if claims.get("token_use") != "access":
+            raise InvalidToken("Not an access token")
+        if self.client_id and claims.get("client_id") != self.client_id:
+            raise InvalidToken("Token issued for another client")
+        return claims
+
+    def stats(self):
+        with self._lock:
+            return {"cached": len(self._cache), "hits": self.hits, "misses": self.misses,
+                    "failures": self.failures, "jwks_fetches": self.jwks.fetches}
+
+
+def verifier_from_env():
+    """TokenVerifier for COGNITO_USER_POOL_ID (and COGNITO_CLIENT_ID), or None when unset"""
+    pool_id = os.getenv("COGNITO_USER_POOL_ID")
+    if not pool_id:
+        logger.warning("COGNITO_USER_POOL_ID not set, requests are not authenticated")
+        return None
+    region = os.getenv("COGNITO_REGION") or pool_id.split("_")[0]
+    issuer = f"https://cognito-idp.{region}.amazonaws.com/{pool_id}"
+    return TokenVerifier(
+        issuer,
+        JWKSCache(f"{issuer}/.well-known/jwks.json", ttl=float(os.getenv("JWKS_TTL_SECONDS", "3600"))),
+        client_id=os.getenv("COGNITO_CLIENT_ID") or None,
+        cache_size=int(os.getenv("TOKEN_CACHE_SIZE", "10000")),
+    )
+
+
+async def start_jwks(verifier):
+    """Lifespan startup: load the signing keys off the event loop and keep them fresh"""
+    try:
+        await run_in_threadpool(verifier.jwks.load)
+    except Exception as e:
+        # The first request with a token fetches them instead
+        logger.warning("Could not load signing keys from %s: %s", verifier.jwks.url, e)
+    verifier.jwks.start()
+
+
+class TokenAuthMiddleware:
+    """
+    ASGI middleware: rejects requests without a valid bearer token with 401
+    and puts the verified claims in request.state.user. Plain ASGI rather
+    than BaseHTTPMiddleware so a cached token costs microseconds.
+    """
+
+    def __init__(self, app, verifier, public_paths=PUBLIC_PATHS):
+        self.app = app
+        self.verifier = verifier
+        self.public_paths = public_paths
+        self._refresh_lock = asyncio.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or scope["path"] in self.public_paths:
+            await self.app(scope, receive, send)
+            return
+
+        authorization = dict(scope["headers"]).get(b"authorization", b"").decode("latin-1")
+        scheme, _, token = authorization.partition(" ")
+        try:
+            if scheme.lower() != "bearer" or not token:
+                raise InvalidToken("Missing bearer token")
+            claims = await self._verify(token.strip())
+        except InvalidToken as e:
+            await self._reject(send, 401, str(e))
+            return
+        except Exception:
+            logger.exception("Token verification failed")
+            await self._reject(send, 503, "Token verification unavailable")
+            return
+
+        scope.setdefault("state", {})["user"] = claims
+        await self.app(scope, receive, send)
+
+    async def _verify(self, token):
+        try:
+            return self.verifier.verify(token)
+        except KeyRefreshNeeded as e:
+            # One fetch at a time, in the thread pool; requests waiting here
+            # for the same rotation find the new keys without fetching again
+            async with self._refresh_lock:
+                await run_in_threadpool(self.verifier.jwks.refresh, e.kid)
+        try:
+            return self.verifier.verify(token)
+        except KeyRefreshNeeded:
+            raise InvalidToken("Unknown signing key")
+
+    @staticmethod
+    async def _reject(send, status, reason):
+        body = json.dumps({"detail": reason}).encode()
+        headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        if status == 401:
+            headers.append((b"www-authenticate", b'Bearer error="invalid_token"'))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
@@ -1,20 +1,68 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.routes import movies, series  
 from app.core.config import settings
+from app.core.health import HealthMonitor
+from app.core.resilience import CircuitOpenError
+from app.core.logging_setup import setup_logging
+from app.core.metrics import MetricsMiddleware, render_metrics
+from app.core.security import TokenAuthMiddleware, start_jwks, verifier_from_env
+from datetime import datetime
 import logging
+import os
 
 
-logging.basicConfig(level=logging.INFO)
+# JSON lines via a background writer thread; see app/core/logging_setup.py
+setup_logging("machine-learning")
 logger = logging.getLogger(__name__)
 
+# The routers' services; each serves one content type
+personalize_services = {
+    'movies': movies.personalize_service,
+    'series': series.personalize_service,
+}
+
+def config_problems():
+    """Settings the service cannot work without, as messages"""
+    required = {
+        'MOVIES_CAMPAIGN_ARN': settings.movies_campaign_arn,
+        'SERIES_CAMPAIGN_ARN': settings.series_campaign_arn,
+        'MOVIES_DATASET_ARN': settings.movies_dataset_arn,
+        'SERIES_DATASET_ARN': settings.series_dataset_arn,
+    }
+    return [f"{name} is not set" for name, value in required.items() if not value.strip()]
+
+def check_personalize():
+    """Background check: load missing event trackers, then check both campaigns are ACTIVE"""
+    if config_problems():
+        raise Exception("configuration is invalid")
+    for content_type, service in personalize_services.items():
+        try:
+            # Cached after the first success, so only the warm-up calls Personalize
+            service.load_tracker(content_type)
+        except Exception as e:
+            logger.warning("Event tracker for %s unavailable: %s", content_type, e)
+    for content_type, service in personalize_services.items():
+        service.check_campaign(content_type)
+
+health_monitor = HealthMonitor(check_personalize, settings.ready_check_interval_seconds)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("🚀 Machine Learning API başlatılıyor...")
+    if token_verifier:
+        await start_jwks(token_verifier)
+    # Warm-up (trackers, credentials, connections) runs in the monitor's
+    # thread; /ready stays 503 until it has finished
+    health_monitor.start()
     yield
     # Shutdown
+    health_monitor.stop()
+    if token_verifier:
+        token_verifier.jwks.stop()
     logger.info("🛑 Machine Learning API is shutting down...")
 
 app = FastAPI(
@@ -24,6 +72,12 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Bearer tokens are verified locally against the Cognito user pool's JWKS
+# (COGNITO_USER_POOL_ID); added before CORS so 401s still get CORS headers
+token_verifier = verifier_from_env()
+if token_verifier:
+    app.add_middleware(TokenAuthMiddleware, verifier=token_verifier)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -33,6 +87,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so request counts and latency include auth rejections and CORS
+app.add_middleware(MetricsMiddleware)
+
+@app.exception_handler(CircuitOpenError)
+async def circuit_open_handler(request: Request, exc: CircuitOpenError):
+    # Personalize is failing; answer at once instead of piling up retries
+    return JSONResponse(
+        status_code=503,
+        content={"error": "Recommendation service temporarily unavailable", "detail": str(exc)},
+        headers={"Retry-After": str(max(1, round(exc.retry_after)))}
+    )
+
 # Include routers
 app.include_router(movies.router, prefix="/api/movies", tags=["movies"])
 app.include_router(series.router, prefix="/api/series", tags=["series"])
@@ -42,13 +108,59 @@ async def root():
     return {
         "message": "Machine Learning API is working! 🚀",
         "docs": "/docs",
-        "health": "/health"
+        "health": "/health",
+        "ready": "/ready"
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text: HTTP requests by route template, Personalize call latency"""
+    pid = os.getpid()
+    healthy = health_monitor.status()
+    extra = []
+    for name, kind, help_text, value in [
+        ("ml_ready", "gauge", "1 when /ready reports ready", int(readiness()[0])),
+        ("ml_upstream_healthy", "gauge", "Result of the latest background Personalize check",
+         int(bool(healthy and healthy[0]))),
+        ("ml_upstream_checks_total", "counter", "Background Personalize checks", health_monitor.checks),
+    ]:
+        extra += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f'{name}{{pid="{pid}"}} {value}']
+    return PlainTextResponse(render_metrics(extra), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 async def health_check():
     return {
         "status": "healthy",
         "service": "machine-learning-api",
         "version": "1.0.0"
-    }
\ No newline at end of file
+    }
+
+def readiness():
+    """(ready, checks) from settings, cached trackers and the last background check"""
+    problems = config_problems()
+    upstream = health_monitor.status()
+    trackers = {content_type: content_type in service.tracking_ids
+                for content_type, service in personalize_services.items()}
+    if upstream is None:
+        upstream_check = {"ok": False, "error": "warm-up has not finished"}
+    else:
+        healthy, error, checked_at = upstream
+        if health_monitor.is_stale():
+            healthy, error = False, "last check is stale"
+        upstream_check = {"ok": healthy, "error": error,
+                          "checked_at": datetime.fromtimestamp(checked_at).isoformat()}
+    checks = {
+        "config": {"ok": not problems, "problems": problems},
+        "trackers": {"ok": all(trackers.values()), "loaded": trackers},
+        "upstream": upstream_check,
+    }
+    return all(check["ok"] for check in checks.values()), checks
+
+@app.get("/ready")
+async def ready_check():
+    """Readiness: never calls Personalize, only reads the background check's result"""
+    ready, checks = readiness()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "not ready", "service": "machine-learning-api", "checks": checks}
+    )
@@ -2,8 +2,11 @@ from pydantic import BaseModel
 from typing import Dict, Optional
 from datetime import datetime
 import json
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
 class EventTracker(BaseModel):
     content_type: str
     tracker_arn: str
@@ -32,7 +35,7 @@ class InMemoryDB:
                             updated_at=datetime.fromisoformat(tracker_data['updated_at'])
                         )
             except Exception as e:
-                print(f"Error loading data: {e}")
+                logger.error("Error loading data: %s", e)
     
     def save_data(self):
         """Save data to file"""
@@ -47,7 +50,7 @@ class InMemoryDB:
             with open(self.data_file, 'w') as f:
                 json.dump(data, f, indent=2)
         except Exception as e:
-            print(f"Error saving data: {e}")
+            logger.error("Error saving data: %s", e)
     
     def get_tracker(self, content_type: str) -> Optional[EventTracker]:
         """Get event tracker by content type"""
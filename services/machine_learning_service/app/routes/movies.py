@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException
 from app.services.personalize_service import PersonalizeService
+from app.core.resilience import CircuitOpenError
 from app.models.schemas import (
     RecommendationRequest,
     EventRequest,
@@ -33,8 +34,10 @@ async def get_movies_recommendation(request: RecommendationRequest):
             count=len(recommendations),
             message=f"Successfully retrieved {len(recommendations)} movie recommendations"
         )
+    except CircuitOpenError:
+        raise
     except Exception as e:
-        logger.error(f"Movies recommendation error: {str(e)}")
+        logger.error("Movies recommendation error: %s", e)
         raise HTTPException(
             status_code=500,
             detail=ErrorResponse(
@@ -63,8 +66,10 @@ async def get_movies_recommendations_get(user_id: str = "yurtseveronr@gmail.com"
             count=len(recommendations),
             message=f"Successfully retrieved {len(recommendations)} movie recommendations"
         )
+    except CircuitOpenError:
+        raise
     except Exception as e:
-        logger.error(f"Movies recommendation error: {str(e)}")
+        logger.error("Movies recommendation error: %s", e)
         raise HTTPException(
             status_code=500,
             detail=ErrorResponse(
@@ -93,8 +98,10 @@ async def create_movie_event(request: EventRequest):
             message=f"Movie interaction event successfully recorded: {request.event_type}",
             event_id=event_id
         )
+    except CircuitOpenError:
+        raise
     except Exception as e:
-        logger.error(f"Movies event error: {str(e)}")
+        logger.error("Movies event error: %s", e)
         raise HTTPException(
             status_code=500,
             detail=ErrorResponse(
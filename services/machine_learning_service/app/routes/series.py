@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException
 from app.services.personalize_service import PersonalizeService
+from app.core.resilience import CircuitOpenError
 from app.models.schemas import (
     RecommendationRequest,
     EventRequest,
@@ -33,8 +34,10 @@ async def get_series_recommendation(request: RecommendationRequest):
             count=len(recommendations),
             message=f"Successfully retrieved {len(recommendations)} series recommendations"
         )
+    except CircuitOpenError:
+        raise
     except Exception as e:
-        logger.error(f"Series recommendation error: {str(e)}")
+        logger.error("Series recommendation error: %s", e)
         raise HTTPException(
             status_code=500,
             detail=ErrorResponse(
@@ -63,8 +66,10 @@ async def get_series_recommendations_get(user_id: str = "yurtseveronr@gmail.com"
             count=len(recommendations),
             message=f"Successfully retrieved {len(recommendations)} series recommendations"
         )
+    except CircuitOpenError:
+        raise
     except Exception as e:
-        logger.error(f"Series recommendation error: {str(e)}")
+        logger.error("Series recommendation error: %s", e)
         raise HTTPException(
             status_code=500,
             detail=ErrorResponse(
@@ -94,8 +99,10 @@ async def create_series_event(request: EventRequest):
             message=f"Series interaction event successfully recorded: {request.event_type}",
             event_id=event_id
         )
+    except CircuitOpenError:
+        raise
     except Exception as e:
-        logger.error(f"Series event error: {str(e)}")
+        logger.error("Series event error: %s", e)
         raise HTTPException(
             status_code=500,
             detail=ErrorResponse(
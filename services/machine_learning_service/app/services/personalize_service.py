@@ -1,29 +1,52 @@
 # app/services/personalize_service.py
+import asyncio
 import boto3
 import time
+from botocore.config import Config
+from botocore.exceptions import ClientError
 from datetime import datetime
 from typing import List, Dict, Any
 from app.core.config import settings
+from app.core.metrics import TimedClient
+from app.core.resilience import CircuitBreaker, CircuitOpenError, ResilientClient, RetryPolicy
 from app.models.database import db
 from app.models.schemas import RecommendationItem
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Retries are done by RetryPolicy; botocore's own would multiply them
+no_retries = Config(retries={'max_attempts': 1, 'mode': 'standard'})
+# One breaker per AWS service, shared by the movies and series routers
+breakers = {}
+
+def resilient(service_name: str) -> ResilientClient:
+    """boto3 client whose calls are retried and guarded by a per-service circuit breaker"""
+    policy = RetryPolicy(
+        max_attempts=settings.personalize_max_attempts,
+        base_delay=0.1,
+        max_delay=1.0,
+        deadline=settings.personalize_deadline_seconds
+    )
+    breaker = breakers.setdefault(service_name, CircuitBreaker(
+        service_name,
+        failure_threshold=settings.personalize_breaker_failures,
+        recovery_timeout=settings.personalize_breaker_recovery_seconds
+    ))
+    client = boto3.client(service_name, region_name=settings.aws_region, config=no_retries)
+    return ResilientClient(client, policy, breaker)
+
 class PersonalizeService:
     def __init__(self):
-        self.runtime_client = boto3.client(
-            'personalize-runtime',
-            region_name=settings.aws_region
-        )
-        self.personalize_client = boto3.client(
+        # Every call's latency goes to ml_personalize_call_duration_seconds
+        self.runtime_client = TimedClient(resilient('personalize-runtime'))
+        self.personalize_client = TimedClient(boto3.client(
             'personalize',
             region_name=settings.aws_region
-        )
-        self.events_client = boto3.client(
-            'personalize-events',
-            region_name=settings.aws_region
-        )
+        ))
+        self.events_client = TimedClient(resilient('personalize-events'))
+        # content type -> tracking ID, resolved once instead of per event
+        self.tracking_ids: Dict[str, str] = {}
 
     async def get_recommendations(
         self, 
@@ -34,7 +57,7 @@ class PersonalizeService:
         """Get recommendations for a user using RELATED_ITEMS recipe"""
         try:
             campaign_arn = self._get_campaign_arn(content_type)
-            logger.info(f"Getting recommendations for user {user_id}, content_type: {content_type}")
+            logger.debug("Getting recommendations for user %s, content_type: %s", user_id, content_type)
             
             # Both movies and series use RELATED_ITEMS recipe - need itemId
             response = self.runtime_client.get_recommendations(
@@ -51,11 +74,14 @@ class PersonalizeService:
                 for item in response.get('itemList', [])
             ]
             
-            logger.info(f"Successfully retrieved {len(recommendations)} recommendations")
+            logger.info("Retrieved %d %s recommendations", len(recommendations), content_type,
+                        extra={"content_type": content_type, "count": len(recommendations)})
             return recommendations
             
+        except CircuitOpenError:
+            raise
         except Exception as e:
-            logger.error(f"Error getting recommendations: {str(e)}")
+            logger.error("Error getting recommendations: %s", e)
             raise Exception(f"Error getting recommendations: {str(e)}")
 
     async def create_event(
@@ -67,8 +93,11 @@ class PersonalizeService:
     ) -> str:
         """Create an event for user interaction"""
         try:
-            tracking_id = await self._get_or_create_event_tracker(content_type)
-            logger.info(f"Creating event for user {user_id}, item {item_id}, type: {event_type}")
+            tracking_id = self.tracking_ids.get(content_type)
+            if tracking_id is None:
+                tracking_id = await self._get_or_create_event_tracker(content_type)
+                self.tracking_ids[content_type] = tracking_id
+            logger.debug("Creating event for user %s, item %s, type: %s", user_id, item_id, event_type)
             
             event_id = f"{user_id}_{item_id}_{int(time.time())}"
             timestamp = datetime.utcnow().timestamp()
@@ -81,20 +110,45 @@ class PersonalizeService:
                 'sentAt': datetime.utcnow().timestamp()
             }
             
-            self.events_client.put_events(
-                trackingId=tracking_id,
-                userId=user_id,
-                sessionId=f"session_{user_id}_{int(time.time())}",
-                eventList=[event]
-            )
-            
-            logger.info(f"Successfully created event {event_id} for user {user_id}")
+            try:
+                self.events_client.put_events(
+                    trackingId=tracking_id,
+                    userId=user_id,
+                    sessionId=f"session_{user_id}_{int(time.time())}",
+                    eventList=[event]
+                )
+            except ClientError as e:
+                # Only a deleted tracker invalidates the cached ID; a rejected
+                # event says nothing about it (and /ready needs it)
+                if e.response.get('Error', {}).get('Code') == 'ResourceNotFoundException':
+                    self.tracking_ids.pop(content_type, None)
+                raise
+            
+            logger.info("Successfully created event %s for user %s", event_id, user_id)
             return event_id
             
+        except CircuitOpenError:
+            raise
         except Exception as e:
-            logger.error(f"Error creating event: {str(e)}")
+            logger.error("Error creating event: %s", e)
             raise Exception(f"Error creating event: {str(e)}")
 
+    def load_tracker(self, content_type: str) -> str:
+        """Resolve and cache the tracking ID from a worker thread (startup warm-up)"""
+        tracking_id = self.tracking_ids.get(content_type)
+        if tracking_id is None:
+            tracking_id = asyncio.run(self._get_or_create_event_tracker(content_type))
+            self.tracking_ids[content_type] = tracking_id
+        return tracking_id
+
+    def check_campaign(self, content_type: str) -> None:
+        """Raise unless the content type's campaign exists and is ACTIVE"""
+        campaign = self.personalize_client.describe_campaign(
+            campaignArn=self._get_campaign_arn(content_type)
+        )['campaign']
+        if campaign.get('status') != 'ACTIVE':
+            raise Exception(f"{content_type} campaign is {campaign.get('status')}")
+
     def _get_campaign_arn(self, content_type: str) -> str:
         """Get campaign ARN based on content type"""
         if content_type == 'movies':
@@ -119,17 +173,17 @@ class PersonalizeService:
             # First check if event tracker exists in our database
             tracker = db.get_tracker(content_type)
             if tracker:
-                logger.info(f"Using existing event tracker for {content_type}: {tracker.tracker_arn}")
+                logger.info("Using existing event tracker for %s: %s", content_type, tracker.tracker_arn)
                 try:
                     # Get tracking ID from the tracker ARN
                     describe_response = self.personalize_client.describe_event_tracker(
                         eventTrackerArn=tracker.tracker_arn
                     )
                     tracking_id = describe_response['eventTracker']['trackingId']
-                    logger.info(f"Retrieved tracking ID: {tracking_id}")
+                    logger.info("Retrieved tracking ID: %s", tracking_id)
                     return tracking_id
                 except Exception as describe_error:
-                    logger.error(f"Error describing event tracker: {str(describe_error)}")
+                    logger.error("Error describing event tracker: %s", describe_error)
                     # If describe fails, continue to list trackers
 
             # Get dataset group ARN
@@ -137,7 +191,7 @@ class PersonalizeService:
             dataset_group_arn = dataset_arn.replace(':dataset/', ':dataset-group/')
             
             # List existing event trackers for this dataset group
-            logger.info(f"Listing event trackers for dataset group: {dataset_group_arn}")
+            logger.info("Listing event trackers for dataset group: %s", dataset_group_arn)
             response = self.personalize_client.list_event_trackers(
                 datasetGroupArn=dataset_group_arn
             )
@@ -147,21 +201,21 @@ class PersonalizeService:
                 # Use the first available event tracker
                 existing_tracker = response['eventTrackers'][0]
                 tracker_arn = existing_tracker['eventTrackerArn']
-                logger.info(f"Found existing event tracker: {tracker_arn}")
+                logger.info("Found existing event tracker: %s", tracker_arn)
                 
                 # Get tracking ID
                 describe_response = self.personalize_client.describe_event_tracker(
                     eventTrackerArn=tracker_arn
                 )
                 tracking_id = describe_response['eventTracker']['trackingId']
-                logger.info(f"Retrieved tracking ID: {tracking_id}")
+                logger.info("Retrieved tracking ID: %s", tracking_id)
                 
                 # Save to our database for future use
                 db.create_tracker(content_type, tracker_arn)
                 return tracking_id
             
             # No existing tracker found, create new one
-            logger.info(f"No event tracker found, creating new one for {content_type}")
+            logger.info("No event tracker found, creating new one for %s", content_type)
             
             create_response = self.personalize_client.create_event_tracker(
                 name=f"{content_type}-event-tracker-{int(time.time())}",
@@ -170,7 +224,7 @@ class PersonalizeService:
             
             tracker_arn = create_response['eventTrackerArn']
             tracking_id = create_response['trackingId']
-            logger.info(f"Event tracker created: {tracker_arn}, tracking ID: {tracking_id}")
+            logger.info("Event tracker created: %s, tracking ID: %s", tracker_arn, tracking_id)
             
             # Wait for event tracker to be ready
             logger.info("Waiting for event tracker to be active...")
@@ -180,7 +234,7 @@ class PersonalizeService:
                 )
                 
                 status = describe_response['eventTracker']['status']
-                logger.info(f"Event tracker status: {status}")
+                logger.info("Event tracker status: %s", status)
                 
                 if status == 'ACTIVE':
                     logger.info("Event tracker is now active!")
@@ -197,5 +251,5 @@ class PersonalizeService:
             return tracking_id
             
         except Exception as e:
-            logger.error(f"Error getting or creating event tracker: {str(e)}")
+            logger.error("Error getting or creating event tracker: %s", e)
             raise Exception(f"Error getting or creating event tracker: {str(e)}")
\ No newline at end of file
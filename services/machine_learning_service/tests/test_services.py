@@ -452,4 +452,273 @@ class TestPersonalizeService:
         """Test getting dataset ARN with invalid content type"""
         with pytest.raises(ValueError) as exc_info:
             self.personalize_service._get_dataset_arn('invalid')
-        assert "Invalid content type" in str(exc_info.value)
\ No newline at end of file
+        assert "Invalid content type" in str(exc_info.value)
+
+def throttled():
+    from botocore.exceptions import ClientError
+    return ClientError({"Error": {"Code": "ThrottlingException", "Message": "Rate exceeded"}}, "GetRecommendations")
+
+
+class TestPersonalizeResilience:
+
+    def setup_method(self):
+        from app.core.resilience import CircuitBreaker, ResilientClient, RetryPolicy
+        self.raw_client = Mock()
+        self.breaker = CircuitBreaker("personalize-runtime", failure_threshold=2, recovery_timeout=30)
+        self.personalize_service = PersonalizeService()
+        self.personalize_service.runtime_client = ResilientClient(
+            self.raw_client, RetryPolicy(max_attempts=3, sleep=lambda seconds: None), self.breaker
+        )
+
+    @pytest.mark.asyncio
+    async def test_get_recommendations_retries_throttling(self):
+        """Throttled calls are retried transparently"""
+        self.raw_client.get_recommendations.side_effect = [throttled(), {'itemList': [{'itemId': 'tt1', 'score': 0.5}]}]
+
+        result = await self.personalize_service.get_recommendations(content_type='movies', user_id='tt0')
+
+        assert [item.item_id for item in result] == ['tt1']
+        assert self.raw_client.get_recommendations.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_get_recommendations_fails_fast_when_circuit_open(self):
+        """After repeated throttling the breaker opens and calls stop reaching Personalize"""
+        from app.core.resilience import CircuitOpenError
+        self.raw_client.get_recommendations.side_effect = throttled()
+
+        with pytest.raises(Exception):
+            await self.personalize_service.get_recommendations(content_type='movies', user_id='tt0')
+        with pytest.raises(CircuitOpenError):
+            await self.personalize_service.get_recommendations(content_type='movies', user_id='tt0')
+        assert self.raw_client.get_recommendations.call_count == 2
+
+    def test_route_returns_503_when_circuit_open(self):
+        """Open circuit maps to 503 with Retry-After"""
+        from fastapi.testclient import TestClient
+        from app.core.resilience import CircuitOpenError
+        from app.main import app
+
+        with patch('app.routes.movies.personalize_service.get_recommendations',
+                   AsyncMock(side_effect=CircuitOpenError("personalize-runtime", 12))):
+            response = TestClient(app).post('/api/movies/get-recommendation/', json={'user_id': 'tt0'})
+
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '12'
+
+
+class TestTokenVerification:
+    """Local verification of Cognito access tokens with a generated key pair"""
+
+    ISSUER = "https://cognito-idp.us-east-1.amazonaws.com/us-east-1_test"
+
+    @staticmethod
+    def make_key(kid):
+        import json as _json
+        from cryptography.hazmat.primitives.asymmetric import rsa
+        from jwt.algorithms import RSAAlgorithm
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        jwk = _json.loads(RSAAlgorithm.to_jwk(private_key.public_key()))
+        jwk.update(kid=kid, alg="RS256", use="sig")
+        return private_key, jwk
+
+    def make_token(self, private_key, kid, **claims):
+        import time as _time
+        import jwt
+        payload = {"iss": self.ISSUER, "token_use": "access", "client_id": "web", "sub": "user-1",
+                   "exp": int(_time.time()) + 3600}
+        payload.update(claims)
+        return jwt.encode(payload, private_key, algorithm="RS256", headers={"kid": kid})
+
+    def setup_method(self):
+        from fastapi import FastAPI, Request
+        from fastapi.testclient import TestClient
+        from app.core.security import JWKSCache, TokenAuthMiddleware, TokenVerifier
+
+        self.key, jwk = self.make_key("k1")
+        self.jwks = {"keys": [jwk]}
+        self.fetch = Mock(side_effect=lambda url: self.jwks)
+        self.verifier = TokenVerifier(self.ISSUER, JWKSCache("jwks-url", min_refresh_interval=0, fetch=self.fetch),
+                                      client_id="web")
+        app = FastAPI()
+        app.add_middleware(TokenAuthMiddleware, verifier=self.verifier)
+
+        @app.get("/me")
+        async def me(request: Request):
+            return {"sub": request.state.user["sub"]}
+
+        @app.get("/health")
+        async def health():
+            return {"status": "healthy"}
+
+        self.client = TestClient(app)
+
+    def get_me(self, token):
+        return self.client.get("/me", headers={"Authorization": f"Bearer {token}"})
+
+    def test_valid_token_is_verified_once_then_cached(self):
+        token = self.make_token(self.key, "k1")
+        assert self.get_me(token).json() == {"sub": "user-1"}
+        assert self.get_me(token).status_code == 200
+        assert self.verifier.stats()["hits"] == 1
+        assert self.fetch.call_count == 1
+
+    def test_rejected_tokens(self):
+        other_key, _ = self.make_key("k1")
+        assert self.client.get("/me").status_code == 401
+        assert self.get_me(self.make_token(self.key, "k1", exp=1)).status_code == 401
+        assert self.get_me(self.make_token(self.key, "k1", client_id="other")).status_code == 401
+        assert self.get_me(self.make_token(self.key, "k1", token_use="id")).status_code == 401
+        assert self.get_me(self.make_token(other_key, "k1")).status_code == 401
+        response = self.get_me("not-a-jwt")
+        assert response.status_code == 401
+        assert response.headers["www-authenticate"].startswith("Bearer")
+        assert self.client.get("/health").status_code == 200
+
+    def test_unknown_kids_fetch_off_the_event_loop_and_rate_limited(self):
+        import asyncio
+        import time as _time
+        import httpx
+        from app.core.security import JWKSCache
+
+        now = [1000.0]
+        self.verifier.jwks = JWKSCache("jwks-url", min_refresh_interval=60, fetch=self.fetch, clock=lambda: now[0])
+        self.get_me(self.make_token(self.key, "k1"))
+        now[0] += 61
+        def slow_fetch(url):
+            _time.sleep(0.3)
+            return self.jwks
+        self.fetch.side_effect = slow_fetch
+        app = self.client.app
+
+        async def scenario():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                async def health_latency():
+                    await asyncio.sleep(0.05)
+                    started = _time.perf_counter()
+                    await client.get("/health")
+                    return _time.perf_counter() - started
+                unknown = [client.get("/me", headers={"Authorization": f"Bearer {self.make_token(self.key, f'x{i}')}"})
+                           for i in range(5)]
+                return await asyncio.gather(health_latency(), *unknown)
+
+        latency, *responses = asyncio.run(scenario())
+
+        assert latency < 0.2
+        assert [response.status_code for response in responses] == [401] * 5
+        assert self.fetch.call_count == 2
+
+    def test_rotated_key_triggers_jwks_refetch(self):
+        assert self.get_me(self.make_token(self.key, "k1")).status_code == 200
+        new_key, new_jwk = self.make_key("k2")
+        self.jwks = {"keys": [new_jwk]}
+        assert self.get_me(self.make_token(new_key, "k2")).status_code == 200
+        assert self.fetch.call_count == 2
+
+
+class TestMetrics:
+
+    def test_requests_recorded_by_route_template(self):
+        from fastapi.testclient import TestClient
+        from app.main import app
+
+        with patch('app.routes.movies.personalize_service.get_recommendations', AsyncMock(return_value=[])):
+            client = TestClient(app)
+            client.post('/api/movies/get-recommendation/', json={'user_id': 'tt0'})
+            client.get('/no-such-path')
+            body = client.get('/metrics').text
+
+        assert 'ml_http_requests_total{pid="' in body
+        assert 'method="POST",route="/api/movies/get-recommendation/",status="200"}' in body
+        assert 'route="unmatched",status="404"}' in body
+        assert 'ml_http_request_duration_seconds_bucket{' in body
+        assert 'ml_http_requests_in_flight{' in body
+
+    def test_personalize_calls_timed_by_operation_and_outcome(self):
+        from app.core.metrics import Histogram, TimedClient
+        from app.core.resilience import CircuitOpenError
+        histogram = Histogram("test_call_duration_seconds", "test", ("operation", "outcome"))
+        raw_client = Mock()
+        raw_client.put_events.side_effect = [None, throttled(), CircuitOpenError("personalize-events", 5)]
+        client = TimedClient(raw_client, histogram)
+
+        client.put_events(trackingId='t')
+        for _ in range(2):
+            with pytest.raises(Exception):
+                client.put_events(trackingId='t')
+
+        assert [histogram.count(('put_events', outcome)) for outcome in ('ok', 'error', 'circuit_open')] == [1, 1, 1]
+        assert 'test_call_duration_seconds_count{pid="' in "\n".join(histogram.render(1))
+
+
+class TestReadiness:
+
+    def setup_method(self):
+        from fastapi.testclient import TestClient
+        import app.main as main
+        from app.core.health import HealthMonitor
+        self.main = main
+        self.monitor = HealthMonitor(main.check_personalize, interval=30)
+        self.describe_campaign = Mock(return_value={'campaign': {'status': 'ACTIVE'}})
+        self.patches = [
+            patch.object(main, 'health_monitor', self.monitor),
+            patch.multiple(main.settings, **{f'{kind}_{arn}_arn': f'arn:aws:personalize:us-east-1:123:{arn}/{kind}'
+                                             for kind in ('movies', 'series') for arn in ('campaign', 'dataset')}),
+        ]
+        for content_type, service in main.personalize_services.items():
+            self.patches += [
+                patch.object(service, 'tracking_ids', {}),
+                patch.object(service, '_get_or_create_event_tracker', AsyncMock(return_value=f'{content_type}-id')),
+                patch.object(service.personalize_client, 'describe_campaign', self.describe_campaign),
+            ]
+        for p in self.patches:
+            p.start()
+        self.client = TestClient(main.app)
+
+    def teardown_method(self):
+        for p in reversed(self.patches):
+            p.stop()
+
+    def test_ready_after_warm_up_without_calls_per_probe(self):
+        response = self.client.get('/ready')
+        assert response.status_code == 503
+        assert response.json()['checks']['upstream']['error'] == 'warm-up has not finished'
+
+        self.monitor.run_check()
+        for _ in range(5):
+            response = self.client.get('/ready')
+
+        assert response.status_code == 200
+        assert response.json()['checks']['trackers']['loaded'] == {'movies': True, 'series': True}
+        assert self.describe_campaign.call_count == 2
+        assert self.main.movies.personalize_service.tracking_ids == {'movies': 'movies-id'}
+
+    def test_not_ready_when_campaign_inactive_or_config_missing(self):
+        self.describe_campaign.return_value = {'campaign': {'status': 'CREATE PENDING'}}
+        self.monitor.run_check()
+        response = self.client.get('/ready')
+        assert response.status_code == 503
+        assert 'CREATE PENDING' in response.json()['checks']['upstream']['error']
+
+        with patch.object(self.main.settings, 'movies_campaign_arn', ''):
+            response = self.client.get('/ready')
+        assert response.json()['checks']['config']['problems'] == ['MOVIES_CAMPAIGN_ARN is not set']
+        assert self.client.get('/health').status_code == 200
+
+    def test_rejected_event_keeps_tracker_and_readiness(self):
+        from botocore.exceptions import ClientError
+        self.monitor.run_check()
+        events_client = Mock()
+        events_client.put_events.side_effect = ClientError(
+            {"Error": {"Code": "InvalidInputException", "Message": "Invalid eventType"}}, "PutEvents")
+        event = {'user_id': 'u1', 'item_id': 'tt1', 'event_type': 'x' * 300}
+
+        with patch.object(self.main.movies.personalize_service, 'events_client', events_client):
+            assert self.client.post('/api/movies/create-event/', json=event).status_code == 500
+            assert self.client.get('/ready').status_code == 200
+
+            # A deleted tracker is looked up again on the next event
+            events_client.put_events.side_effect = ClientError(
+                {"Error": {"Code": "ResourceNotFoundException", "Message": "No tracker"}}, "PutEvents")
+            self.client.post('/api/movies/create-event/', json=event)
+        assert 'movies' not in self.main.movies.personalize_service.tracking_ids
@@ -42,3 +42,47 @@ func GetMovieByTitle(w http.ResponseWriter, r *http.Request) {
 	w.Header().Set("Content-Type", "application/json")
 	json.NewEncoder(w).Encode(movie)
 }
+
+// Most IDs one bulk request may ask for
+const maxBulkIDs = 100
+
+type moviesResponse struct {
+	Items   []*repository.Movie `json:"items"`
+	Missing []string            `json:"missing"`
+}
+
+// ✅ Fetch many movies at once: GET /api/movies/items?ids=tt1,tt2,...
+// Items come back in the requested order; unknown IDs are listed in missing.
+func GetMoviesByIDs(w http.ResponseWriter, r *http.Request) {
+	ids := parseIDs(r.URL.Query().Get("ids"))
+	if len(ids) == 0 {
+		http.Error(w, `{"error": "ids is required"}`, http.StatusBadRequest)
+		return
+	}
+	if len(ids) > maxBulkIDs {
+		http.Error(w, fmt.Sprintf(`{"error": "at most %d ids per request"}`, maxBulkIDs), http.StatusBadRequest)
+		return
+	}
+
+	movies, err := repository.FetchMoviesByIDs(ids)
+	if err != nil {
+		http.Error(w, `{"error": "Could not fetch movies"}`, http.StatusInternalServerError)
+		return
+	}
+
+	response := moviesResponse{Items: make([]*repository.Movie, 0, len(ids)), Missing: make([]string, 0)}
+	for _, id := range ids {
+		if movie, ok := movies[id]; ok {
+			response.Items = append(response.Items, movie)
+		} else {
+			response.Missing = append(response.Missing, id)
+		}
+	}
+
+	body, err := json.Marshal(response)
+	if err != nil {
+		http.Error(w, `{"error": "Could not encode movies"}`, http.StatusInternalServerError)
+		return
+	}
+	writeJSONWithETag(w, r, body)
+}
@@ -0,0 +1,79 @@
+package repository
+
+import (
+	"container/list"
+	"os"
+	"strconv"
+	"sync"
+	"time"
+)
+
+// ✅ Bulk lookups keep what they fetched for ITEM_CACHE_TTL_SECONDS (5 minutes
+// by default): the Glue ETL rewrites changed items and deletes removed ones,
+// so this is how long an edited or deleted title can still be served. Past
+// ITEM_CACHE_MAX_ENTRIES the least recently used entry is evicted.
+type ttlCache[V any] struct {
+	mu         sync.Mutex
+	ttl        time.Duration
+	maxEntries int
+	order      *list.List // of *cacheEntry[V], most recently used first
+	entries    map[string]*list.Element
+}
+
+type cacheEntry[V any] struct {
+	key     string
+	value   V
+	expires time.Time
+}
+
+func newTTLCache[V any](ttl time.Duration, maxEntries int) *ttlCache[V] {
+	return &ttlCache[V]{ttl: ttl, maxEntries: maxEntries, order: list.New(), entries: make(map[string]*list.Element)}
+}
+
+func (c *ttlCache[V]) Get(key string) (V, bool) {
+	c.mu.Lock()
+	defer c.mu.Unlock()
+	elem, ok := c.entries[key]
+	if !ok {
+		var zero V
+		return zero, false
+	}
+	entry := elem.Value.(*cacheEntry[V])
+	if time.Now().After(entry.expires) {
+		c.order.Remove(elem)
+		delete(c.entries, key)
+		var zero V
+		return zero, false
+	}
+	c.order.MoveToFront(elem)
+	return entry.value, true
+}
+
+func (c *ttlCache[V]) Set(key string, value V) {
+	c.mu.Lock()
+	defer c.mu.Unlock()
+	expires := time.Now().Add(c.ttl)
+	if elem, ok := c.entries[key]; ok {
+		entry := elem.Value.(*cacheEntry[V])
+		entry.value, entry.expires = value, expires
+		c.order.MoveToFront(elem)
+		return
+	}
+	c.entries[key] = c.order.PushFront(&cacheEntry[V]{key: key, value: value, expires: expires})
+	for c.order.Len() > c.maxEntries {
+		oldest := c.order.Back()
+		c.order.Remove(oldest)
+		delete(c.entries, oldest.Value.(*cacheEntry[V]).key)
+	}
+}
+
+func envInt(name string, fallback int) int {
+	if value, err := strconv.Atoi(os.Getenv(name)); err == nil && value > 0 {
+		return value
+	}
+	return fallback
+}
+
+func itemCacheTTL() time.Duration {
+	return time.Duration(envInt("ITEM_CACHE_TTL_SECONDS", 5*60)) * time.Second
+}
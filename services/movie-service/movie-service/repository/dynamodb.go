@@ -6,6 +6,7 @@ import (
 	"log"
 	"os"
 	"strings"
+	"time"
 
 	"github.com/aws/aws-sdk-go/aws"
 	"github.com/aws/aws-sdk-go/aws/session"
@@ -45,6 +46,14 @@ var DynamoDB dynamodbiface.DynamoDBAPI
 
 const TableName = "movies"
 
+// BatchGetItem takes at most 100 keys per call
+const maxBatchGetKeys = 100
+
+// Retries for keys DynamoDB returns as unprocessed (throttling)
+const maxBatchGetAttempts = 5
+
+var movieCache = newTTLCache[*Movie](itemCacheTTL(), envInt("ITEM_CACHE_MAX_ENTRIES", 50000))
+
 func InitDynamoDB() {
 	region := os.Getenv("AWS_REGION")
 	if region == "" {
@@ -150,3 +159,55 @@ func FetchMovieByTitle(title string) (*Movie, error) {
 	fmt.Printf("❌ No movie found with title: %s\n", title)
 	return nil, errors.New("movie not found")
 }
+
+// ✅ Fetch many movies by IMDb ID: cached ones from memory, the rest with
+// BatchGetItem. IDs that are not in the table are absent from the result.
+func FetchMoviesByIDs(imdbIDs []string) (map[string]*Movie, error) {
+	found := make(map[string]*Movie, len(imdbIDs))
+	var misses []string
+	for _, imdbID := range imdbIDs {
+		if movie, ok := movieCache.Get(imdbID); ok {
+			found[imdbID] = movie
+		} else {
+			misses = append(misses, imdbID)
+		}
+	}
+
+	for start := 0; start < len(misses); start += maxBatchGetKeys {
+		batch := misses[start:min(start+maxBatchGetKeys, len(misses))]
+		keys := make([]map[string]*dynamodb.AttributeValue, 0, len(batch))
+		for _, imdbID := range batch {
+			keys = append(keys, map[string]*dynamodb.AttributeValue{"imdbID": {S: aws.String(imdbID)}})
+		}
+
+		request := map[string]*dynamodb.KeysAndAttributes{TableName: {Keys: keys}}
+		for attempt := 0; len(request) > 0; attempt++ {
+			if attempt == maxBatchGetAttempts {
+				fmt.Printf("❌ DynamoDB BatchGetItem left keys unprocessed after %d attempts\n", attempt)
+				return nil, errors.New("database error")
+			}
+			if attempt > 0 {
+				time.Sleep(time.Duration(50<<attempt) * time.Millisecond)
+			}
+
+			result, err := DynamoDB.BatchGetItem(&dynamodb.BatchGetItemInput{RequestItems: request})
+			if err != nil {
+				fmt.Printf("❌ DynamoDB BatchGetItem Error: %v\n", err)
+				return nil, errors.New("database error")
+			}
+			for _, item := range result.Responses[TableName] {
+				var movie Movie
+				if err := dynamodbattribute.UnmarshalMap(item, &movie); err != nil {
+					fmt.Printf("❌ Unmarshal Error: %v\n", err)
+					continue
+				}
+				found[movie.ImdbID] = &movie
+				movieCache.Set(movie.ImdbID, &movie)
+			}
+			request = result.UnprocessedKeys
+		}
+	}
+
+	fmt.Printf("✅ Bulk lookup: %d requested, %d cached, %d found\n", len(imdbIDs), len(imdbIDs)-len(misses), len(found))
+	return found, nil
+}
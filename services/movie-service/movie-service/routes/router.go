@@ -31,6 +31,7 @@ func SetupRouter() *mux.Router {
 	// ✅ Movie routes
 	r.HandleFunc("/api/movies/id/{id}", handlers.GetMovieByID).Methods("GET")
 	r.HandleFunc("/api/movies/title/{title}", handlers.GetMovieByTitle).Methods("GET")
+	r.HandleFunc("/api/movies/items", handlers.GetMoviesByIDs).Methods("GET")
 
 	fmt.Println("✅ Routes registered successfully!")
 	return r
@@ -0,0 +1,206 @@
+"""
+Poster proxy: fetches an OMDB/IMDb poster once, resizes it to one of the
+tile widths the frontend uses and serves it from a disk cache.
+
+    GET /posters/<width>?url=<poster url>[&format=webp|jpeg]
+
+Without format the response is WebP when the client accepts it, JPEG
+otherwise. Resized posters never change for a URL, so they are served
+with a one-year immutable Cache-Control and an ETag.
+"""
+import io
+import logging
+import os
+import threading
+from urllib.parse import urljoin, urlsplit
+
+import requests
+from flask import Flask, Response, jsonify, request
+from PIL import Image, UnidentifiedImageError
+
+from disk_cache import DiskCache, cache_key
+
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(),
+                    format="%(asctime)s %(levelname)s %(name)s %(message)s")
+logger = logging.getLogger(__name__)
+
+POSTER_WIDTHS = frozenset(int(width) for width in os.getenv("POSTER_WIDTHS", "150,200").split(","))
+# Only these hosts are fetched, so the proxy cannot be pointed at anything
+# else; an empty POSTER_ALLOWED_HOSTS allows every host (local testing)
+ALLOWED_HOSTS = frozenset(host for host in os.getenv(
+    "POSTER_ALLOWED_HOSTS", "m.media-amazon.com,ia.media-imdb.com,img.omdbapi.com").split(",") if host)
+CACHE_DIR = os.getenv("POSTER_CACHE_DIR", "/var/cache/posters")
+CACHE_MAX_BYTES = int(os.getenv("POSTER_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+FETCH_TIMEOUT_SECONDS = float(os.getenv("POSTER_FETCH_TIMEOUT_SECONDS", "5"))
+MAX_SOURCE_BYTES = int(os.getenv("POSTER_MAX_SOURCE_BYTES", str(10 * 1024 * 1024)))
+# Redirects are followed by hand so every hop is checked against ALLOWED_HOSTS
+MAX_REDIRECTS = int(os.getenv("POSTER_MAX_REDIRECTS", "3"))
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+FORMATS = {
+    "webp": ("WEBP", "image/webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "image/jpeg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+# Posters are a few hundred pixels wide; refuse anything that would
+# decompress into a huge bitmap
+Image.MAX_IMAGE_PIXELS = 40_000_000
+
+app = Flask(__name__)
+
+cache = DiskCache(CACHE_DIR, CACHE_MAX_BYTES)
+http = requests.Session()
+http.headers["User-Agent"] = "poster-proxy/1.0"
+
+# One fetch per poster at a time: concurrent misses for the same key wait
+# for the first one and then read its result from the cache
+_inflight = {}
+_inflight_lock = threading.Lock()
+_stats_lock = threading.Lock()
+fetches = 0
+fetch_errors = 0
+
+
+class PosterError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def is_http_url(parts):
+    return parts.scheme in ("http", "https") and bool(parts.hostname)
+
+
+def is_allowed_host(parts):
+    return not ALLOWED_HOSTS or parts.hostname in ALLOWED_HOSTS
+
+
+def fetch_source(url):
+    global fetches
+    with _stats_lock:
+        fetches += 1
+    try:
+        for _ in range(MAX_REDIRECTS + 1):
+            with http.get(url, timeout=FETCH_TIMEOUT_SECONDS, stream=True, allow_redirects=False) as response:
+                if response.is_redirect:
+                    url = urljoin(url, response.headers["Location"])
+                    parts = urlsplit(url)
+                    if not is_http_url(parts) or not is_allowed_host(parts):
+                        raise PosterError(502, "Upstream redirected to a host that is not allowed")
+                    continue
+                if response.status_code == 404:
+                    raise PosterError(404, "Poster not found upstream")
+                if response.status_code != 200:
+                    raise PosterError(502, f"Upstream returned {response.status_code}")
+                data = bytearray()
+                for chunk in response.iter_content(64 * 1024):
+                    data += chunk
+                    if len(data) > MAX_SOURCE_BYTES:
+                        raise PosterError(502, "Upstream image too large")
+                return bytes(data)
+        raise PosterError(502, "Too many redirects upstream")
+    except requests.exceptions.RequestException as e:
+        raise PosterError(502, f"Upstream unavailable: {e}") from e
+
+
+def resize(data, width, fmt):
+    pil_format, _, options = FORMATS[fmt]
+    try:
+        image = Image.open(io.BytesIO(data))
+        # JPEG sources decode straight at a smaller scale
+        image.draft("RGB", (width, width * 4))
+        image = image.convert("RGB")
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        raise PosterError(502, f"Upstream sent no usable image: {e}") from e
+    if image.width > width:
+        image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+    out = io.BytesIO()
+    image.save(out, pil_format, **options)
+    return out.getvalue()
+
+
+def get_poster(url, width, fmt):
+    """(bytes, cache hit) for url at width in fmt, fetching and resizing on a miss"""
+    key = cache_key(url, width, fmt)
+    data = cache.get(key)
+    if data is not None:
+        return data, True
+    with _inflight_lock:
+        lock = _inflight.setdefault(key, threading.Lock())
+    with lock:
+        try:
+            data = cache.get(key)
+            if data is not None:
+                return data, True
+            data = resize(fetch_source(url), width, fmt)
+            cache.set(key, data)
+            return data, False
+        finally:
+            with _inflight_lock:
+                _inflight.pop(key, None)
+
+
+def negotiate_format():
+    fmt = request.args.get("format")
+    if fmt:
+        return fmt.lower()
+    return "webp" if "image/webp" in request.headers.get("Accept", "") else "jpeg"
+
+
+@app.route("/posters/<int:width>", methods=["GET"])
+def poster(width):
+    global fetch_errors
+    url = request.args.get("url", "")
+    fmt = negotiate_format()
+    parts = urlsplit(url)
+    if width not in POSTER_WIDTHS:
+        return jsonify({"error": f"width must be one of {sorted(POSTER_WIDTHS)}"}), 400
+    if fmt not in FORMATS:
+        return jsonify({"error": f"format must be one of {sorted(FORMATS)}"}), 400
+    if not is_http_url(parts):
+        return jsonify({"error": "url must be an http(s) URL"}), 400
+    if not is_allowed_host(parts):
+        return jsonify({"error": "Host not allowed"}), 403
+
+    try:
+        data, hit = get_poster(url, width, fmt)
+    except PosterError as e:
+        with _stats_lock:
+            fetch_errors += 1
+        logger.warning("Poster %s: %s", url, e)
+        return jsonify({"error": str(e)}), e.status
+
+    etag = f'"{cache_key(data)[:16]}"'
+    headers = {"Cache-Control": CACHE_CONTROL, "ETag": etag, "Vary": "Accept", "X-Cache": "HIT" if hit else "MISS"}
+    if etag in request.headers.get("If-None-Match", ""):
+        return Response(status=304, headers=headers)
+    return Response(data, mimetype=FORMATS[fmt][1], headers=headers)
+
+
+@app.route("/health", methods=["GET"])
+def health():
+    return jsonify({"status": "healthy", "service": "poster-proxy"})
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Prometheus text: disk cache use, upstream fetches and errors"""
+    stats = cache.stats()
+    pid = os.getpid()
+    lines = []
+    for name, kind, help_text, value in [
+        ("poster_cache_entries", "gauge", "Resized posters on disk", stats["entries"]),
+        ("poster_cache_bytes", "gauge", "Bytes of resized posters on disk", stats["bytes"]),
+        ("poster_cache_max_bytes", "gauge", "Disk cache size limit", stats["max_bytes"]),
+        ("poster_cache_hits_total", "counter", "Posters served from the disk cache", stats["hits"]),
+        ("poster_cache_misses_total", "counter", "Posters not in the disk cache", stats["misses"]),
+        ("poster_cache_evictions_total", "counter", "Posters evicted from the disk cache", stats["evictions"]),
+        ("poster_upstream_fetches_total", "counter", "Source images fetched upstream", fetches),
+        ("poster_errors_total", "counter", "Poster requests that failed upstream", fetch_errors),
+    ]:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f'{name}{{pid="{pid}"}} {value}']
+    return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
+
+
+if __name__ == "__main__":
+    app.run(host="0.0.0.0", port=int(os.getenv("PORT", "8093")))
@@ -0,0 +1,155 @@
+import fcntl
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+LOCK_NAME = ".lock"
+
+
+def cache_key(*parts):
+    """SHA-256 hex digest of the parts that identify one cached file"""
+    return hashlib.sha256("\0".join(str(part) for part in parts).encode()).hexdigest()
+
+
+class DiskCache:
+    """
+    Files named by their key under directory/<key[:2]>/<key>, least recently
+    used evicted once the total size passes max_bytes. Writes go to a
+    temporary file and are renamed into place, so readers (other worker
+    processes too) never see a partial file; a file another process evicted
+    is just a miss.
+
+    Worker processes share the directory, so the LRU order and size kept in
+    memory only cover what this process saw. They are rebuilt from the files
+    on disk (ordered by access time) at startup, and again whenever this
+    process has written rescan_bytes or thinks the cache is full, under a
+    lock file so one process at a time rescans and evicts. The disk then
+    holds at most about max_bytes + workers * rescan_bytes. Temporary files
+    older than temp_grace seconds are left over from writes that did not
+    finish and are deleted during a rescan; younger ones may still be in
+    progress in another worker.
+    """
+
+    def __init__(self, directory, max_bytes, rescan_bytes=None, temp_grace=600.0, clock=time.time):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.rescan_bytes = max_bytes // 16 if rescan_bytes is None else rescan_bytes
+        self.temp_grace = temp_grace
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> size in bytes
+        self._size = 0
+        self._written = 0  # bytes set since the last rescan
+        self._lock = threading.Lock()
+        self._rescan_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+        self._rescan()
+        if self._entries:
+            logger.info("Poster cache: %d files, %d bytes in %s", len(self._entries), self._size, self.directory)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def _scan(self):
+        """(key -> size in LRU order, total bytes) of the files on disk; deletes stale temporary files"""
+        found = []
+        now = self._clock()
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name == LOCK_NAME and root == self.directory:
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                    if name.startswith("."):
+                        if now - stat.st_mtime > self.temp_grace:
+                            os.remove(path)
+                        continue
+                except FileNotFoundError:
+                    # Renamed into place or evicted by another process meanwhile
+                    continue
+                found.append((stat.st_atime, name, stat.st_size))
+        entries = OrderedDict((key, size) for _, key, size in sorted(found))
+        return entries, sum(entries.values())
+
+    def _rescan(self):
+        """Rebuild the LRU order and size from disk and evict down to max_bytes"""
+        if not self._rescan_lock.acquire(blocking=False):
+            return  # another thread of this process is on it
+        try:
+            with open(os.path.join(self.directory, LOCK_NAME), "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                entries, size = self._scan()
+                with self._lock:
+                    self._entries, self._size, self._written = entries, size, 0
+                    self._evict()
+        finally:
+            self._rescan_lock.release()
+
+    def get(self, key):
+        """The cached bytes, or None"""
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+                size = self._entries.pop(key, None)
+                if size is not None:
+                    self._size -= size
+            return None
+        with self._lock:
+            self.hits += 1
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            else:
+                self._entries[key] = len(data)
+                self._size += len(data)
+        try:
+            # Keep the order for the next startup
+            os.utime(self._path(key))
+        except OSError:
+            pass
+        return data
+
+    def set(self, key, data):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        with self._lock:
+            self._size += len(data) - self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            self._written += len(data)
+            rescan = self._size > self.max_bytes or self._written >= self.rescan_bytes
+        if rescan:
+            self._rescan()
+
+    def _evict(self):
+        while self._size > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._size -= size
+            self.evictions += 1
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._size, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
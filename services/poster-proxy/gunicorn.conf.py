@@ -0,0 +1,19 @@
+# gunicorn.conf.py
+# Threaded workers: a miss waits on the upstream image host and a hit is a
+# file read, so threads absorb a page full of posters. The workers share
+# the disk cache directory and take turns rescanning it to enforce the size
+# limit (see DiskCache).
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8093')}"
+worker_class = "gthread"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+threads = int(os.getenv("GUNICORN_THREADS", "16"))
+
+timeout = 30
+graceful_timeout = 30
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "15"))
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info")
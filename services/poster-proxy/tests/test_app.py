@@ -0,0 +1,180 @@
+import io
+import os
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("POSTER_CACHE_DIR", tempfile.mkdtemp(prefix="posters-"))
+
+import app as app_module
+from disk_cache import DiskCache
+
+
+def make_jpeg(width=600, height=900):
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 40, 40)).save(out, "JPEG", quality=95)
+    return out.getvalue()
+
+
+@pytest.fixture(scope="module")
+def image_stub():
+    """
+    Local stand-in for the poster host: /poster.jpg is a 600x900 JPEG,
+    /moved redirects to it, /moved-away redirects to it through "localhost"
+    (not an allowed host), anything else 404
+    """
+    poster = make_jpeg()
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests_seen.append(self.path)
+            if self.path.startswith("/moved"):
+                host = "localhost" if self.path.startswith("/moved-away") else "127.0.0.1"
+                self.send_response(302)
+                self.send_header("Location", f"http://{host}:{self.server.server_port}/poster.jpg")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if self.path.startswith("/poster.jpg"):
+                body, status, content_type = poster, 200, "image/jpeg"
+            elif self.path.startswith("/not-an-image"):
+                body, status, content_type = b"<html></html>", 200, "text/html"
+            else:
+                body, status, content_type = b"not found", 404, "text/plain"
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}", requests_seen
+    server.shutdown()
+
+
+@pytest.fixture
+def client(image_stub, tmp_path):
+    image_stub[1].clear()
+    with patch("app.cache", DiskCache(str(tmp_path), 10 * 1024 * 1024)), \
+            patch("app.ALLOWED_HOSTS", frozenset({"127.0.0.1"})):
+        app_module.app.config["TESTING"] = True
+        with app_module.app.test_client() as client:
+            yield client
+
+
+def test_resizes_once_and_serves_from_cache(client, image_stub):
+    base, requests_seen = image_stub
+    url = f"/posters/150?url={base}/poster.jpg"
+
+    first = client.get(url)
+    second = client.get(url)
+
+    assert first.status_code == second.status_code == 200
+    assert first.headers["X-Cache"] == "MISS" and second.headers["X-Cache"] == "HIT"
+    assert first.data == second.data
+    assert len(requests_seen) == 1
+    assert first.headers["Content-Type"] == "image/jpeg"
+    assert "immutable" in first.headers["Cache-Control"]
+    assert Image.open(io.BytesIO(first.data)).size == (150, 225)
+
+
+def test_webp_when_accepted(client, image_stub):
+    base, _ = image_stub
+
+    response = client.get(f"/posters/200?url={base}/poster.jpg", headers={"Accept": "image/webp,*/*"})
+
+    assert response.headers["Content-Type"] == "image/webp"
+    assert response.headers["Vary"] == "Accept"
+    image = Image.open(io.BytesIO(response.data))
+    assert (image.format, image.size) == ("WEBP", (200, 300))
+
+
+def test_not_modified_with_etag(client, image_stub):
+    base, _ = image_stub
+    url = f"/posters/150?url={base}/poster.jpg"
+    etag = client.get(url).headers["ETag"]
+
+    response = client.get(url, headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.data == b""
+
+
+def test_rejects_other_widths_and_hosts(client, image_stub):
+    base, requests_seen = image_stub
+
+    assert client.get(f"/posters/4000?url={base}/poster.jpg").status_code == 400
+    assert client.get("/posters/150?url=http://169.254.169.254/latest/meta-data").status_code == 403
+    assert client.get("/posters/150?url=file:///etc/passwd").status_code == 400
+    assert requests_seen == []
+
+
+def test_upstream_errors(client, image_stub):
+    base, _ = image_stub
+
+    assert client.get(f"/posters/150?url={base}/missing.jpg").status_code == 404
+    assert client.get(f"/posters/150?url={base}/not-an-image").status_code == 502
+    assert "poster_errors_total" in client.get("/metrics").get_data(as_text=True)
+
+
+def test_redirects_only_to_allowed_hosts(client, image_stub):
+    base, requests_seen = image_stub
+
+    assert client.get(f"/posters/150?url={base}/moved").status_code == 200
+    assert requests_seen == ["/moved", "/poster.jpg"]
+
+    requests_seen.clear()
+    assert client.get(f"/posters/200?url={base}/moved-away").status_code == 502
+    assert requests_seen == ["/moved-away"]
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=250)
+    cache.set("a" * 64, b"x" * 100)
+    cache.set("b" * 64, b"x" * 100)
+    cache.get("a" * 64)
+    cache.set("c" * 64, b"x" * 100)
+
+    assert cache.get("b" * 64) is None
+    assert cache.get("a" * 64) is not None
+    assert cache.stats()["evictions"] == 1
+
+    reopened = DiskCache(str(tmp_path), max_bytes=250)
+    assert reopened.stats()["entries"] == 2
+
+
+def test_disk_cache_keeps_temp_files_other_workers_are_writing(tmp_path):
+    (tmp_path / "ab").mkdir()
+    writing = tmp_path / "ab" / ".tmp-writing"
+    abandoned = tmp_path / "ab" / ".tmp-abandoned"
+    writing.write_bytes(b"x")
+    abandoned.write_bytes(b"x")
+    os.utime(abandoned, (0, 0))
+
+    DiskCache(str(tmp_path), max_bytes=250, temp_grace=600)
+
+    assert writing.exists()
+    assert not abandoned.exists()
+
+
+def test_disk_cache_size_limit_holds_across_workers(tmp_path):
+    workers = [DiskCache(str(tmp_path), max_bytes=250, rescan_bytes=100) for _ in range(2)]
+    for n in range(4):
+        workers[n % 2].set(str(n) * 64, b"x" * 100)
+
+    on_disk = [path for path in tmp_path.rglob("*") if path.is_file() and not path.name.startswith(".")]
+    assert sum(path.stat().st_size for path in on_disk) <= 250
+    # Each worker alone only wrote 200 bytes; the limit came from the rescans
+    assert sum(worker.stats()["evictions"] for worker in workers) == 2
+    assert workers[1].get("3" * 64) is not None
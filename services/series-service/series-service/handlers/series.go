@@ -2,6 +2,7 @@ package handlers
 
 import (
 	"encoding/json"
+	"fmt"
 	"net/http"
 	"series-service/repository"
 
@@ -37,3 +38,47 @@ func GetSeriesByTitle(w http.ResponseWriter, r *http.Request) {
 	w.Header().Set("Content-Type", "application/json")
 	json.NewEncoder(w).Encode(series)
 }
+
+// Most IDs one bulk request may ask for
+const maxBulkIDs = 100
+
+type seriesResponse struct {
+	Items   []*repository.Series `json:"items"`
+	Missing []string             `json:"missing"`
+}
+
+// 📺 Get many series at once: GET /api/series/items?ids=tt1,tt2,...
+// Items come back in the requested order; unknown IDs are listed in missing.
+func GetSeriesByIDs(w http.ResponseWriter, r *http.Request) {
+	ids := parseIDs(r.URL.Query().Get("ids"))
+	if len(ids) == 0 {
+		http.Error(w, `{"error": "ids is required"}`, http.StatusBadRequest)
+		return
+	}
+	if len(ids) > maxBulkIDs {
+		http.Error(w, fmt.Sprintf(`{"error": "at most %d ids per request"}`, maxBulkIDs), http.StatusBadRequest)
+		return
+	}
+
+	seriesByID, err := repository.FetchSeriesByIDs(ids)
+	if err != nil {
+		http.Error(w, `{"error": "could not fetch series"}`, http.StatusInternalServerError)
+		return
+	}
+
+	response := seriesResponse{Items: make([]*repository.Series, 0, len(ids)), Missing: make([]string, 0)}
+	for _, id := range ids {
+		if series, ok := seriesByID[id]; ok {
+			response.Items = append(response.Items, series)
+		} else {
+			response.Missing = append(response.Missing, id)
+		}
+	}
+
+	body, err := json.Marshal(response)
+	if err != nil {
+		http.Error(w, `{"error": "could not encode series"}`, http.StatusInternalServerError)
+		return
+	}
+	writeJSONWithETag(w, r, body)
+}
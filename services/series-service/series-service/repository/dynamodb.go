@@ -6,6 +6,7 @@ import (
 	"log"
 	"os"
 	"strings"
+	"time"
 
 	"github.com/aws/aws-sdk-go/aws"
 	"github.com/aws/aws-sdk-go/aws/session"
@@ -37,6 +38,14 @@ var SeriesDynamoDB dynamodbiface.DynamoDBAPI
 
 const SeriesTableName = "TVSeries"
 
+// BatchGetItem takes at most 100 keys per call
+const maxBatchGetKeys = 100
+
+// Retries for keys DynamoDB returns as unprocessed (throttling)
+const maxBatchGetAttempts = 5
+
+var seriesCache = newTTLCache[*Series](itemCacheTTL(), envInt("ITEM_CACHE_MAX_ENTRIES", 50000))
+
 // ✅ Initialize DynamoDB Connection with IAM Role
 func InitSeriesDynamoDB() {
 	region := os.Getenv("AWS_REGION")
@@ -150,3 +159,55 @@ func FetchSeriesByTitle(title string) (*Series, error) {
 	fmt.Printf("❌ Series not found: %s\n", title)
 	return nil, errors.New("series not found")
 }
+
+// ✅ Fetch many series by IMDb ID: cached ones from memory, the rest with
+// BatchGetItem. IDs that are not in the table are absent from the result.
+func FetchSeriesByIDs(imdbIDs []string) (map[string]*Series, error) {
+	found := make(map[string]*Series, len(imdbIDs))
+	var misses []string
+	for _, imdbID := range imdbIDs {
+		if series, ok := seriesCache.Get(imdbID); ok {
+			found[imdbID] = series
+		} else {
+			misses = append(misses, imdbID)
+		}
+	}
+
+	for start := 0; start < len(misses); start += maxBatchGetKeys {
+		batch := misses[start:min(start+maxBatchGetKeys, len(misses))]
+		keys := make([]map[string]*dynamodb.AttributeValue, 0, len(batch))
+		for _, imdbID := range batch {
+			keys = append(keys, map[string]*dynamodb.AttributeValue{"imdbID": {S: aws.String(imdbID)}})
+		}
+
+		request := map[string]*dynamodb.KeysAndAttributes{SeriesTableName: {Keys: keys}}
+		for attempt := 0; len(request) > 0; attempt++ {
+			if attempt == maxBatchGetAttempts {
+				fmt.Printf("❌ BatchGetItem left keys unprocessed after %d attempts\n", attempt)
+				return nil, errors.New("error fetching series")
+			}
+			if attempt > 0 {
+				time.Sleep(time.Duration(50<<attempt) * time.Millisecond)
+			}
+
+			result, err := SeriesDynamoDB.BatchGetItem(&dynamodb.BatchGetItemInput{RequestItems: request})
+			if err != nil {
+				fmt.Printf("❌ Error fetching series from DynamoDB: %v\n", err)
+				return nil, errors.New("error fetching series")
+			}
+			for _, item := range result.Responses[SeriesTableName] {
+				var series Series
+				if err := dynamodbattribute.UnmarshalMap(item, &series); err != nil {
+					fmt.Printf("❌ Error parsing series data: %v\n", err)
+					continue
+				}
+				found[series.ImdbID] = &series
+				seriesCache.Set(series.ImdbID, &series)
+			}
+			request = result.UnprocessedKeys
+		}
+	}
+
+	fmt.Printf("✅ Bulk lookup: %d requested, %d cached, %d found\n", len(imdbIDs), len(imdbIDs)-len(misses), len(found))
+	return found, nil
+}
@@ -14,6 +14,7 @@ func SetupRouter() *mux.Router {
 	// 📺 Series Endpoints
 	router.HandleFunc("/api/series/id/{imdbID}", handlers.GetSeriesByID).Methods("GET")
 	router.HandleFunc("/api/series/title/{title}", handlers.GetSeriesByTitle).Methods("GET")
+	router.HandleFunc("/api/series/items", handlers.GetSeriesByIDs).Methods("GET")
 
 	// 🔥 Middleware for Logging
 	router.Use(loggingMiddleware)
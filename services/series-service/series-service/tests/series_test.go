@@ -21,6 +21,26 @@ type mockSeriesDynamoDBClient struct {
 	dynamodbiface.DynamoDBAPI
 	shouldReturnItem  bool
 	shouldReturnItems bool
+	batchGetKeys      []int // keys asked for in each BatchGetItem call
+}
+
+// IDs starting with "tt-missing" are not in the table
+func (m *mockSeriesDynamoDBClient) BatchGetItem(input *dynamodb.BatchGetItemInput) (*dynamodb.BatchGetItemOutput, error) {
+	keys := input.RequestItems[repository.SeriesTableName].Keys
+	m.batchGetKeys = append(m.batchGetKeys, len(keys))
+	var items []map[string]*dynamodb.AttributeValue
+	for _, key := range keys {
+		id := aws.StringValue(key["imdbID"].S)
+		if !strings.HasPrefix(id, "tt-missing") {
+			items = append(items, map[string]*dynamodb.AttributeValue{
+				"imdbID": {S: aws.String(id)},
+				"Title":  {S: aws.String("Bulk Series " + id)},
+			})
+		}
+	}
+	return &dynamodb.BatchGetItemOutput{
+		Responses: map[string][]map[string]*dynamodb.AttributeValue{repository.SeriesTableName: items},
+	}, nil
 }
 
 func (m *mockSeriesDynamoDBClient) GetItem(input *dynamodb.GetItemInput) (*dynamodb.GetItemOutput, error) {
@@ -281,3 +301,62 @@ func TestTVSeriesComplete(t *testing.T) {
 	// ============ FINAL SUCCESS MESSAGE ============
 	t.Log("🎉 ALL TVSERIES TESTS PASSED! Complete coverage achieved!")
 }
+
+// Bulk lookup: requested order, missing IDs, item cache and ETag revalidation
+func TestGetSeriesByIDs_Bulk(t *testing.T) {
+	mock := &mockSeriesDynamoDBClient{}
+	repository.SeriesDynamoDB = mock
+
+	req := httptest.NewRequest("GET", "/api/series/items?ids=tt-bulk-2,tt-missing-1,tt-bulk-1,tt-bulk-2", nil)
+	rr := httptest.NewRecorder()
+	handlers.GetSeriesByIDs(rr, req)
+
+	if rr.Code != http.StatusOK {
+		t.Fatalf("Expected 200, got %d. Response: %s", rr.Code, rr.Body.String())
+	}
+	body := rr.Body.String()
+	if strings.Index(body, "tt-bulk-2") > strings.Index(body, "tt-bulk-1") {
+		t.Errorf("Items should keep the requested order: %s", body)
+	}
+	if !strings.Contains(body, `"missing":["tt-missing-1"]`) {
+		t.Errorf("Expected tt-missing-1 in missing: %s", body)
+	}
+	etag := rr.Header().Get("ETag")
+	if etag == "" {
+		t.Fatal("Expected an ETag header")
+	}
+
+	// Same list again with the ETag: 304, and only the missing ID goes to DynamoDB
+	req = httptest.NewRequest("GET", "/api/series/items?ids=tt-bulk-2,tt-missing-1,tt-bulk-1", nil)
+	req.Header.Set("If-None-Match", etag)
+	rr = httptest.NewRecorder()
+	handlers.GetSeriesByIDs(rr, req)
+
+	if rr.Code != http.StatusNotModified {
+		t.Errorf("Expected 304, got %d", rr.Code)
+	}
+	if rr.Body.Len() != 0 {
+		t.Errorf("304 should have no body, got: %s", rr.Body.String())
+	}
+	if len(mock.batchGetKeys) != 2 || mock.batchGetKeys[0] != 3 || mock.batchGetKeys[1] != 1 {
+		t.Errorf("Expected BatchGetItem for 3 keys then 1 key, got %v", mock.batchGetKeys)
+	}
+}
+
+func TestGetSeriesByIDs_InvalidIDs(t *testing.T) {
+	repository.SeriesDynamoDB = &mockSeriesDynamoDBClient{}
+
+	ids := make([]string, 101)
+	for i := range ids {
+		ids[i] = fmt.Sprintf("tt%d", i)
+	}
+	for _, query := range []string{"", "ids=", "ids=" + strings.Join(ids, ",")} {
+		req := httptest.NewRequest("GET", "/api/series/items?"+query, nil)
+		rr := httptest.NewRecorder()
+		handlers.GetSeriesByIDs(rr, req)
+
+		if rr.Code != http.StatusBadRequest {
+			t.Errorf("%q: Expected 400, got %d", query, rr.Code)
+		}
+	}
+}
@@ -1,7 +1,32 @@
+import os
+
 import boto3
+from botocore.config import Config
+
+from app.core.resilience import CircuitBreaker, ResilientClient, RetryPolicy
 
+# Throttling and 5xx errors are retried with jittered backoff within
+# DYNAMODB_DEADLINE_SECONDS; after DYNAMODB_BREAKER_FAILURES of them in a row
+# requests fail fast with 503 for DYNAMODB_BREAKER_RECOVERY_SECONDS.
+retry_policy = RetryPolicy(
+    max_attempts=int(os.getenv("DYNAMODB_MAX_ATTEMPTS", "4")),
+    base_delay=0.05,
+    max_delay=1.0,
+    deadline=float(os.getenv("DYNAMODB_DEADLINE_SECONDS", "3")),
+)
+breaker = CircuitBreaker(
+    "dynamodb",
+    failure_threshold=int(os.getenv("DYNAMODB_BREAKER_FAILURES", "5")),
+    recovery_timeout=float(os.getenv("DYNAMODB_BREAKER_RECOVERY_SECONDS", "30")),
+)
 
-dynamodb = boto3.client(
-    'dynamodb',
-    region_name="us-east-1",
+dynamodb = ResilientClient(
+    boto3.client(
+        'dynamodb',
+        region_name="us-east-1",
+        # Retries are done by retry_policy; botocore's own would multiply them
+        config=Config(retries={'max_attempts': 1, 'mode': 'standard'}),
+    ),
+    retry_policy,
+    breaker,
 )
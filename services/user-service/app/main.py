@@ -1,11 +1,44 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from app.core.resilience import CircuitOpenError
+from app.core.security import TokenAuthMiddleware, start_jwks, verifier_from_env
 from app.routes.favorites_routes import router as favorites_router
 
-app = FastAPI(title="User Favorites API")
+# Bearer tokens are verified locally against the Cognito user pool's JWKS
+# (COGNITO_USER_POOL_ID), not by calling Cognito per request
+token_verifier = verifier_from_env()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Signing keys are loaded before the first request, off the event loop
+    if token_verifier:
+        await start_jwks(token_verifier)
+    yield
+    if token_verifier:
+        token_verifier.jwks.stop()
+
+
+app = FastAPI(title="User Favorites API", lifespan=lifespan)
+
+if token_verifier:
+    app.add_middleware(TokenAuthMiddleware, verifier=token_verifier)
 
 app.include_router(favorites_router, prefix="/api", tags=["Favorites"])
 
 
+@app.exception_handler(CircuitOpenError)
+async def circuit_open_handler(request: Request, exc: CircuitOpenError):
+    # DynamoDB keeps failing; answer at once instead of piling up retries
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Favorites are temporarily unavailable, please retry"},
+        headers={"Retry-After": str(max(1, round(exc.retry_after)))},
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8080)
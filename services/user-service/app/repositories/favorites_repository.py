@@ -1,3 +1,7 @@
+import base64
+import binascii
+import json
+
 from app.core.db import dynamodb
 
 USER_MOVIES_TABLE = "UserMovies"
@@ -5,6 +9,32 @@ USER_SERIES_TABLE = "UserSeries"
 MOVIES_TABLE = "movies"
 SERIES_TABLE = "TVSeries"
 
+# Favorites pages hold at most MAX_PAGE_SIZE items, in imdbID (sort key) order
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    """The cursor was not returned by this API for this user"""
+
+
+def encode_cursor(email: str, imdb_id: str) -> str:
+    """Opaque cursor: the key of the last item on a page"""
+    key = json.dumps({"email": email, "imdbID": imdb_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, email: str) -> dict:
+    """ExclusiveStartKey for the page after cursor"""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        imdb_id = key["imdbID"]
+        cursor_email = key["email"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise InvalidCursor("Malformed cursor")
+    if cursor_email != email or not isinstance(imdb_id, str):
+        raise InvalidCursor("Cursor belongs to another list")
+    return {"email": {"S": email}, "imdbID": {"S": imdb_id}}
+
 class FavoritesRepository:
     @staticmethod
     def get_imdb_id_from_title(title: str, table_name: str):
@@ -46,6 +76,28 @@ class FavoritesRepository:
         )
         return [{"Title": s["Title"]["S"], "imdbID": s["imdbID"]["S"]} for s in response.get("Items", [])]
 
+    @staticmethod
+    def get_favorites_page(table_name: str, email: str, limit: int, cursor: str = None):
+        """{"items": up to limit favorites after cursor, "next_cursor": cursor of the next page or None}"""
+        params = {
+            "TableName": table_name,
+            "KeyConditionExpression": "email = :email",
+            "ExpressionAttributeValues": {":email": {"S": email}},
+            # One extra item tells whether there is a next page, so the
+            # last page never links to an empty one
+            "Limit": limit + 1,
+        }
+        if cursor:
+            params["ExclusiveStartKey"] = decode_cursor(cursor, email)
+        response = dynamodb.query(**params)
+        items = response.get("Items", [])
+        has_more = len(items) > limit or "LastEvaluatedKey" in response
+        items = items[:limit]
+        return {
+            "items": [{"Title": m.get("Title", {}).get("S", "Unknown"), "imdbID": m["imdbID"]["S"]} for m in items],
+            "next_cursor": encode_cursor(email, items[-1]["imdbID"]["S"]) if has_more and items else None,
+        }
+
     @staticmethod
     def add_favorite_movie(email: str, title: str, imdb_id: str = None):
         
@@ -1,5 +1,6 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query
 from urllib.parse import unquote
+from app.repositories.favorites_repository import InvalidCursor, MAX_PAGE_SIZE
 from app.services.favorites_service import FavoritesService
 #FAST_API ROUTES
 router = APIRouter()
@@ -12,6 +13,20 @@ async def get_favorite_movies(email: str):
 async def get_favorite_series(email: str):
     return FavoritesService.get_favorite_series(email)
 
+@router.get("/favorites/movies/{email}/page")
+async def get_favorite_movies_page(email: str, limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE), cursor: str = None):
+    try:
+        return FavoritesService.get_favorite_movies_page(email, limit, cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/favorites/series/{email}/page")
+async def get_favorite_series_page(email: str, limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE), cursor: str = None):
+    try:
+        return FavoritesService.get_favorite_series_page(email, limit, cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.post("/favorites/movies/{email}/{title}")
 async def add_favorite_movie(email: str, title: str, imdb_id: str = None):
     decoded_title = unquote(title)
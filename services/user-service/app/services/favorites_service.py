@@ -1,4 +1,4 @@
-from app.repositories.favorites_repository import FavoritesRepository
+from app.repositories.favorites_repository import FavoritesRepository, USER_MOVIES_TABLE, USER_SERIES_TABLE
 
 class FavoritesService:
     @staticmethod
@@ -9,6 +9,14 @@ class FavoritesService:
     def get_favorite_series(email: str):
         return FavoritesRepository.get_favorite_series(email)
 
+    @staticmethod
+    def get_favorite_movies_page(email: str, limit: int, cursor: str = None):
+        return FavoritesRepository.get_favorites_page(USER_MOVIES_TABLE, email, limit, cursor)
+
+    @staticmethod
+    def get_favorite_series_page(email: str, limit: int, cursor: str = None):
+        return FavoritesRepository.get_favorites_page(USER_SERIES_TABLE, email, limit, cursor)
+
     @staticmethod
     def add_favorite_movie(email: str, title: str, imdb_id: str = None):
         return FavoritesRepository.add_favorite_movie(email, title, imdb_id)
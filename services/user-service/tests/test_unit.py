@@ -307,4 +307,130 @@ class TestFavoritesAPI:
             
             # Verify that the title was properly decoded
             mock_service.assert_called_once_with(TEST_EMAIL, expected_title, None)
-            assert response.status_code == 200
\ No newline at end of file
+            assert response.status_code == 200
+
+class TestFavoritesPagination:
+    """Cursor pages over a user's favorites"""
+
+    @staticmethod
+    def fake_query(imdb_ids):
+        """DynamoDB query over one user's favorites, honouring Limit and ExclusiveStartKey"""
+        def query(**params):
+            start = params.get("ExclusiveStartKey", {}).get("imdbID", {}).get("S", "")
+            rest = [i for i in sorted(imdb_ids) if i > start]
+            page = rest[:params["Limit"]]
+            response = {"Items": [{"Title": {"S": f"Movie {i}"}, "imdbID": {"S": i}} for i in page]}
+            if len(rest) > len(page):
+                response["LastEvaluatedKey"] = {"email": {"S": TEST_EMAIL}, "imdbID": {"S": page[-1]}}
+            return response
+        return query
+
+    @patch('app.repositories.favorites_repository.dynamodb')
+    def test_pages_walk_the_whole_list(self, mock_dynamodb):
+        """Following next_cursor returns every favorite once; the last page has no cursor"""
+        imdb_ids = [f"tt{i:07d}" for i in range(45)]
+        mock_dynamodb.query.side_effect = self.fake_query(imdb_ids)
+
+        seen, cursor, pages = [], None, 0
+        while True:
+            params = {"limit": 20, **({"cursor": cursor} if cursor else {})}
+            response = client.get(f"/api/favorites/movies/{TEST_EMAIL}/page", params=params)
+            assert response.status_code == 200
+            body = response.json()
+            seen += [item["imdbID"] for item in body["items"]]
+            pages += 1
+            cursor = body["next_cursor"]
+            if not cursor:
+                break
+
+        assert seen == imdb_ids
+        assert pages == 3
+        assert mock_dynamodb.query.call_args_list[0][1]["Limit"] == 21
+
+    @patch('app.repositories.favorites_repository.dynamodb')
+    def test_exact_last_page_has_no_cursor(self, mock_dynamodb):
+        """A list that fills the page exactly does not link to an empty page"""
+        mock_dynamodb.query.side_effect = self.fake_query([f"tt{i:07d}" for i in range(20)])
+
+        body = client.get(f"/api/favorites/series/{TEST_EMAIL}/page?limit=20").json()
+
+        assert len(body["items"]) == 20
+        assert body["next_cursor"] is None
+
+    @patch('app.repositories.favorites_repository.dynamodb')
+    def test_rejects_foreign_or_malformed_cursor(self, mock_dynamodb):
+        """A cursor only continues the list it came from"""
+        from app.repositories.favorites_repository import encode_cursor
+
+        other = encode_cursor("other@example.com", TEST_IMDB_ID)
+        assert client.get(f"/api/favorites/movies/{TEST_EMAIL}/page", params={"cursor": other}).status_code == 400
+        assert client.get(f"/api/favorites/movies/{TEST_EMAIL}/page", params={"cursor": "!!"}).status_code == 400
+        assert client.get(f"/api/favorites/movies/{TEST_EMAIL}/page?limit=1000").status_code == 422
+        mock_dynamodb.query.assert_not_called()
+
+
+class TestDynamoDBResilience:
+    """Retries and circuit breaking around the DynamoDB client"""
+
+    def setup_method(self):
+        from app.core.resilience import CircuitBreaker, ResilientClient, RetryPolicy
+        self.raw_client = Mock()
+        self.breaker = CircuitBreaker("dynamodb", failure_threshold=2, recovery_timeout=30)
+        self.dynamodb = ResilientClient(self.raw_client, RetryPolicy(max_attempts=3, sleep=lambda seconds: None), self.breaker)
+
+    @staticmethod
+    def throttled():
+        from botocore.exceptions import ClientError
+        return ClientError({"Error": {"Code": "ProvisionedThroughputExceededException"}}, "Query")
+
+    def test_throttled_query_is_retried(self):
+        """A throttled query succeeds on retry"""
+        self.raw_client.query.side_effect = [self.throttled(), {"Items": [{"Title": {"S": TEST_MOVIE_TITLE}, "imdbID": {"S": TEST_IMDB_ID}}]}]
+
+        with patch('app.repositories.favorites_repository.dynamodb', self.dynamodb):
+            result = FavoritesRepository.get_favorite_movies(TEST_EMAIL)
+
+        assert result == [{"Title": TEST_MOVIE_TITLE, "imdbID": TEST_IMDB_ID}]
+        assert self.raw_client.query.call_count == 2
+
+    def test_open_circuit_returns_503(self):
+        """Once the breaker opens, the API answers 503 without calling DynamoDB"""
+        from app.main import app as service_app
+        self.raw_client.query.side_effect = self.throttled()
+
+        with patch('app.repositories.favorites_repository.dynamodb', self.dynamodb):
+            response = TestClient(service_app).get(f"/api/favorites/movies/{TEST_EMAIL}")
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "30"
+        assert self.raw_client.query.call_count == 2
+
+
+class TestTokenAuth:
+    """Favorites endpoints behind local JWT verification"""
+
+    def test_favorites_require_valid_access_token(self):
+        import json
+        import time
+        import jwt
+        from cryptography.hazmat.primitives.asymmetric import rsa
+        from jwt.algorithms import RSAAlgorithm
+        from app.core.security import JWKSCache, TokenAuthMiddleware, TokenVerifier
+
+        issuer = "https://cognito-idp.us-east-1.amazonaws.com/us-east-1_test"
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        jwk = json.loads(RSAAlgorithm.to_jwk(key.public_key()))
+        jwk.update(kid="k1", alg="RS256")
+        verifier = TokenVerifier(issuer, JWKSCache("jwks-url", fetch=lambda url: {"keys": [jwk]}))
+        secured = FastAPI()
+        secured.add_middleware(TokenAuthMiddleware, verifier=verifier)
+        secured.include_router(router, prefix="/api")
+        secured_client = TestClient(secured)
+        token = jwt.encode({"iss": issuer, "token_use": "access", "sub": "u1", "exp": int(time.time()) + 60},
+                           key, algorithm="RS256", headers={"kid": "k1"})
+
+        with patch.object(FavoritesService, 'get_favorite_movies', return_value=[]):
+            assert secured_client.get(f"/api/favorites/movies/{TEST_EMAIL}").status_code == 401
+            response = secured_client.get(f"/api/favorites/movies/{TEST_EMAIL}",
+                                          headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 200